@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+"""
+    Computer player for the twisted connect 4 game.
+
+    Negamax with alpha-beta pruning on top of the bitboard, with iterative deepening so that it always has
+    a move ready when the time runs out, and a zobrist hashed transposition table so states reached
+    through different move orders are only searched once. With more than two players the search is
+    paranoid: the other players are one side that plays against the computer player together, so
+    consecutive opponent turns are all minimising nodes. Positions in an opening book (see book.py) are
+    played from the book without searching at all.
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import time
+import random
+
+import engine
+
+# Bound types stored in the transposition table, the stored value is exact, at least or at most the real value.
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+WIN_VALUE = 10000 # added to the score difference of a finished game, so the search prefers winning to scoring.
+
+class SearchTimeoutException(Exception):
+    """Raised inside the search when the time budget runs out, the deepest finished iteration is used instead."""
+
+def evaluate(state, root_id=None):
+    """Scores a state for the side to move, using the same scoring as task2.Board.calculate_scores.
+    The sides are the searching player against every other player together, so the best opponent score is used.
+
+    Keyword Arguments:
+    root_id (default: None) -- id of the searching player, the player to move if None.
+
+    Returns:
+    The score difference of the searching player, negated when it is an opponent's turn.
+    """
+    scores = engine.scores(state)
+    root_id = state.player_id if root_id is None else root_id
+    own_score = scores.pop(root_id)
+    value = own_score - max(scores.values())
+    if engine.is_terminal(state):
+        value += WIN_VALUE if value > 0 else -WIN_VALUE if value < 0 else 0
+    return value if state.player_id == root_id else -value
+
+class Zobrist():
+    def __init__(self, seed=0):
+        """Creates a zobrist hasher, random keys are created the first time a feature is seen.
+
+        Keyword Arguments:
+        seed (default: 0) -- seed for the random keys, so hashes are the same between runs.
+        """
+        self.__random = random.Random(seed)
+        self.__keys = {}
+
+    def key(self, feature):
+        """Gets the random 64 bit key of a feature, e.g. (player id, bit index)."""
+        key = self.__keys.get(feature)
+        if key is None:
+            key = self.__keys[feature] = self.__random.getrandbits(64)
+        return key
+
+    def hash(self, state):
+        """Calculates the hash of a state from scratch."""
+        bitboard = state.bitboard
+        value = self.key(("turn", state.turn))
+        for owner, mask in [("obstacle", bitboard.obstacles)] + list(bitboard.players.items()):
+            while mask:
+                lowest = mask & -mask
+                value ^= self.key((owner, lowest.bit_length() - 1))
+                mask ^= lowest
+        for index, player_id in enumerate(state.player_ids):
+            value ^= self.key(("pop", player_id, state.pop_out_left[index]))
+            value ^= self.key(("special", player_id, state.special_disc_left[index]))
+        return value
+
+    def child_hash(self, value, state, move, child):
+        """Calculates the hash of a child state, only dropping a disc can be done without rehashing."""
+        move_type, column = move
+        if move_type != "n":
+            return self.hash(child)
+        bit_index = column * state.bitboard.column_bits + state.bitboard.heights[column]
+        return value ^ self.key((state.player_id, bit_index)) ^ self.key(("turn", state.turn)) ^ self.key(("turn", child.turn))
+
+class TranspositionTable():
+    def __init__(self, size=1 << 18):
+        """Creates a fixed size transposition table.
+
+        Keyword Arguments:
+        size (default: 262144) -- the amount of slots, rounded down to a power of 2.
+        """
+        self.size = 1 << (size.bit_length() - 1)
+        self.__slots = [None] * self.size
+        self.generation = 0 # bumped every search, entries from older searches are the first to be replaced.
+        self.probes = 0
+        self.hits = 0
+
+    def get(self, key):
+        """Gets the (depth, value, bound, best move) stored for a hash, or None."""
+        self.probes += 1
+        entry = self.__slots[key & (self.size - 1)]
+        if entry is None or entry[0] != key:
+            return None
+        self.hits += 1
+        return entry[2:]
+
+    def put(self, key, depth, value, bound, best_move):
+        """Stores a search result, keeping the deeper of the two entries unless the old one is from a previous search."""
+        index = key & (self.size - 1)
+        entry = self.__slots[index]
+        if entry is None or entry[1] != self.generation or depth >= entry[2]:
+            self.__slots[index] = (key, self.generation, depth, value, bound, best_move)
+
+    def new_search(self):
+        """Marks every stored entry as stale and resets the statistics."""
+        self.generation += 1
+        self.probes = 0
+        self.hits = 0
+
+class SearchPlayer():
+    def __init__(self, time_limit, max_depth=64, table_size=1 << 18, seed=0, book=None):
+        """Creates a computer player.
+
+        Arguments:
+        time_limit -- seconds the search may use per move.
+
+        Keyword Arguments:
+        max_depth (default: 64) -- the deepest iteration to search.
+        table_size (default: 262144) -- the amount of transposition table slots.
+        seed (default: 0) -- seed for the zobrist keys.
+        book (default: None) -- a book.OpeningBook, positions in it are played from the book without searching.
+        """
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.table = TranspositionTable(table_size)
+        self.zobrist = Zobrist(seed)
+        self.book = book
+        self.report = {} # statistics of the last search.
+        self.__deadline = 0
+        self.__nodes = 0
+        self.__root_id = None # the player the current search is for.
+        self.__root_key = 0 # hashed into every key with more than two players, the values depend on who the search is for.
+
+    def choose_move(self, state):
+        """Searches the state and returns the best move found in the time limit, as (move type, column)."""
+        start = time.perf_counter()
+        book_entry = self.book.probe(state) if self.book is not None else None
+        if book_entry is not None:
+            best_move, best_value, completed_depth = book_entry
+            self.report = {"depth": completed_depth, "value": best_value, "nodes": 0, "seconds": time.perf_counter() - start, "nodes_per_second": 0.0, "tt_hit_rate": 0.0, "book": True}
+            return best_move
+        self.__deadline = start + self.time_limit
+        self.__nodes = 0
+        self.__root_id = state.player_id
+        self.__root_key = self.zobrist.key(("root", state.player_id)) if len(state.player_ids) > 2 else 0
+        self.table.new_search()
+        root_key = self.zobrist.hash(state) ^ self.__root_key
+        best_move, best_value, completed_depth = engine.legal_moves(state)[0], 0, 0
+
+        for depth in range(1, self.max_depth + 1):
+            try:
+                value, move = self.__search_root(state, root_key, depth)
+            except SearchTimeoutException:
+                break
+            best_move, best_value, completed_depth = move, value, depth
+            if abs(value) >= WIN_VALUE or time.perf_counter() > self.__deadline: # the result is decided, or no time is left for a deeper search.
+                break
+
+        elapsed = time.perf_counter() - start
+        self.report = {
+            "depth": completed_depth,
+            "value": best_value,
+            "nodes": self.__nodes,
+            "seconds": elapsed,
+            "nodes_per_second": self.__nodes / elapsed if elapsed else 0.0,
+            "tt_hit_rate": self.table.hits / self.table.probes if self.table.probes else 0.0,
+            "book": False,
+        }
+        return best_move
+
+    def get_move(self, state):
+        """Same as choose_move, but yields the move type and then the column like task2.get_move_from_player."""
+        move_type, column = self.choose_move(state)
+        yield move_type
+        yield column
+
+    def __ordered_moves(self, state, table_move):
+        """Orders the moves so the best ones are likely searched first: the stored best move, then central drops, then PopOuts and special discs."""
+        centre = (state.bitboard.columns - 1) / 2
+        type_order = {"n": 0, "p": 1, "s": 2}
+        moves = sorted(engine.legal_moves(state), key=lambda move: (move != table_move, type_order[move[0]], abs(move[1] - centre)))
+        return moves
+
+    def __search_child(self, state, key, move, depth, alpha, beta):
+        """Applies a move and searches the child, returns its value for the side to move in state.
+        Only a change of side negates the value and the window, an opponent moving after an opponent stays minimising.
+        """
+        child = engine.apply(state, move)
+        child_key = self.zobrist.child_hash(key ^ self.__root_key, state, move, child) ^ self.__root_key
+        if (child.player_id == self.__root_id) == (state.player_id == self.__root_id):
+            return self.__negamax(child, child_key, depth - 1, alpha, beta)
+        return -self.__negamax(child, child_key, depth - 1, -beta, -alpha)
+
+    def __search_root(self, state, key, depth):
+        """Searches every root move to the given depth and returns (value, best move)."""
+        entry = self.table.get(key)
+        alpha, beta = -WIN_VALUE * 2, WIN_VALUE * 2
+        best_value, best_move = -WIN_VALUE * 2, None
+        for move in self.__ordered_moves(state, entry[3] if entry else None):
+            value = self.__search_child(state, key, move, depth, alpha, beta)
+            if value > best_value:
+                best_value, best_move = value, move
+            alpha = max(alpha, value)
+        self.table.put(key, depth, best_value, EXACT, best_move)
+        return best_value, best_move
+
+    def __negamax(self, state, key, depth, alpha, beta):
+        """Alpha-beta search, returns the value of the state for the side to move."""
+        self.__nodes += 1
+        if self.__nodes & 255 == 0 and time.perf_counter() > self.__deadline:
+            raise SearchTimeoutException
+
+        if depth == 0 or engine.is_terminal(state):
+            return evaluate(state, self.__root_id)
+
+        original_alpha = alpha
+        entry = self.table.get(key)
+        table_move = None
+        if entry:
+            entry_depth, entry_value, bound, table_move = entry
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return entry_value
+                if bound == LOWER_BOUND:
+                    alpha = max(alpha, entry_value)
+                elif bound == UPPER_BOUND:
+                    beta = min(beta, entry_value)
+                if alpha >= beta:
+                    return entry_value
+
+        best_value, best_move = -WIN_VALUE * 2, None
+        for move in self.__ordered_moves(state, table_move):
+            value = self.__search_child(state, key, move, depth, alpha, beta)
+            if value > best_value:
+                best_value, best_move = value, move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break # the opponent won't allow this line, so the other moves don't matter.
+
+        bound = UPPER_BOUND if best_value <= original_alpha else LOWER_BOUND if best_value >= beta else EXACT
+        self.table.put(key, depth, best_value, bound, best_move)
+        return best_value
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the computer player.
+"""
+
+import unittest
+from types import SimpleNamespace
+
+import ai
+import engine
+import task2
+
+class SearchPlayerTestCase(unittest.TestCase):
+    """Tests for 'ai.SearchPlayer'."""
+
+    def setUp(self):
+        self.players = [SimpleNamespace(id=1, pop_out_left=1, special_disc_left=1), SimpleNamespace(id=2, pop_out_left=1, special_disc_left=1)]
+
+    def test_completes_a_line(self):
+        board = task2.Board((6, 7))
+        board.board[5, 0:3] = 1
+        board.board[4, 0:2] = 2
+        state = engine.from_array(board.board, (1, 2), (1, 1), (1, 1), 0, 4)
+        self.assertEqual(ai.SearchPlayer(0.5, max_depth=3).choose_move(state), ("n", 3))
+
+    def test_moves_are_legal_until_the_board_is_full(self):
+        board = task2.Board((4, 5))
+        board.board[3, 1:3] = task2.OBSTACLE
+        board.refresh() # recount the column heights after editing the cells in place.
+        search_player = ai.SearchPlayer(0.05)
+        turn = 0
+        while board.is_empty_slot_available():
+            player = self.players[turn % 2]
+            state = engine.from_array(board.board, (1, 2), [p.pop_out_left for p in self.players], [p.special_disc_left for p in self.players], turn % 2, 3)
+            move = search_player.choose_move(state)
+            board.perform_move(player, *move) # raises if the move is illegal.
+            turn += 1
+        self.assertGreater(search_player.report["nodes"], 0)
+        self.assertLessEqual(search_player.report["tt_hit_rate"], 1.0)
+
+    def test_blocks_a_later_opponent(self):
+        board = task2.Board((6, 7))
+        board.board[5, 0:3] = 3 # the player after next has three in a row, the search assumes player 2 won't block it.
+        board.board[4, 0:2] = 1
+        state = engine.from_array(board.board, (1, 2, 3), (1, 1, 1), (1, 1, 1), 0, 4)
+        self.assertEqual(ai.SearchPlayer(0.5, max_depth=3).choose_move(state)[1], 3)
+
+    def test_evaluate_is_for_the_searching_side(self):
+        board = task2.Board((6, 7))
+        board.board[5, 0:4] = 3
+        for turn, expected in ((0, -1), (1, 1), (2, 1)): # player 1 to move, then an opponent of player 1 to move.
+            state = engine.from_array(board.board, (1, 2, 3), (1, 1, 1), (1, 1, 1), turn, 4)
+            self.assertEqual(ai.evaluate(state, root_id=1), expected)
+        state = engine.from_array(board.board, (1, 3), (1, 1), (1, 1), 1, 4)
+        self.assertEqual(ai.evaluate(state), ai.evaluate(state, root_id=3)) # two players, the player to move is the searching side.
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
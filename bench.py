@@ -0,0 +1,380 @@
+#!/usr/bin/env python
+"""
+    Benchmarks for the hot paths of both tasks.
+
+    Every case builds its inputs from a fixed seed, so two runs on different commits time exactly the
+    same work. Results are written as JSON, and a run can be compared against an older results file to
+    catch anything that got slower. A case can also be profiled with cProfile, and its peak memory
+    measured with tracemalloc.
+
+    Example: python bench.py --output after.json --compare before.json --filter board
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import cProfile
+import platform
+import argparse
+import statistics
+import subprocess
+import tracemalloc
+
+import numpy as np
+
+import colours
+import engine
+import record
+import replay
+import simulate
+import sparse_board
+import task1
+import task2
+
+SEED = 2024
+POSITIONS = 200 # positions every board case runs over, so no single position decides the timing.
+
+def random_states(rng, count, board_size=(6, 7), connect_size=4, obstacle_size=(2, 3)):
+    """Plays random games to random depths.
+
+    Returns:
+    A list of engine.GameState, with 2 players each.
+    """
+    states = []
+    while len(states) < count:
+        state = engine.new_game(board_size, (1, 2), connect_size, obstacle_size, rng=rng)
+        for _ in range(rng.randrange(board_size[0] * board_size[1])):
+            if engine.is_terminal(state):
+                break
+            state = engine.apply(state, rng.choice(engine.legal_moves(state)))
+        if not engine.is_terminal(state):
+            states.append(state)
+    return states
+
+def register_players(count=2):
+    """Makes a task2.PlayerTable of some players, the renderer needs their colours, and turns the colours on even if stdout isn't a terminal."""
+    colours.set_enabled(True)
+    table = task2.PlayerTable()
+    for _ in range(count):
+        task2.Player(table, name=f"Player {len(table) + 1}")
+    return table
+
+def setup_perform_move(rng, move_type):
+    """Times Board.perform_move with one move type, on positions where that move is legal."""
+    positions = [] # (cells, player id, column)
+    for state in random_states(rng, POSITIONS * 3):
+        moves = [move for move in engine.legal_moves(state) if move[0] == move_type]
+        if moves:
+            positions.append((engine.board_array(state), state.player_id, rng.choice(moves)[1]))
+        if len(positions) == POSITIONS:
+            break
+    board = task2.Board(positions[0][0].shape)
+    players = {id: replay.ReplayPlayer(id) for id in (1, 2)}
+
+    def run():
+        for cells, player_id, column in positions:
+            board.board = cells.copy() # the move changes the board, so every run starts from a copy.
+            player = players[player_id]
+            player.pop_out_left = player.special_disc_left = 1
+            board.perform_move(player, move_type, column)
+    return run, len(positions)
+
+def setup_snapshot(rng, board_size):
+    """Times branching from scored positions the way a search does: restore a snapshot, then play a move."""
+    branches = [] # (board, snapshot, player, move)
+    players = {id: replay.ReplayPlayer(id) for id in (1, 2)}
+    for state in random_states(rng, POSITIONS, board_size):
+        board = task2.Board(board_size)
+        board.board = engine.board_array(state)
+        board.calculate_scores()
+        branches.append((board, board.snapshot(players.values()), players[state.player_id], rng.choice(engine.legal_moves(state))))
+
+    def run():
+        for board, snapshot, player, (move_type, column) in branches:
+            board.restore(snapshot)
+            board.perform_move(player, move_type, column)
+            board.calculate_scores()
+    return run, len(branches)
+
+def setup_game_scoring(rng, board_size, incremental):
+    """Times a whole recorded game played on a Board, with calculate_scores after every move."""
+    config = {"board_size": board_size, "obstacle_size": (2, 3), "connect_size": 4, "players": 2}
+    games = [simulate.play_game(config, rng.randrange(1 << 32)) for _ in range(5)]
+    recorded = []
+    for game in games:
+        header = record.unpack_header(game["record"], 0)[0]
+        moves = [record.decode_move(byte) for byte in game["record"][record.HEADER.size:]]
+        recorded.append((header, moves))
+
+    def run():
+        for header, moves in recorded:
+            board = task2.Board(header.board_size)
+            board.add_obstacle(header.obstacle_size, column=header.obstacle_column)
+            players = [replay.ReplayPlayer(1), replay.ReplayPlayer(2)]
+            for turn, (move_type, column) in enumerate(moves):
+                board.perform_move(players[turn % 2], move_type, column)
+                board.calculate_scores(header.connect_size, incremental=incremental)
+    return run, sum(len(moves) for _, moves in recorded)
+
+def setup_rescan(rng, board_size):
+    """Times scoring a whole board from scratch."""
+    positions = [engine.board_array(state) for state in random_states(rng, POSITIONS, board_size)]
+    board = task2.Board(board_size)
+
+    def run():
+        for cells in positions:
+            board.board = cells
+            board.calculate_scores(incremental=False)
+    return run, len(positions)
+
+def setup_gravity(rng, board_size):
+    """Times Board.__apply_gravity on boards with discs floating everywhere."""
+    generator = np.random.default_rng(rng.randrange(1 << 32))
+    positions = [generator.choice([task2.EMPTY, task2.EMPTY, 1, 2, task2.OBSTACLE], size=board_size).astype(np.uint8) for _ in range(POSITIONS)]
+    board = task2.Board(board_size)
+
+    def run():
+        for cells in positions:
+            board.board = cells.copy()
+            board._Board__apply_gravity()
+    return run, len(positions)
+
+def setup_render(rng, board_size):
+    """Times Board.__str__ with coloured output."""
+    players = register_players()
+    positions = [engine.board_array(state) for state in random_states(rng, POSITIONS, board_size)]
+    board = task2.Board(board_size, seed=rng.randrange(1 << 32), players=players)
+
+    def run():
+        for cells in positions:
+            board.board = cells
+            str(board)
+    return run, len(positions)
+
+def setup_players_turn(rng, player_count):
+    """Times a turn of the game loop on a big board: a move, updating every score and drawing the board."""
+    board_size = (24, 28)
+    moves = [(rng.choice("nnnnnnnns"), rng.randrange(board_size[1])) for _ in range(board_size[0] * board_size[1] // 2)]
+
+    def run():
+        board = task2.Board(board_size, seed=0, players=register_players(player_count))
+        players = list(board.players.values())
+        for turn, (move_type, column) in enumerate(moves):
+            try:
+                board.perform_move(players[turn % player_count], move_type, column)
+            except task2.IllegalMoveException:
+                pass
+            board.players.update_scores(board.score_counts())
+            str(board)
+    return run, len(moves)
+
+def setup_sparse_game(rng, board_size):
+    """Times random moves on a huge sparse_board.SparseBoard, with calculate_scores after every move."""
+    moves = [(rng.choice("nnnnnnps"), rng.randrange(board_size[1] // 50)) for _ in range(2000)] # crowded into a few columns, so they stack up.
+
+    def run():
+        board = sparse_board.SparseBoard(board_size)
+        board.add_obstacle(column=0)
+        players = [replay.ReplayPlayer(1), replay.ReplayPlayer(2)]
+        for turn, (move_type, column) in enumerate(moves):
+            player = players[turn % 2]
+            player.pop_out_left = player.special_disc_left = 1
+            try:
+                board.perform_move(player, move_type, column)
+            except engine.IllegalMoveException:
+                continue # e.g. popping out a disc of the other player, the same moves fail every run.
+            board.calculate_scores()
+    return run, len(moves)
+
+def setup_self_play(rng, board_size):
+    """Times whole random games on the engine, as played by simulate.py."""
+    config = {"board_size": board_size, "obstacle_size": (2, 3), "connect_size": 4, "players": 2}
+    seeds = [rng.randrange(1 << 32) for _ in range(20)]
+
+    def run():
+        for seed in seeds:
+            simulate.play_game(config, seed)
+    return run, len(seeds)
+
+def setup_is_prime(rng, magnitude):
+    """Times task1.is_prime on random numbers below magnitude."""
+    numbers = [rng.randrange(magnitude) for _ in range(10000)]
+    task1.find_prime_numbers(numbers) # grow the sieve first, that is a one off cost.
+
+    def run():
+        for number in numbers:
+            task1.is_prime(number)
+    return run, len(numbers)
+
+def setup_statistics(rng, count):
+    """Times task1.calculate_statistics on a list of count numbers."""
+    numbers = [rng.randint(-10 ** 9, 10 ** 9) for _ in range(count)]
+    return (lambda: task1.calculate_statistics(numbers)), count
+
+def setup_validate(rng, count):
+    """Times task1.validate_user_number_input on a line of count numbers."""
+    text = " ".join(str(rng.randint(-10 ** 9, 10 ** 9)) for _ in range(count))
+    return (lambda: task1.validate_user_number_input(text)), count
+
+def setup_parse_array(rng, count):
+    """Times task1.parse_number_array, the NumPy path of validate_user_number_input."""
+    text = " ".join(str(rng.randint(-10 ** 9, 10 ** 9)) for _ in range(count))
+    return (lambda: task1.parse_number_array(text)), count
+
+# name -> (setup function, arguments after the random generator). The setup returns the function to time and how many items it does per call.
+CASES = {
+    "board.perform_move[n]": (setup_perform_move, "n"),
+    "board.perform_move[p]": (setup_perform_move, "p"),
+    "board.perform_move[s]": (setup_perform_move, "s"),
+    "board.snapshot_restore[6x7]": (setup_snapshot, (6, 7)),
+    "board.calculate_scores[game 6x7]": (setup_game_scoring, (6, 7), True),
+    "board.calculate_scores[game 12x14]": (setup_game_scoring, (12, 14), True),
+    "board.calculate_scores[rescan 6x7]": (setup_rescan, (6, 7)),
+    "board.calculate_scores[rescan 12x14]": (setup_rescan, (12, 14)),
+    "board.apply_gravity[6x7]": (setup_gravity, (6, 7)),
+    "board.apply_gravity[24x28]": (setup_gravity, (24, 28)),
+    "board.str[6x7]": (setup_render, (6, 7)),
+    "board.str[12x14]": (setup_render, (12, 14)),
+    "board.turn[2 players]": (setup_players_turn, 2),
+    "board.turn[254 players]": (setup_players_turn, 254),
+    "sparse_board.game[1000x10000]": (setup_sparse_game, (1000, 10000)),
+    "engine.self_play[6x7]": (setup_self_play, (6, 7)),
+    "task1.is_prime[10^3]": (setup_is_prime, 10 ** 3),
+    "task1.is_prime[10^7]": (setup_is_prime, 10 ** 7),
+    "task1.is_prime[10^12]": (setup_is_prime, 10 ** 12),
+    "task1.is_prime[10^30]": (setup_is_prime, 10 ** 30),
+    "task1.calculate_statistics[10^3]": (setup_statistics, 10 ** 3),
+    "task1.calculate_statistics[10^6]": (setup_statistics, 10 ** 6),
+    "task1.validate_user_number_input[10^3]": (setup_validate, 10 ** 3),
+    "task1.validate_user_number_input[10^6]": (setup_validate, 10 ** 6),
+    "task1.parse_number_array[10^6]": (setup_parse_array, 10 ** 6),
+}
+
+def measure(function, items, repeat=5, min_time=0.2):
+    """Times a function, calling it enough times in a row that every repeat takes at least min_time.
+
+    Returns:
+    A dictionary with the best and median seconds per item and the items per second of the best repeat.
+    """
+    function() # warm up caches, lazy imports and the like.
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9)))
+    timings = [elapsed]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        timings.append(time.perf_counter() - start)
+    per_item = [timing / (loops * items) for timing in timings]
+    return {"items": items, "loops": loops, "best": min(per_item), "median": statistics.median(per_item), "items_per_second": 1 / min(per_item)}
+
+def run_cases(names, repeat=5, min_time=0.2, profile_directory=None, memory=False, seed=SEED):
+    """Runs some of the benchmark cases.
+
+    Arguments:
+    names -- the names of the cases in CASES to run.
+
+    Keyword Arguments:
+    repeat (default: 5) -- how many times every case is timed.
+    min_time (default: 0.2) -- seconds every repeat takes at least.
+    profile_directory (default: None) -- directory to write a cProfile .prof file of every case to.
+    memory (default: False) -- also measure the peak memory of a call with tracemalloc.
+    seed (default: SEED) -- seed for the inputs of every case, each case gets the same inputs however many run.
+
+    Returns:
+    A dictionary of case name to its results.
+    """
+    results = {}
+    for name in names:
+        setup, *arguments = CASES[name]
+        function, items = setup(random.Random(f"{seed} {name}"), *arguments)
+        results[name] = measure(function, items, repeat, min_time)
+        if profile_directory:
+            profiler = cProfile.Profile()
+            profiler.runcall(function)
+            profiler.dump_stats(os.path.join(profile_directory, "".join(character if character.isalnum() else "_" for character in name) + ".prof"))
+        if memory:
+            tracemalloc.start()
+            function()
+            results[name]["peak_memory"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return results
+
+def environment():
+    """Describes where the benchmarks ran, so results from different machines aren't compared by accident."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"commit": commit or None, "python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(), "processor": platform.processor(), "seed": SEED}
+
+def compare(results, baseline, threshold):
+    """Compares results against an older results file.
+
+    Arguments:
+    results -- the results of this run.
+    baseline -- the results of the older run.
+    threshold -- how many times slower a case can get before it counts as a regression, e.g. 1.1.
+
+    Returns:
+    A list of the names of the cases that regressed.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["best"] / baseline[name]["best"]
+        if ratio > threshold:
+            regressions.append(name)
+        print(f"{name:<42} {ratio:6.2f}x the time of the baseline{'  REGRESSION' if ratio > threshold else ''}")
+    return regressions
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the hot paths of task1 and task2.")
+    parser.add_argument("--filter", nargs="+", default=[], help="only run the cases with one of these in their name")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    parser.add_argument("--repeat", type=int, default=5, help="times every case is timed, the best one counts")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds every repeat runs for at least")
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--compare", help="JSON results of an older run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.1, help="slowdown against --compare that counts as a regression")
+    parser.add_argument("--profile", metavar="DIRECTORY", help="write a cProfile .prof file of every case to this directory")
+    parser.add_argument("--memory", action="store_true", help="also measure the peak memory of every case with tracemalloc")
+    arguments = parser.parse_args(arguments)
+
+    names = [name for name in CASES if not arguments.filter or any(part in name for part in arguments.filter)]
+    if arguments.list:
+        print("\n".join(names))
+        return 0
+    if arguments.profile:
+        os.makedirs(arguments.profile, exist_ok=True)
+    results = run_cases(names, arguments.repeat, arguments.min_time, arguments.profile, arguments.memory)
+    for name, result in results.items():
+        memory = f", peak {result['peak_memory'] / 1024:,.0f}KiB" if "peak_memory" in result else ""
+        print(f"{name:<42} {result['best'] * 1e6:12.2f}us per item {result['items_per_second']:14,.0f} per second{memory}")
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump({"environment": environment(), "results": results}, file, indent=2)
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            baseline = json.load(file)
+        if baseline["environment"]["machine"] != platform.machine():
+            print("The baseline was measured on a different kind of machine, the comparison is only a rough guide.")
+        if compare(results, baseline["results"], arguments.threshold):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
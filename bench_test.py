@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the benchmark suite, these only check that it runs and compares, not how fast anything is.
+"""
+
+import unittest
+
+import bench
+import colours
+
+class BenchTestCase(unittest.TestCase):
+    """Tests for 'bench.run_cases' and 'bench.compare'."""
+
+    def tearDown(self):
+        colours.set_enabled(None) # the render cases force the colours on.
+
+    def test_every_case_sets_up(self):
+        for name, (setup, *arguments) in bench.CASES.items():
+            if "10^6" in name or "self_play" in name:
+                continue # too slow to set up in a unit test.
+            function, items = setup(bench.random.Random(name), *arguments)
+            self.assertGreater(items, 0, name)
+            function()
+
+    def test_results_and_regressions(self):
+        results = bench.run_cases(["task1.calculate_statistics[10^3]"], repeat=2, min_time=0.001, memory=True)
+        result = results["task1.calculate_statistics[10^3]"]
+        self.assertEqual(result["items"], 1000)
+        self.assertLessEqual(result["best"], result["median"])
+        self.assertIn("peak_memory", result)
+        baseline = {"task1.calculate_statistics[10^3]": {"best": result["best"] / 2}}
+        self.assertEqual(bench.compare(results, baseline, 1.1), ["task1.calculate_statistics[10^3]"])
+        self.assertEqual(bench.compare(results, baseline, 3), [])
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
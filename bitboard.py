@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+"""
+    Bitboard representation of the twisted connect 4 game state.
+
+    Every player (and the obstacle) gets one integer where each bit is a cell of the board.
+    The bits are laid out column by column from the bottom up, with one spare bit on top of
+    every column that is always 0. That spare bit stops a shift from carrying a line of discs
+    over into the next column, so lines can be counted with a handful of shifts and ands.
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import numpy as np
+
+# Cell types, these are the same values task2 stores in its board matrix.
+EMPTY = 0
+OBSTACLE = 255
+
+class BitBoard():
+    def __init__(self, rows, columns):
+        """Creates an empty bitboard.
+
+        Arguments:
+        rows -- how many rows the board has.
+        columns -- how many columns the board has.
+        """
+        self.rows = rows
+        self.columns = columns
+        self.column_bits = rows + 1 # bits used per column, including the spare bit on top.
+        self.players = {} # player id -> bitmask of their discs.
+        self.obstacles = 0 # bitmask of the obstacle cells.
+        self.heights = [0] * columns # amount of filled cells in every column, columns are always filled from the bottom up.
+        self.__column_mask = (1 << rows) - 1 # the playable bits of one column, before shifting it into place.
+
+    def add_obstacle(self, obstacle_size, column):
+        """Adds an obstacle to the bottom of an empty board, like task2.Board.add_obstacle but at a given column.
+
+        Arguments:
+        obstacle_size -- A 2 element tuple that describes the size of the obstacle (rows, columns).
+        column -- The leftmost column of the obstacle.
+        """
+        for obstacle_column in range(column, column + obstacle_size[1]):
+            for row in range(obstacle_size[0]):
+                self.obstacles |= self.bit(row, obstacle_column)
+            self.heights[obstacle_column] = obstacle_size[0]
+
+    def copy(self):
+        """Creates an independent copy of the bitboard, the masks are ints so only the containers need copying."""
+        clone = BitBoard.__new__(BitBoard)
+        clone.rows, clone.columns, clone.column_bits = self.rows, self.columns, self.column_bits
+        clone.players = dict(self.players)
+        clone.obstacles = self.obstacles
+        clone.heights = list(self.heights)
+        clone._BitBoard__column_mask = self.__column_mask
+        return clone
+
+    def bit(self, row, column):
+        """Gets the single bit mask of a cell, where row 0 is the bottom of the board."""
+        return 1 << (column * self.column_bits + row)
+
+    def cell(self, row, column):
+        """Gets the cell type at a position, where row 0 is the bottom of the board."""
+        bit = self.bit(row, column)
+        if self.obstacles & bit:
+            return OBSTACLE
+        for player_id, mask in self.players.items():
+            if mask & bit:
+                return player_id
+        return EMPTY
+
+    def occupied(self):
+        """Gets the mask of every filled cell."""
+        mask = self.obstacles
+        for player_mask in self.players.values():
+            mask |= player_mask
+        return mask
+
+    def is_full(self):
+        """Checks if every cell of the board is filled."""
+        return all(height == self.rows for height in self.heights)
+
+    def can_drop(self, column):
+        """Checks if a disc can be dropped into the column."""
+        return self.heights[column] < self.rows
+
+    def can_pop_out(self, player_id, column):
+        """Checks if the bottom disc of the column belongs to the player."""
+        return bool(self.players.get(player_id, 0) & self.bit(0, column))
+
+    def drop(self, player_id, column):
+        """Drops a disc for the player on top of the column, the column must not be full.
+
+        Returns:
+        The row the disc landed on, where row 0 is the bottom of the board.
+        """
+        row = self.heights[column]
+        self.players[player_id] = self.players.get(player_id, 0) | self.bit(row, column)
+        self.heights[column] = row + 1
+        return row
+
+    def pop_out(self, column):
+        """Removes the bottom cell of the column and lets the rest of the column fall by one."""
+        self.__remove_rows(column, 0, 0)
+
+    def blast(self, column):
+        """Empties the 3x3 area around the slot a disc would land on in the column, then applies gravity.
+        This is the special disc, the column must not be full.
+
+        Returns:
+        The columns that were changed by the blast.
+        """
+        row = self.heights[column]
+        low, high = max(0, row - 1), min(self.rows - 1, row + 1)
+        blasted_columns = range(max(0, column - 1), min(self.columns, column + 2))
+        for blasted_column in blasted_columns:
+            self.__remove_rows(blasted_column, low, high)
+        return blasted_columns
+
+    def __remove_rows(self, column, low, high):
+        """Removes the rows low to high (inclusive) of a column and moves everything above them down.
+        Since columns are always filled from the bottom, this is the same as emptying the cells and applying gravity.
+        """
+        shift = column * self.column_bits
+        keep_below = (1 << low) - 1 # mask of the rows under the removed ones, they stay where they are.
+        column_mask = self.__column_mask << shift
+
+        def compact(mask):
+            cells = (mask >> shift) & self.__column_mask
+            cells = (cells & keep_below) | ((cells >> (high + 1)) << low) # drop the removed rows, moving the upper part down.
+            return (mask & ~column_mask) | (cells << shift)
+
+        self.obstacles = compact(self.obstacles)
+        for player_id, mask in self.players.items():
+            self.players[player_id] = compact(mask)
+        self.heights[column] -= max(0, min(high + 1, self.heights[column]) - low)
+
+    def count_lines(self, mask, connect_size):
+        """Counts every line of connect_size cells in all 4 directions that is entirely inside the mask.
+        A line of length n scores n - (connect_size - 1) points, which is exactly how many of these windows it contains.
+
+        Arguments:
+        mask -- the bitmask to count the lines of.
+        connect_size -- the amount of cells in a row needed to count as a line.
+        """
+        lines = 0
+        for direction in (1, self.column_bits, self.column_bits - 1, self.column_bits + 1): # vertical, horizontal and both diagonals
+            windows = mask
+            for offset in range(1, connect_size):
+                windows &= mask >> (offset * direction) # keep bits that still have a disc offset cells further along the direction.
+            lines += windows.bit_count()
+        return lines
+
+    def scores(self, connect_size):
+        """Calculates the scores of every player, this gives the same result as task2.Board.calculate_scores.
+
+        Returns:
+        A dictionary of player id to score, players without a point are omitted.
+        """
+        scores = {}
+        for player_id, mask in self.players.items():
+            score = self.count_lines(mask, connect_size)
+            if score:
+                scores[player_id] = score
+        return scores
+
+    @classmethod
+    def from_array(cls, board):
+        """Creates a bitboard from a task2 board matrix, where row 0 is the top of the board.
+
+        Arguments:
+        board -- 2 dimentional uint8 numpy array.
+
+        Raises:
+        ValueError -- if a column has a gap in it, since the bitboard only stores settled columns.
+        """
+        rows, columns = board.shape
+        bitboard = cls(rows, columns)
+        for column in range(columns):
+            cells = board[::-1, column] # bottom up
+            height = int(np.count_nonzero(cells))
+            if np.any(cells[:height] == EMPTY):
+                raise ValueError(f"column {column} has a gap in it, it needs gravity applied first.")
+            bitboard.heights[column] = height
+            for row in range(height):
+                cell = int(cells[row])
+                if cell == OBSTACLE:
+                    bitboard.obstacles |= bitboard.bit(row, column)
+                else:
+                    bitboard.players[cell] = bitboard.players.get(cell, 0) | bitboard.bit(row, column)
+        return bitboard
+
+    def to_array(self):
+        """Converts the bitboard back to a task2 board matrix, where row 0 is the top of the board."""
+        board = np.zeros((self.rows, self.columns), dtype=np.uint8)
+        owners = [(OBSTACLE, self.obstacles)] + list(self.players.items())
+        for column in range(self.columns):
+            for row in range(self.heights[column]):
+                bit = self.bit(row, column)
+                for cell, mask in owners:
+                    if mask & bit:
+                        board[self.rows - 1 - row, column] = cell
+                        break
+        return board
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the bitboard, every operation is checked against task2.Board doing the same move.
+"""
+
+import random
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+import bitboard
+import task2
+
+class BitBoardTestCase(unittest.TestCase):
+    """Tests for 'bitboard.BitBoard'."""
+
+    def test_moves_and_scores_match_board(self):
+        rng = random.Random(11)
+        for game in range(40):
+            random.seed(game)
+            connect_size = rng.choice([3, 4])
+            board = task2.Board((rng.randint(3, 8), rng.randint(3, 9)))
+            board.add_obstacle((rng.randint(1, 2), rng.randint(1, 3)))
+            bits = bitboard.BitBoard.from_array(board.board)
+            players = [SimpleNamespace(id=id, pop_out_left=3, special_disc_left=3) for id in (1, 2, 3)]
+            for turn in range(60):
+                self.assertEqual(board.is_empty_slot_available(), not bits.is_full())
+                if bits.is_full():
+                    break
+                player = players[turn % len(players)]
+                move_type, column = rng.choice("nnnps"), rng.randrange(bits.columns)
+                try:
+                    board.perform_move(player, move_type, column)
+                except task2.IllegalMoveException:
+                    continue
+                match move_type:
+                    case "n":
+                        bits.drop(player.id, column)
+                    case "p":
+                        bits.pop_out(column)
+                    case "s":
+                        bits.blast(column)
+                np.testing.assert_array_equal(bits.to_array(), board.board)
+                self.assertEqual(bits.scores(connect_size), board.rescan_scores(connect_size))
+
+    def test_array_round_trip(self):
+        board = np.zeros((6, 7), dtype=np.uint8)
+        board[4:, 2:5] = bitboard.OBSTACLE
+        board[5, 0], board[4, 0], board[5, 6] = 1, 42, 254
+        self.assertEqual(bitboard.BitBoard.from_array(board).to_array().tolist(), board.tolist())
+
+    def test_floating_disc_is_rejected(self):
+        board = np.zeros((6, 7), dtype=np.uint8)
+        board[3, 1] = 1
+        with self.assertRaises(ValueError):
+            bitboard.BitBoard.from_array(board)
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
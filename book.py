@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+"""
+    Opening book and endgame tablebase for the computer player.
+
+    Positions are solved offline once with ai.SearchPlayer and stored with their best move, so a live
+    game that reaches one of them plays the stored move straight away instead of searching it again.
+    The book is built from every opening up to a few moves deep (for every obstacle column), and from
+    late endgames reached by random self-play, which are the positions the search can solve outright.
+
+    Every position is keyed on a 64 bit hash of the rules, the board, the PopOuts and special discs every
+    player has left and the player to move. A board and its mirror image play the same, so the key is the
+    smaller of the hashes of the two, and a move stored for the mirrored board is mirrored back on lookup.
+
+    A book file is a 16 byte header followed by the entries sorted by key (all little endian):
+        4s  magic, always b"C4BK"
+        B   format version
+        3x  padding
+        Q   entry count
+    and every entry is:
+        Q   key
+        B   best move, packed the same way as a record.py move byte
+        B   depth the move was searched to
+        i   value of the position for the player to move, the same as ai.evaluate
+    The entries are read through a memory map and found with a binary search, so opening a book is
+    instant and only the pages a lookup touches are ever read.
+
+    Example: python book.py build book.c4b --plies 3 --endgames 2000 --time 1
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import os
+import sys
+import time
+import struct
+import random
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import ai
+import engine
+import record
+from simulate import parse_size
+
+MAGIC = b"C4BK"
+VERSION = 1
+HEADER = struct.Struct("<4sB3xQ")
+ENTRY = np.dtype([("key", "<u8"), ("move", "u1"), ("depth", "u1"), ("value", "<i4")])
+
+class InvalidBookException(Exception):
+    """Raised when a book file is corrupt or from an unknown version."""
+    def __init__(self, path, message):
+        super().__init__(f"Invalid opening book {path}: {message}")
+
+def position_key(state):
+    """Gets the canonical key of a state, which is the same for a board and its mirror image.
+
+    Returns:
+    A tuple of the 64 bit key and whether it is the key of the mirrored board, in which case the
+    columns of any move stored under it have to be mirrored to be played on this board.
+    """
+    board = engine.board_array(state)
+    rules = struct.pack(f"<BBBB{3 * len(state.player_ids)}B", *board.shape, state.connect_size, state.turn,
+                        *state.player_ids, *state.pop_out_left, *state.special_disc_left)
+    key = int.from_bytes(hashlib.blake2b(rules + board.tobytes(), digest_size=8).digest(), "little")
+    mirrored_key = int.from_bytes(hashlib.blake2b(rules + board[:, ::-1].tobytes(), digest_size=8).digest(), "little")
+    return (mirrored_key, True) if mirrored_key < key else (key, False)
+
+def mirror_move(move, columns):
+    """Mirrors the column of a (move type, column) tuple, every move type plays the same mirrored."""
+    move_type, column = move
+    return move_type, columns - 1 - column
+
+class OpeningBook():
+    def __init__(self, path):
+        """Opens a book file, the entries are only read as they are looked up.
+
+        Arguments:
+        path -- the book file, see the module docstring for the format.
+
+        Raises:
+        InvalidBookException -- if the file is not a book or is cut short.
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            header = file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise InvalidBookException(path, "the header is cut short")
+        magic, version, count = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise InvalidBookException(path, f"unknown magic {magic!r} or version {version}")
+        if os.path.getsize(path) < HEADER.size + count * ENTRY.itemsize:
+            raise InvalidBookException(path, f"expected {count} entries")
+        if count:
+            self.entries = np.memmap(path, dtype=ENTRY, mode="r", offset=HEADER.size, shape=(count,))
+        else:
+            self.entries = np.zeros(0, dtype=ENTRY) # an empty file can't be memory mapped.
+        self.keys = self.entries["key"] # a view, searching it only touches the pages the binary search lands on.
+        self.hits = 0
+        self.probes = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def probe(self, state):
+        """Looks a state up in the book.
+
+        Returns:
+        A tuple of the best move for the player to move, its value and the depth it was searched to,
+        or None if the state isn't in the book.
+        """
+        self.probes += 1
+        key, mirrored = position_key(state)
+        index = int(np.searchsorted(self.keys, np.uint64(key)))
+        if index == len(self.keys) or int(self.keys[index]) != key:
+            return None
+        entry = self.entries[index]
+        move = record.decode_move(int(entry["move"]))
+        if mirrored:
+            move = mirror_move(move, state.bitboard.columns)
+        if move not in engine.legal_moves(state): # two positions can share a key, however unlikely.
+            return None
+        self.hits += 1
+        return move, int(entry["value"]), int(entry["depth"])
+
+def write_book(path, entries):
+    """Writes a book file, sorting the entries and keeping the deepest search of any key stored twice.
+
+    Arguments:
+    path -- the file to write, it is replaced if it exists.
+    entries -- array of the ENTRY dtype.
+    """
+    entries = np.sort(entries, order=["key", "depth"])[::-1] # the deepest entry of every key comes first.
+    entries = entries[np.unique(entries["key"], return_index=True)[1]] # unique also puts the keys back in ascending order.
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(entries)))
+        file.write(entries.tobytes())
+
+def opening_positions(config, plies):
+    """Gets every position up to a number of moves into a game, for every obstacle column.
+
+    Arguments:
+    config -- dictionary with the rules: board_size, obstacle_size, connect_size and players.
+    plies -- how many moves into the game to go.
+
+    Returns:
+    A dictionary of canonical key to state, mirror images are only kept once.
+    """
+    positions = {}
+    for obstacle_column in range(config["board_size"][1] - config["obstacle_size"][1] + 1):
+        layer = [engine.new_game(config["board_size"], range(1, config["players"] + 1), config["connect_size"], config["obstacle_size"], obstacle_column=obstacle_column)]
+        for ply in range(plies + 1):
+            next_layer = []
+            for state in layer:
+                key = position_key(state)[0]
+                if key in positions or engine.is_terminal(state):
+                    continue
+                positions[key] = state
+                if ply < plies:
+                    next_layer += [engine.apply(state, move) for move in engine.legal_moves(state)]
+            layer = next_layer
+    return positions
+
+def endgame_positions(config, count, empty_cells, seed=0):
+    """Gets positions near the end of random games, the ones the search can solve to the end.
+
+    Arguments:
+    config -- dictionary with the rules: board_size, obstacle_size, connect_size and players.
+    count -- how many games to play, every game gives at most one position.
+    empty_cells -- stop a game once at most this many cells are empty.
+
+    Keyword Arguments:
+    seed (default: 0) -- seed for the obstacle positions and the random moves.
+
+    Returns:
+    A dictionary of canonical key to state, mirror images are only kept once.
+    """
+    rng = random.Random(seed)
+    positions = {}
+    cells = config["board_size"][0] * config["board_size"][1]
+    for _ in range(count):
+        state = engine.new_game(config["board_size"], range(1, config["players"] + 1), config["connect_size"], config["obstacle_size"], rng=rng)
+        while not engine.is_terminal(state) and cells - sum(state.bitboard.heights) > empty_cells:
+            state = engine.apply(state, rng.choice(engine.legal_moves(state)))
+        if not engine.is_terminal(state):
+            positions.setdefault(position_key(state)[0], state)
+    return positions
+
+def solve_batch(states, time_limit):
+    """Solves a batch of states in a worker process, returning an array of the ENTRY dtype."""
+    search_player = ai.SearchPlayer(time_limit)
+    entries = np.zeros(len(states), dtype=ENTRY)
+    for index, state in enumerate(states):
+        move = search_player.choose_move(state)
+        key, mirrored = position_key(state)
+        if mirrored:
+            move = mirror_move(move, state.bitboard.columns) # stored the way the canonical board is.
+        entries[index] = (key, record.encode_move(move), search_player.report["depth"], search_player.report["value"])
+    return entries
+
+def build(path, states, time_limit, workers=None, batch=16, merge=True):
+    """Solves states across all cores and writes them to a book file.
+
+    Arguments:
+    path -- the book file to write.
+    states -- the engine.GameState of every position to solve.
+    time_limit -- seconds the search may use per position.
+
+    Keyword Arguments:
+    workers (default: None) -- worker processes, every core if None.
+    batch (default: 16) -- positions per task sent to a worker.
+    merge (default: True) -- keep the entries of the book already at path, the deeper search wins.
+
+    Returns:
+    The amount of entries in the book.
+    """
+    states = list(states)
+    parts = [OpeningBook(path).entries] if merge and os.path.exists(path) else []
+    with ProcessPoolExecutor(workers) as executor:
+        parts += executor.map(solve_batch, [states[first:first + batch] for first in range(0, len(states), batch)], [time_limit] * len(states))
+    entries = np.concatenate(parts) if parts else np.zeros(0, dtype=ENTRY)
+    del parts # let go of the memory map before the file is replaced.
+    write_book(path, entries)
+    return len(OpeningBook(path))
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Builds and inspects opening books for the computer player.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="solve positions and add them to a book")
+    build_parser.add_argument("book", help="book file to write, positions already in it are kept")
+    build_parser.add_argument("--board", type=parse_size, default=(6, 7), help="board size, e.g. 6x7")
+    build_parser.add_argument("--obstacle", type=parse_size, default=(2, 3), help="obstacle size, e.g. 2x3")
+    build_parser.add_argument("--connect", type=int, default=4)
+    build_parser.add_argument("--players", type=int, default=2)
+    build_parser.add_argument("--plies", type=int, default=2, help="solve every opening up to this many moves into the game")
+    build_parser.add_argument("--endgames", type=int, default=1000, help="random games to take an endgame position from")
+    build_parser.add_argument("--empty", type=int, default=6, help="empty cells left in the endgame positions")
+    build_parser.add_argument("--time", type=float, default=1.0, help="seconds of search per position")
+    build_parser.add_argument("--workers", type=int, default=None, help="worker processes (default: every core)")
+    build_parser.add_argument("--seed", type=int, default=0)
+    info_parser = commands.add_parser("info", help="print how many positions a book has")
+    info_parser.add_argument("book")
+    arguments = parser.parse_args(arguments)
+
+    if arguments.command == "info":
+        book = OpeningBook(arguments.book)
+        print(f"{arguments.book}: {len(book)} positions, {os.path.getsize(arguments.book)} bytes")
+        return 0
+
+    config = {"board_size": arguments.board, "obstacle_size": arguments.obstacle, "connect_size": arguments.connect, "players": arguments.players}
+    positions = opening_positions(config, arguments.plies)
+    positions.update(endgame_positions(config, arguments.endgames, arguments.empty, arguments.seed))
+    start = time.perf_counter()
+    count = build(arguments.book, positions.values(), arguments.time, arguments.workers)
+    print(f"Solved {len(positions)} positions in {time.perf_counter() - start:.1f}s, {arguments.book} has {count} positions.")
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(0)
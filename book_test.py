@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the opening book.
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import ai
+import book
+import engine
+
+CONFIG = {"board_size": (4, 5), "obstacle_size": (1, 1), "connect_size": 3, "players": 2}
+
+class OpeningBookTestCase(unittest.TestCase):
+    """Tests for 'book'."""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".c4b")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def new_game(self, obstacle_column):
+        return engine.new_game(CONFIG["board_size"], (1, 2), CONFIG["connect_size"], CONFIG["obstacle_size"], obstacle_column=obstacle_column)
+
+    def test_mirror_images_share_a_key(self):
+        state = engine.apply(engine.apply(self.new_game(0), ("n", 1)), ("n", 3))
+        mirrored_state = engine.apply(engine.apply(self.new_game(4), ("n", 3)), ("n", 1))
+        key, mirrored = book.position_key(state)
+        mirrored_key, mirrored_twice = book.position_key(mirrored_state)
+        self.assertEqual(key, mirrored_key)
+        self.assertNotEqual(mirrored, mirrored_twice)
+
+    def test_key_covers_the_rest_of_the_state(self):
+        state = engine.apply(self.new_game(2), ("n", 0))
+        keys = {book.position_key(state)[0],
+                book.position_key(engine.skip_turn(state))[0],
+                book.position_key(engine.GameState(state.bitboard, state.player_ids, (0, 1), state.special_disc_left, state.turn, state.connect_size))[0],
+                book.position_key(engine.GameState(state.bitboard, state.player_ids, state.pop_out_left, (1, 0), state.turn, state.connect_size))[0],
+                book.position_key(engine.GameState(state.bitboard, state.player_ids, state.pop_out_left, state.special_disc_left, state.turn, 4))[0]}
+        self.assertEqual(len(keys), 5)
+
+    def test_probe_mirrors_the_move_back(self):
+        state = engine.apply(self.new_game(0), ("n", 1))
+        book.write_book(self.path, book.solve_batch([state], 0.2))
+        opening_book = book.OpeningBook(self.path)
+        expected = ai.SearchPlayer(0.2).choose_move(state)
+        self.assertEqual(opening_book.probe(state)[0], expected)
+        mirrored_state = engine.apply(self.new_game(4), ("n", 3))
+        self.assertEqual(opening_book.probe(mirrored_state)[0], book.mirror_move(expected, 5))
+        self.assertIsNone(opening_book.probe(self.new_game(2)))
+        self.assertEqual((opening_book.hits, opening_book.probes), (2, 3))
+
+    def test_write_keeps_the_deepest_entry(self):
+        entries = np.array([(9, 0, 2, 5), (3, 1, 4, 0), (9, 2, 6, -5), (9, 3, 1, 7)], dtype=book.ENTRY)
+        book.write_book(self.path, entries)
+        stored = book.OpeningBook(self.path).entries
+        self.assertEqual(stored["key"].tolist(), [3, 9])
+        self.assertEqual(stored["depth"].tolist(), [4, 6])
+
+    def test_build_solves_every_opening(self):
+        positions = book.opening_positions(CONFIG, 1)
+        positions.update(book.endgame_positions(CONFIG, 10, 3))
+        self.assertEqual(book.build(self.path, positions.values(), 0.02, workers=1, merge=False), len(positions))
+        search_player = ai.SearchPlayer(5, book=book.OpeningBook(self.path))
+        for state in positions.values():
+            self.assertIn(search_player.choose_move(state), engine.legal_moves(state))
+            self.assertTrue(search_player.report["book"])
+            self.assertEqual(search_player.report["nodes"], 0)
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as file:
+            file.write(b"C4" + bytes(30))
+        with self.assertRaises(book.InvalidBookException):
+            book.OpeningBook(self.path)
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the colours module.
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+import colours
+
+class ColoursTestCase(unittest.TestCase):
+    """Tests for the plain and coloured modes of the colours module."""
+
+    def setUp(self):
+        colours.set_enabled(None) # decide again in every test, other tests may have decided already.
+
+    def tearDown(self):
+        colours.set_enabled(None)
+
+    def test_forced_modes(self):
+        colours.set_enabled(True)
+        self.assertEqual(colours.red(5), colours.LIGHT_RED + "5" + colours.RESET)
+        colours.set_enabled(False)
+        self.assertEqual(colours.red(5), "5")
+        self.assertEqual(colours.underline("x"), "x")
+
+    def test_plain_when_not_a_terminal(self):
+        with mock.patch.object(sys, "stdout", mock.Mock(isatty=lambda: False)):
+            self.assertEqual(colours.lime("a"), "a")
+            self.assertFalse(colours.enabled)
+
+    def test_no_color_environment_variable(self):
+        with mock.patch.object(sys, "stdout", mock.Mock(isatty=lambda: True)), mock.patch.dict(os.environ, {"NO_COLOR": "1"}):
+            self.assertEqual(colours.yellow("a"), "a")
+
+    def test_enabled_on_a_terminal(self):
+        with mock.patch.object(sys, "stdout", mock.Mock(isatty=lambda: True)), mock.patch.dict(os.environ, {"NO_COLOR": ""}):
+            self.assertEqual(colours.dark_gray("a"), colours.DARK_GRAY + "a" + colours.RESET)
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
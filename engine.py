@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""
+    Game engine for the twisted connect 4 game, without any terminal input or output.
+
+    A game is a GameState, which is never changed after it is made. apply returns a new state instead,
+    so any amount of games can be played at once in one process, and a state can be kept around to
+    go back to it. The terminal game in task2 is a front-end on top of these functions.
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import random
+
+from bitboard import BitBoard
+
+# Move types, a move is a tuple of (move type, column).
+NORMAL = "n"
+POP_OUT = "p"
+SPECIAL = "s"
+
+class IllegalMoveException(Exception):
+    def __init__(self, reason=None, message=None):
+        """Raised when a move breaks the rules of the game.
+
+        Keyword Arguments:
+        reason (default: None) -- Why the move is illegal, e.g. "the column is full".
+        message (default: None) -- The full message, front-ends can pass a formatted one.
+        """
+        self.reason = reason
+        super().__init__(message or f"That move is not possible{f' because {reason}' if reason else ''}.")
+
+class GameState():
+    __slots__ = ("bitboard", "player_ids", "pop_out_left", "special_disc_left", "turn", "connect_size")
+
+    def __init__(self, bitboard, player_ids, pop_out_left, special_disc_left, turn, connect_size):
+        """Creates a game state, this should be treated as immutable once made.
+
+        Arguments:
+        bitboard -- The BitBoard with the discs on it, it is not changed by apply.
+        player_ids -- Tuple of player ids in the order they take turns.
+        pop_out_left -- Tuple of how many PopOuts every player has left, in the same order as player_ids.
+        special_disc_left -- Tuple of how many special discs every player has left, in the same order as player_ids.
+        turn -- Index into player_ids of the player to move.
+        connect_size -- The amount of discs that should be placed in one line to score a point.
+        """
+        self.bitboard = bitboard
+        self.player_ids = player_ids
+        self.pop_out_left = pop_out_left
+        self.special_disc_left = special_disc_left
+        self.turn = turn
+        self.connect_size = connect_size
+
+    @property
+    def player_id(self):
+        """The id of the player to move."""
+        return self.player_ids[self.turn]
+
+def new_game(board_size, player_ids, connect_size, obstacle_size, obstacle_column=None, rng=random, pop_outs=1, special_discs=1):
+    """Creates the state at the start of a game, with an obstacle along the bottom of the board.
+
+    Arguments:
+    board_size -- A 2 element tuple that describes the size of the board.
+    player_ids -- The ids of the players, in the order they take turns.
+    connect_size -- The amount of discs that should be placed in one line to score a point.
+    obstacle_size -- A 2 element tuple that describes the size of the obstacle.
+
+    Keyword Arguments:
+    obstacle_column (default: None) -- The leftmost column of the obstacle, picked at random if None.
+    rng (default: random) -- Where the random obstacle column comes from.
+    pop_outs (default: 1) -- PopOuts every player starts with.
+    special_discs (default: 1) -- Special discs every player starts with.
+    """
+    bitboard = BitBoard(*board_size)
+    if obstacle_column is None:
+        obstacle_column = rng.randint(0, board_size[1] - obstacle_size[1]) # same range as task2.Board.add_obstacle.
+    bitboard.add_obstacle(obstacle_size, obstacle_column)
+    player_ids = tuple(player_ids)
+    return GameState(bitboard, player_ids, (pop_outs,) * len(player_ids), (special_discs,) * len(player_ids), 0, connect_size)
+
+def from_array(board, player_ids, pop_out_left, special_disc_left, turn, connect_size):
+    """Creates a state from a task2 board matrix, the other arguments are the same as GameState."""
+    return GameState(BitBoard.from_array(board), tuple(player_ids), tuple(pop_out_left), tuple(special_disc_left), turn, connect_size)
+
+def board_array(state):
+    """Gets the board of a state as a task2 board matrix, where row 0 is the top of the board."""
+    return state.bitboard.to_array()
+
+def legal_moves(state):
+    """Gets every legal move of the player to move, as (move type, column) tuples."""
+    bitboard = state.bitboard
+    moves = [(NORMAL, column) for column in range(bitboard.columns) if bitboard.can_drop(column)]
+    if state.special_disc_left[state.turn]:
+        moves += [(SPECIAL, column) for _, column in moves]
+    if state.pop_out_left[state.turn]:
+        moves += [(POP_OUT, column) for column in range(bitboard.columns) if bitboard.can_pop_out(state.player_id, column)]
+    return moves
+
+def apply(state, move):
+    """Performs a move for the player to move.
+
+    Arguments:
+    state -- The GameState to move from, it is left unchanged.
+    move -- A tuple of (move type, column).
+
+    Returns:
+    The GameState after the move, with the turn passed to the next player.
+
+    Raises:
+    IllegalMoveException -- if the move is not allowed by the rules of the game, e.g. the requested column is full.
+    """
+    move_type, column = move
+    bitboard = state.bitboard
+    if not 0 <= column < bitboard.columns:
+        raise IllegalMoveException("the column does not exist")
+    pop_out_left, special_disc_left = state.pop_out_left, state.special_disc_left
+    match move_type:
+        case "n":
+            if not bitboard.can_drop(column): raise IllegalMoveException("the column is full")
+            bitboard = bitboard.copy()
+            bitboard.drop(state.player_id, column)
+        case "p":
+            if not pop_out_left[state.turn]: raise IllegalMoveException("you have no more PopOut left")
+            if not bitboard.can_pop_out(state.player_id, column): raise IllegalMoveException("you cannot popout a disc that you don't own")
+            bitboard = bitboard.copy()
+            bitboard.pop_out(column)
+            pop_out_left = pop_out_left[:state.turn] + (pop_out_left[state.turn] - 1,) + pop_out_left[state.turn + 1:]
+        case "s":
+            if not bitboard.can_drop(column): raise IllegalMoveException("the column is full")
+            if not special_disc_left[state.turn]: raise IllegalMoveException("you have no more special discs left")
+            bitboard = bitboard.copy()
+            bitboard.blast(column)
+            special_disc_left = special_disc_left[:state.turn] + (special_disc_left[state.turn] - 1,) + special_disc_left[state.turn + 1:]
+        case _:
+            raise IllegalMoveException(f"\"{move_type}\" is not a move type")
+    return GameState(bitboard, state.player_ids, pop_out_left, special_disc_left, (state.turn + 1) % len(state.player_ids), state.connect_size)
+
+def skip_turn(state):
+    """Passes the turn to the next player without a move, e.g. when a player runs out of time."""
+    return GameState(state.bitboard, state.player_ids, state.pop_out_left, state.special_disc_left, (state.turn + 1) % len(state.player_ids), state.connect_size)
+
+def scores(state):
+    """Calculates the score of every player, the same way as task2.Board.calculate_scores.
+
+    Returns:
+    A dictionary of player id to score, including players without a point.
+    """
+    line_scores = state.bitboard.scores(state.connect_size)
+    return {player_id: line_scores.get(player_id, 0) for player_id in state.player_ids}
+
+def is_terminal(state):
+    """The game ends when the board is full."""
+    return state.bitboard.is_full()
+
+def winners(state):
+    """Gets the ids of the players with the highest score, more than one means a tie."""
+    final_scores = scores(state)
+    best = max(final_scores.values())
+    return [player_id for player_id, score in final_scores.items() if score == best]
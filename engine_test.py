@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the game engine.
+"""
+
+import random
+import unittest
+
+import engine
+
+class EngineTestCase(unittest.TestCase):
+    """Tests for the pure functions in 'engine'."""
+
+    def setUp(self):
+        self.state = engine.new_game((6, 7), (1, 2), 4, (2, 3), obstacle_column=0)
+
+    def test_apply_leaves_the_state_unchanged(self):
+        before = engine.board_array(self.state).tolist()
+        after = engine.apply(self.state, ("n", 5))
+        self.assertEqual(engine.board_array(self.state).tolist(), before)
+        self.assertEqual(engine.board_array(after)[5, 5], 1)
+        self.assertEqual(after.player_id, 2)
+
+    def test_illegal_moves(self):
+        with self.assertRaises(engine.IllegalMoveException) as context:
+            engine.apply(self.state, ("p", 0))
+        self.assertEqual(context.exception.reason, "you cannot popout a disc that you don't own")
+        state = self.state
+        for move in [("n", 6), ("n", 5), ("p", 6), ("n", 4), ("n", 6), ("n", 3)]:
+            state = engine.apply(state, move)
+        with self.assertRaises(engine.IllegalMoveException) as context:
+            engine.apply(state, ("p", 6)) # player 1 already used their PopOut.
+        self.assertEqual(context.exception.reason, "you have no more PopOut left")
+
+    def test_random_games_end(self):
+        rng = random.Random(1)
+        for _ in range(20):
+            state = engine.new_game((6, 7), (1, 2, 3), 3, (2, 3), rng=rng)
+            while not engine.is_terminal(state):
+                self.assertTrue(engine.legal_moves(state))
+                state = engine.apply(state, rng.choice(engine.legal_moves(state)))
+            self.assertEqual(set(engine.scores(state)), {1, 2, 3})
+            self.assertTrue(set(engine.winners(state)) <= {1, 2, 3})
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
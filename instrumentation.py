@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""
+    Opt-in timing and counters for the hot paths of the game.
+
+    Functions and methods are registered as probes with the phase they belong to, e.g. perform_move or
+    gravity, but they are only wrapped with a timer while instrumentation is enabled. While it is off the
+    original functions are in place, so leaving the probes registered costs nothing at all.
+
+    Every call of a probe is timed with perf_counter_ns into a histogram of its phase and labels (e.g. the
+    move type), and exceptions raised through it are counted. Anything else can be counted with count.
+    The metrics can be exported as Prometheus text, or as a JSON line to append to a stream.
+
+    Example:
+        instrumentation.register(task2.Board, "perform_move", "perform_move", lambda args: {"move_type": args[2]})
+        instrumentation.enable()
+        ...
+        print(instrumentation.prometheus_text())
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import json
+import time
+import functools
+
+BUCKETS = 48 # histogram buckets, bucket k counts the calls that took less than 2^k nanoseconds (about 39 hours at the top).
+
+enabled = False
+_probes = [] # (owner, attribute, original function, wrapped function) of every registered probe.
+histograms = {} # (phase, labels) -> Histogram, labels is a sorted tuple of (name, value) pairs.
+counters = {} # (name, labels) -> count, labels the same as histograms.
+
+class Histogram():
+    __slots__ = ("buckets", "count", "total")
+
+    def __init__(self):
+        """Latency histogram with a bucket per power of 2 nanoseconds, so finding the bucket is one bit_length."""
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0 # nanoseconds of every call added up.
+
+    def observe(self, nanoseconds):
+        self.buckets[min(nanoseconds.bit_length(), BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += nanoseconds
+
+    def quantile(self, fraction):
+        """Gets an upper bound of a quantile in nanoseconds, e.g. 0.99 for the 99th percentile, or 0 if nothing was observed."""
+        seen = 0
+        for bucket, amount in enumerate(self.buckets):
+            seen += amount
+            if seen and seen >= fraction * self.count:
+                return 1 << bucket
+        return 0
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+def start():
+    """Starts timing something that isn't a registered probe, e.g. a loop in main.
+
+    Returns:
+    A start time to pass to observe, 0 if instrumentation is off.
+    """
+    return time.perf_counter_ns() if enabled else 0
+
+def observe(phase, start_time, **labels):
+    """Records the time since a start time from start, nothing is recorded if it was 0."""
+    if not start_time:
+        return
+    key = (phase, _labels(labels))
+    histogram = histograms.get(key)
+    if histogram is None:
+        histogram = histograms[key] = Histogram()
+    histogram.observe(time.perf_counter_ns() - start_time)
+
+def count(name, amount=1, **labels):
+    """Adds to a counter, nothing is counted if instrumentation is off."""
+    if enabled:
+        key = (name, _labels(labels))
+        counters[key] = counters.get(key, 0) + amount
+
+def _wrap(function, phase, labeller):
+    """Wraps a function with a timer for its phase."""
+    @functools.wraps(function)
+    def probe(*args, **kwargs):
+        labels = labeller(args) if labeller is not None else {}
+        start_time = time.perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        except Exception as e:
+            count("errors", phase=phase, error=type(e).__name__, **labels)
+            raise
+        finally:
+            observe(phase, start_time, **labels)
+    return probe
+
+def register(owner, attribute, phase, labeller=None):
+    """Registers a function or method as a probe, it is timed whenever instrumentation is enabled.
+
+    Arguments:
+    owner -- the class or module the function is an attribute of.
+    attribute -- the name of the attribute, private methods need their mangled name e.g. "_Board__apply_gravity".
+    phase -- the phase the calls are recorded under.
+
+    Keyword Arguments:
+    labeller (default: None) -- function from the positional arguments of a call to a dictionary of labels.
+    """
+    original = getattr(owner, attribute)
+    probe = (owner, attribute, original, _wrap(original, phase, labeller))
+    _probes.append(probe)
+    if enabled:
+        setattr(owner, attribute, probe[3])
+
+def enable():
+    """Turns instrumentation on, putting the timers in place of every registered probe."""
+    global enabled
+    enabled = True
+    for owner, attribute, _, wrapped in _probes:
+        setattr(owner, attribute, wrapped)
+
+def disable():
+    """Turns instrumentation off, putting the original functions back. The metrics so far are kept."""
+    global enabled
+    enabled = False
+    for owner, attribute, original, _ in _probes:
+        setattr(owner, attribute, original)
+
+def reset():
+    """Forgets every metric recorded so far."""
+    histograms.clear()
+    counters.clear()
+
+def snapshot():
+    """Gets every metric as a dictionary that can be written as JSON, histograms only list their filled buckets."""
+    return {
+        "time": time.time(),
+        "histograms": [{"phase": phase, "labels": dict(labels), "count": histogram.count, "sum_ns": histogram.total,
+                        "buckets": {str(1 << bucket): amount for bucket, amount in enumerate(histogram.buckets) if amount}}
+                       for (phase, labels), histogram in histograms.items()],
+        "counters": [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in counters.items()],
+    }
+
+def write_jsonl(file):
+    """Appends a snapshot of every metric to an open file as a single JSON line."""
+    file.write(json.dumps(snapshot()) + "\n")
+    file.flush()
+
+def _prometheus_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{str(value).replace('\\', '\\\\').replace('"', '\\"')}"' for name, value in labels) + "}"
+
+def prometheus_text(prefix="connect4"):
+    """Gets every metric in the Prometheus text exposition format.
+    Every phase is a histogram in seconds called <prefix>_phase_seconds, and every counter is <prefix>_<name>_total.
+
+    Keyword Arguments:
+    prefix (default: "connect4") -- what every metric name starts with.
+    """
+    lines = []
+    if histograms:
+        name = f"{prefix}_phase_seconds"
+        lines += [f"# HELP {name} Time spent in each phase of the game.", f"# TYPE {name} histogram"]
+        for (phase, labels), histogram in sorted(histograms.items()):
+            labels = (("phase", phase),) + labels
+            last = max(bucket for bucket, amount in enumerate(histogram.buckets) if amount) # leave out the empty buckets above the slowest call.
+            cumulative = 0
+            for bucket in range(last + 1):
+                cumulative += histogram.buckets[bucket]
+                lines.append(f"{name}_bucket{_prometheus_labels(labels + (('le', f'{(1 << bucket) / 1e9:.9g}'),))} {cumulative}")
+            lines.append(f"{name}_bucket{_prometheus_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{name}_sum{_prometheus_labels(labels)} {histogram.total / 1e9:.9g}")
+            lines.append(f"{name}_count{_prometheus_labels(labels)} {histogram.count}")
+    for counter_name in sorted({name for name, _ in counters}):
+        name = f"{prefix}_{counter_name}_total"
+        lines.append(f"# TYPE {name} counter")
+        lines += [f"{name}{_prometheus_labels(labels)} {value}" for (other_name, labels), value in sorted(counters.items()) if other_name == counter_name]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the instrumentation.
+"""
+
+import io
+import json
+import random
+import unittest
+
+import engine
+import instrumentation
+import task2
+from task2_test import make_players, play_random_moves
+
+class Counter():
+    def add(self, amount):
+        if amount < 0:
+            raise ValueError("negative")
+        return amount
+
+class InstrumentationTestCase(unittest.TestCase):
+    """Tests for 'instrumentation'."""
+
+    @classmethod
+    def setUpClass(cls):
+        instrumentation.register(Counter, "add", "add", lambda args: {"sign": "-" if args[1] < 0 else "+"})
+
+    def setUp(self):
+        instrumentation.reset()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled_probes_are_the_original_functions(self):
+        original = Counter.add
+        instrumentation.enable()
+        self.assertIsNot(Counter.add, original)
+        instrumentation.disable()
+        self.assertIs(Counter.add, original)
+        Counter().add(1)
+        instrumentation.count("ignored")
+        self.assertEqual((instrumentation.histograms, instrumentation.counters), ({}, {}))
+
+    def test_probes_time_calls_and_count_errors(self):
+        instrumentation.enable()
+        counter = Counter()
+        for amount in range(5):
+            self.assertEqual(counter.add(amount), amount)
+        with self.assertRaises(ValueError):
+            counter.add(-1)
+        self.assertEqual(instrumentation.histograms[("add", (("sign", "+"),))].count, 5)
+        self.assertEqual(instrumentation.histograms[("add", (("sign", "-"),))].count, 1)
+        self.assertEqual(instrumentation.counters[("errors", (("error", "ValueError"), ("phase", "add"), ("sign", "-")))], 1)
+
+    def test_board_phases(self):
+        instrumentation.enable()
+        board = task2.Board((6, 7), seed=3)
+        board.add_obstacle()
+        for _ in play_random_moves(board, make_players(2), random.Random(3), 30):
+            board.calculate_scores()
+        phases = {phase for phase, _ in instrumentation.histograms}
+        self.assertLessEqual({"perform_move", "calculate_scores"}, phases)
+        moves = sum(histogram.count for (phase, _), histogram in instrumentation.histograms.items() if phase == "perform_move")
+        self.assertGreaterEqual(moves, 30)
+        gravity_calls = instrumentation.histograms[("gravity", ())].count
+        self.assertGreaterEqual(instrumentation.counters[("gravity_iterations", ())], gravity_calls) # every call settles at least one column.
+
+    def test_searches_are_not_timed(self):
+        instrumentation.enable()
+        state = engine.new_game((6, 7), (1, 2), 4, (2, 3), obstacle_column=0)
+        state = engine.apply(engine.apply(state, ("n", 3)), ("s", 3)) # what the computer players search with.
+        engine.scores(state)
+        self.assertEqual(instrumentation.histograms, {}) # the game is only timed on task2.Board, so no move is counted twice.
+
+    def test_exports(self):
+        instrumentation.enable()
+        Counter().add(2)
+        instrumentation.count("timeouts", 3)
+        text = instrumentation.prometheus_text()
+        self.assertIn("# TYPE connect4_phase_seconds histogram", text)
+        self.assertIn('connect4_phase_seconds_count{phase="add",sign="+"} 1', text)
+        self.assertIn('connect4_phase_seconds_bucket{phase="add",sign="+",le="+Inf"} 1', text)
+        self.assertIn("connect4_timeouts_total 3", text)
+        stream = io.StringIO()
+        instrumentation.write_jsonl(stream)
+        instrumentation.write_jsonl(stream)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        snapshot = json.loads(lines[0])
+        self.assertEqual(snapshot["counters"], [{"name": "timeouts", "labels": {}, "value": 3}])
+        self.assertEqual(sum(snapshot["histograms"][0]["buckets"].values()), 1)
+
+    def test_quantile(self):
+        histogram = instrumentation.Histogram()
+        for nanoseconds in [100] * 99 + [10 ** 6]:
+            histogram.observe(nanoseconds)
+        self.assertEqual(histogram.quantile(0.5), 128)
+        self.assertEqual(histogram.quantile(1.0), 1 << 20)
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+"""
+    Monte Carlo tree search player for the twisted connect 4 game.
+
+    Instead of a hand written evaluation, every position is judged by playing random games to the end from
+    it (rollouts), which copes with the random obstacle and the special disc reshaping the board. The tree
+    is grown with UCT, which balances searching the moves that won the most rollouts so far against trying
+    the moves that were hardly tried.
+
+    The tree is kept between turns: the next search starts from the node of the position the other players
+    left the board in, and every node outside of it is recycled. Nodes come from a fixed size pool, so the
+    tree never takes more memory than that, once the pool is empty the search keeps running rollouts from
+    the leaves without growing the tree.
+
+    Rollouts are run in batches, across worker processes if there are any. The leaves of a batch are picked
+    one after another, every pick counting as a lost visit until its result comes back (a virtual loss), so
+    one batch spreads over different leaves instead of all landing on the same one.
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import os
+import math
+import time
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import ai
+import engine
+
+EXPLORATION = math.sqrt(2) # UCT exploration constant, higher tries more moves that have been tried less.
+BATCH_SIZE = 32 # rollouts per batch sent to each worker, enough to make up for the cost of sending them.
+
+class Node():
+    __slots__ = ("parent", "move", "state", "mover", "children", "untried", "visits", "value", "key")
+
+    def __init__(self):
+        """A position in the tree, nodes are taken from and given back to the pool of a MCTSPlayer."""
+        self.reset(None, None, None)
+
+    def reset(self, parent, move, state):
+        """Makes the node a fresh position, so a recycled node can be reused without allocating another.
+
+        Arguments:
+        parent -- the node this was reached from, None for the root.
+        move -- the (move type, column) tuple that reached this from the parent.
+        state -- the engine.GameState of the position.
+        """
+        self.parent = parent
+        self.move = move
+        self.state = state
+        self.mover = parent.state.player_id if parent is not None else None # the rewards of a node are from the view of the player who moved into it.
+        self.children = []
+        self.untried = engine.legal_moves(state) if state is not None and not engine.is_terminal(state) else []
+        self.visits = 0
+        self.value = 0.0 # rewards of the mover from every rollout through this node.
+        self.key = None # zobrist hash, only worked out when looking for the node after the other players moved.
+
+def rollout(state, rng):
+    """Plays random moves until the board is full.
+
+    Returns:
+    A dictionary of player id to reward, 1 shared between the players with the highest score.
+    """
+    while not engine.is_terminal(state):
+        state = engine.apply(state, rng.choice(engine.legal_moves(state)))
+    winners = engine.winners(state)
+    return {player_id: 1 / len(winners) if player_id in winners else 0.0 for player_id in state.player_ids}
+
+def rollout_batch(states, seed):
+    """Runs a rollout from every state in a worker process, returning their rewards in the same order."""
+    rng = random.Random(seed)
+    return [rollout(state, rng) for state in states]
+
+class MCTSPlayer():
+    def __init__(self, time_limit, max_nodes=1 << 17, workers=0, batch_size=BATCH_SIZE, exploration=EXPLORATION, seed=None, book=None):
+        """Creates a computer player.
+
+        Arguments:
+        time_limit -- seconds the search may use per move.
+
+        Keyword Arguments:
+        max_nodes (default: 131072) -- the most nodes the tree can have.
+        workers (default: 0) -- worker processes for the rollouts, 0 runs them in this process and None uses every core.
+        batch_size (default: BATCH_SIZE) -- rollouts per batch and worker.
+        exploration (default: EXPLORATION) -- the UCT exploration constant.
+        seed (default: None) -- seed for the rollouts, random if None.
+        book (default: None) -- a book.OpeningBook, positions in it are played from the book without searching.
+        """
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.workers = workers
+        self.batch_size = batch_size
+        self.exploration = exploration
+        self.random = random.Random(seed)
+        self.book = book
+        self.zobrist = ai.Zobrist(0) # only to find the position the other players left the board in.
+        self.report = {} # statistics of the last search.
+        self.root = None
+        self.nodes = 0 # nodes in the tree.
+        self.__free = [] # recycled nodes, ready to be reset and used again.
+        self.__created = 0 # nodes ever made, the pool never grows past max_nodes.
+        self.__executor = None # started by the first search that needs it.
+
+    def __new_node(self, parent, move, state):
+        """Takes a node from the pool, or returns None if the pool is empty."""
+        if self.__free:
+            node = self.__free.pop()
+        elif self.__created < self.max_nodes:
+            node = Node()
+            self.__created += 1
+        else:
+            return None
+        node.reset(parent, move, state)
+        self.nodes += 1
+        return node
+
+    def __recycle(self, node, keep=None):
+        """Gives a node and everything under it back to the pool, except the subtree of keep."""
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node is keep:
+                continue
+            stack += node.children
+            node.reset(None, None, None) # let go of the states straight away.
+            self.__free.append(node)
+            self.nodes -= 1
+
+    def __reuse(self, state):
+        """Finds the node of a state under the old root, within a round of moves, and makes it the root.
+
+        Returns:
+        The visits the new root already had, 0 if it wasn't in the tree.
+        """
+        root = None
+        if self.root is not None:
+            key = self.zobrist.hash(state)
+            layer = [self.root]
+            for _ in range(len(state.player_ids) + 1): # our move and one from every other player, or the same position again.
+                for node in layer:
+                    if node.key is None:
+                        node.key = self.zobrist.hash(node.state)
+                    if node.key == key:
+                        root = node
+                        break
+                if root is not None:
+                    break
+                layer = [child for node in layer for child in node.children]
+            self.__recycle(self.root, keep=root)
+        if root is None:
+            self.root = self.__new_node(None, None, state) # recycling gave the whole tree back, so there is always a free node.
+            return 0
+        root.parent = root.move = root.mover = None
+        self.root = root
+        return root.visits
+
+    def __select(self):
+        """Walks down the tree by UCT to a leaf, expanding it if it has untried moves and the pool isn't empty.
+        Every node on the way gets a visit straight away, the virtual loss that steers the next pick away.
+
+        Returns:
+        The node to run a rollout from.
+        """
+        node = self.root
+        node.visits += 1
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            node = max(node.children, key=lambda child: child.value / child.visits + self.exploration * math.sqrt(log_visits / child.visits))
+            node.visits += 1
+        if node.untried:
+            move = node.untried.pop(self.random.randrange(len(node.untried)))
+            child = self.__new_node(node, move, engine.apply(node.state, move))
+            if child is None:
+                node.untried.append(move) # no room left, keep running rollouts from this node instead.
+            else:
+                node.children.append(child)
+                node = child
+                node.visits += 1
+        return node
+
+    def __backpropagate(self, node, rewards):
+        """Adds the rewards of a rollout to every node from the leaf up to the root, the visits were already counted."""
+        while node is not None:
+            if node.mover is not None:
+                node.value += rewards[node.mover]
+            node = node.parent
+
+    def __run_batches(self, deadline):
+        """Runs batches of rollouts until the deadline, returning how many were run."""
+        if self.workers != 0 and self.__executor is None:
+            self.__executor = ProcessPoolExecutor(self.workers)
+        worker_count = 1 if self.workers == 0 else self.workers or os.cpu_count()
+        playouts = 0
+        while True:
+            batches = [[self.__select() for _ in range(self.batch_size)] for _ in range(worker_count)] # one batch per worker.
+            seeds = [self.random.getrandbits(64) for _ in batches]
+            if self.__executor:
+                results = self.__executor.map(rollout_batch, [[leaf.state for leaf in leaves] for leaves in batches], seeds)
+            else:
+                results = [rollout_batch([leaf.state for leaf in leaves], seed) for leaves, seed in zip(batches, seeds)]
+            for leaves, rewards in zip(batches, results):
+                for leaf, reward in zip(leaves, rewards):
+                    self.__backpropagate(leaf, reward)
+                playouts += len(leaves)
+            if time.perf_counter() > deadline:
+                return playouts
+
+    def choose_move(self, state):
+        """Searches the state and returns the move with the most visits after the time limit, as (move type, column)."""
+        start = time.perf_counter()
+        book_entry = self.book.probe(state) if self.book is not None else None
+        if book_entry is not None:
+            self.report = {"playouts": 0, "playouts_per_second": 0.0, "reused_visits": 0, "nodes": self.nodes, "win_rate": 0.0, "seconds": time.perf_counter() - start, "book": True}
+            return book_entry[0]
+        reused_visits = self.__reuse(state)
+        playouts = self.__run_batches(start + self.time_limit)
+        best = max(self.root.children, key=lambda child: child.visits)
+        elapsed = time.perf_counter() - start
+        self.report = {
+            "playouts": playouts,
+            "playouts_per_second": playouts / elapsed if elapsed else 0.0,
+            "reused_visits": reused_visits,
+            "nodes": self.nodes,
+            "win_rate": best.value / best.visits,
+            "seconds": elapsed,
+            "book": False,
+        }
+        return best.move
+
+    def get_move(self, state):
+        """Same as choose_move, but yields the move type and then the column like task2.get_move_from_player."""
+        move_type, column = self.choose_move(state)
+        yield move_type
+        yield column
+
+    def close(self):
+        """Stops the worker processes, the player can still be used and starts them again if it needs them."""
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
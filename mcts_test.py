@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the monte carlo tree search player.
+"""
+
+import random
+import unittest
+
+import engine
+import mcts
+
+class MCTSPlayerTestCase(unittest.TestCase):
+    """Tests for 'mcts.MCTSPlayer'."""
+
+    def new_game(self, players=2):
+        return engine.new_game((4, 5), range(1, players + 1), 3, (1, 2), obstacle_column=1)
+
+    def test_moves_are_legal_until_the_board_is_full(self):
+        for players in (2, 3):
+            state = self.new_game(players)
+            mcts_player = mcts.MCTSPlayer(0.02, seed=players)
+            while not engine.is_terminal(state):
+                move = mcts_player.choose_move(state)
+                self.assertIn(move, engine.legal_moves(state))
+                state = engine.apply(state, move)
+            self.assertGreater(mcts_player.report["playouts"], 0)
+
+    def test_tree_is_reused_after_the_other_player_moves(self):
+        state = self.new_game()
+        mcts_player = mcts.MCTSPlayer(0.1, seed=1)
+        state = engine.apply(state, mcts_player.choose_move(state))
+        state = engine.apply(state, random.Random(1).choice(engine.legal_moves(state)))
+        mcts_player.choose_move(state)
+        self.assertGreater(mcts_player.report["reused_visits"], 0)
+        self.assertIsNone(mcts_player.root.parent)
+
+    def test_tree_never_grows_past_the_pool(self):
+        state = self.new_game()
+        mcts_player = mcts.MCTSPlayer(0.05, max_nodes=40, seed=2)
+        for _ in range(4):
+            state = engine.apply(state, mcts_player.choose_move(state))
+            self.assertLessEqual(mcts_player.nodes, 40)
+            self.assertGreater(mcts_player.report["playouts"], 40) # rollouts keep going once the pool is empty.
+
+    def test_worker_processes(self):
+        state = self.new_game()
+        mcts_player = mcts.MCTSPlayer(0.2, workers=1, batch_size=8, seed=3)
+        try:
+            self.assertIn(mcts_player.choose_move(state), engine.legal_moves(state))
+        finally:
+            mcts_player.close()
+        self.assertGreaterEqual(mcts_player.report["playouts"], 8)
+
+    def test_rollout_rewards(self):
+        rng = random.Random(4)
+        for _ in range(20):
+            rewards = mcts.rollout(self.new_game(3), rng)
+            self.assertAlmostEqual(sum(rewards.values()), 1.0)
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
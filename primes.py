@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+"""
+    Prime index for task1.
+
+    Numbers up to a bound are answered from a sieve of Eratosthenes, which only stores the odd numbers
+    (one byte each) and grows a segment at a time when a bigger number is asked about. Numbers past the
+    largest sieve allowed are tested with Miller-Rabin, which is deterministic with the bases used here for
+    every number below 3.3 * 10^24, and the Baillie-PSW test above that. Those answers are memoized since
+    the same big values tend to repeat, can be given a time budget per number, and a long list of them can
+    be spread over a process pool.
+
+    Run it to benchmark it against trial division: python primes.py [amount of numbers]
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import os
+import sys
+import math
+import time
+import random
+import itertools
+import collections
+import concurrent.futures
+
+SIEVE_START = 1 << 16 # numbers the sieve covers before it first has to grow.
+SIEVE_LIMIT = 1 << 25 # the sieve never grows past this, bigger numbers use Miller-Rabin (16MB of sieve).
+SEGMENT_SIZE = 1 << 18 # odd numbers sieved at a time while growing, so the working set stays in cache.
+MEMO_SIZE = 1 << 16 # answers for numbers past the sieve remembered.
+PARALLEL_MINIMUM = 256 # numbers past the sieve a list needs before starting a process pool is worth it.
+
+# With these bases Miller-Rabin never calls a composite below 3.3 * 10^24 prime.
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+MILLER_RABIN_LIMIT = 3317044064679887385961981
+
+class PrimeIndex():
+    def __init__(self, limit=SIEVE_START, max_limit=SIEVE_LIMIT):
+        """Creates a prime index with a sieve covering every number below limit.
+
+        Keyword Arguments:
+        limit (default: SIEVE_START) -- numbers the sieve covers to begin with.
+        max_limit (default: SIEVE_LIMIT) -- the sieve never grows past this.
+        """
+        self.max_limit = max(max_limit, 3)
+        # index i is the odd number 2i + 1, and is 1 if it is a prime.
+        self.__sieve = bytearray(b"\x01") * (max(min(limit, self.max_limit), 3) // 2)
+        self.__sieve[0] = 0 # 1 is not a prime.
+        self.__sieve_segment(0, len(self.__sieve), self.__sieve)
+
+    @property
+    def limit(self):
+        """Every number below this is in the sieve."""
+        return 2 * len(self.__sieve)
+
+    def sieve(self):
+        """Gets a copy of the sieve, byte i is 1 if the odd number 2i + 1 is a prime."""
+        return bytes(self.__sieve)
+
+    def __sieve_segment(self, start, stop, segment):
+        """Crosses out the multiples of every prime in the sieve from the odd numbers with indices start to stop.
+        segment[0] is the index start, the sieve has to already hold every prime up to the square root of 2 * stop.
+        """
+        high = 2 * stop
+        index = 1
+        while (2 * index + 1) ** 2 < high:
+            if self.__sieve[index]:
+                prime = 2 * index + 1
+                # the first odd multiple of prime that is in the segment, starting at prime squared since any smaller multiple has a smaller factor.
+                first = max(prime * prime, (2 * start + 1 + prime - 1) // prime * prime)
+                if first % 2 == 0:
+                    first += prime
+                first_index = (first - 1) // 2 - start
+                if first_index < len(segment):
+                    # odd multiples are 2 * prime apart, which is prime indices apart.
+                    segment[first_index::prime] = bytes(len(range(first_index, len(segment), prime)))
+            index += 1
+
+    def grow(self, number):
+        """Grows the sieve so it covers number, at least doubling it so growing is rare, but never past max_limit."""
+        target = min(max(number + 1, 2 * self.limit), self.max_limit) // 2
+        while len(self.__sieve) < target:
+            start = len(self.__sieve)
+            # the sieve has to hold the primes up to the square root of the end of the segment, which limits how far it can grow at once.
+            stop = min(target, start + SEGMENT_SIZE, (2 * start) ** 2 // 2)
+            segment = bytearray(b"\x01") * (stop - start)
+            self.__sieve_segment(start, stop, segment)
+            self.__sieve += segment
+
+    def is_prime(self, number, time_budget=None):
+        """Does a primality test on the provided input, growing the sieve if the number fits under max_limit.
+
+        Keyword Arguments:
+        time_budget (default: None) -- seconds the test may take for a number past the sieve, no limit if None.
+
+        Returns:
+        True or False, or None if the time budget ran out before the test could tell.
+        """
+        if number < 2:
+            return False # only natural numbers can be prime.
+        if number % 2 == 0:
+            return number == 2 # 2 is a prime, any other number divisible by 2 is not.
+        if number >= self.limit and number < self.max_limit:
+            self.grow(number)
+        if number < self.limit:
+            return self.__sieve[number // 2] == 1
+        return check_number(number, time_budget)
+
+    def classify(self, numbers, time_budget=None, workers=1, chunksize=None):
+        """Tests every number of a list, growing the sieve once for the whole list instead of number by number.
+        When there are enough numbers past the sieve, they are tested on a process pool.
+
+        Arguments:
+        numbers -- A list of integers.
+
+        Keyword Arguments:
+        time_budget (default: None) -- seconds the test of a single number may take, no limit if None.
+        workers (default: 1) -- processes to test numbers past the sieve with, None for one per core.
+        chunksize (default: None) -- numbers sent to a process at once, None to split them into 4 chunks per process.
+
+        Returns:
+        A list with True, False or None (undecided in the time budget) for every number, in the same order.
+        """
+        in_range = [number for number in numbers if number < self.max_limit]
+        if in_range and max(in_range) >= self.limit:
+            self.grow(max(in_range))
+        results = [None] * len(numbers)
+        large = [] # (position, number) of the numbers that need a probable prime test.
+        for position, number in enumerate(numbers):
+            if number >= self.limit and number % 2 == 1:
+                large.append((position, number))
+            else:
+                results[position] = self.is_prime(number)
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(large) >= PARALLEL_MINIMUM:
+            chunksize = chunksize or max(len(large) // (4 * workers), 1)
+            with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+                # map keeps the order of its input, so the answers line up with large.
+                answers = list(pool.map(check_number, [number for _, number in large], itertools.repeat(time_budget), chunksize=chunksize))
+            for (_, number), answer in zip(large, answers):
+                if answer is not None:
+                    memo.put(number, answer) # the workers' memos go away with them.
+        else:
+            answers = [check_number(number, time_budget) for _, number in large]
+        for (position, _), answer in zip(large, answers):
+            results[position] = answer
+        return results
+
+    def filter_primes(self, numbers, time_budget=None, workers=1):
+        """Finds the prime numbers in a list, see classify for the arguments.
+
+        Returns:
+        A list of the prime numbers in the input, in the same order. Numbers that weren't decided in the time budget are left out.
+        """
+        return [number for number, prime in zip(numbers, self.classify(numbers, time_budget, workers)) if prime]
+
+class Memo():
+    def __init__(self, size):
+        """Remembers the last size answers that were looked up or stored, forgetting the least recently used one first."""
+        self.size = size
+        self.__answers = collections.OrderedDict()
+
+    def get(self, number):
+        """Gets the answer for a number, or None if it isn't remembered."""
+        answer = self.__answers.get(number)
+        if answer is not None:
+            self.__answers.move_to_end(number)
+        return answer
+
+    def put(self, number, answer):
+        self.__answers[number] = answer
+        self.__answers.move_to_end(number)
+        if len(self.__answers) > self.size:
+            self.__answers.popitem(last=False)
+
+memo = Memo(MEMO_SIZE) # answers for numbers past the sieve, since the same big values tend to repeat.
+
+def check_number(number, time_budget=None):
+    """Tests a number with probable_prime, remembering the answer. This runs in the worker processes of classify.
+
+    Keyword Arguments:
+    time_budget (default: None) -- seconds the test may take, no limit if None.
+
+    Returns:
+    True or False, or None if the time budget ran out before the test could tell.
+    """
+    if number < 2:
+        return False
+    answer = memo.get(number)
+    if answer is None:
+        answer = probable_prime(number, None if time_budget is None else time.perf_counter() + time_budget)
+        if answer is not None:
+            memo.put(number, answer)
+    return answer
+
+def probable_prime(number, deadline=None):
+    """Tests a number bigger than 1 for being prime.
+    Below MILLER_RABIN_LIMIT this is Miller-Rabin with bases that make it deterministic, above it this is the
+    Baillie-PSW test (a strong probable prime test to base 2 and a strong Lucas probable prime test), which has
+    no known counterexample.
+
+    Keyword Arguments:
+    deadline (default: None) -- time.perf_counter() value to give up at. It is checked between rounds, so a single round
+                                on a number with many thousands of digits can still go past it.
+
+    Returns:
+    True or False, or None if the deadline passed before the test could tell.
+    """
+    for base in MILLER_RABIN_BASES:
+        if number % base == 0:
+            return number == base
+    if number < MILLER_RABIN_LIMIT:
+        return miller_rabin(number, MILLER_RABIN_BASES, deadline)
+    answer = miller_rabin(number, (2,), deadline)
+    if not answer:
+        return answer
+    return strong_lucas(number, deadline)
+
+def miller_rabin(number, bases, deadline=None):
+    """Checks whether an odd number bigger than every base is a strong probable prime to all the bases.
+
+    Returns:
+    True or False, or None if the deadline passed first.
+    """
+    # write number - 1 as d * 2^s with an odd d.
+    d, s = number - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for base in bases:
+        if deadline is not None and time.perf_counter() > deadline:
+            return None
+        x = pow(base, d, number)
+        if x == 1 or x == number - 1:
+            continue
+        for step in range(1, s):
+            if deadline is not None and step % 64 == 0 and time.perf_counter() > deadline:
+                return None
+            x = x * x % number
+            if x == number - 1:
+                break
+        else:
+            return False # base is a witness that number is composite.
+    return True
+
+def jacobi(a, n):
+    """Calculates the Jacobi symbol (a/n) for an odd positive n."""
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a # quadratic reciprocity.
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+def strong_lucas(number, deadline=None):
+    """Checks whether an odd number that isn't divisible by a small prime is a strong Lucas probable prime,
+    with the parameters from Selfridge's method A.
+
+    Returns:
+    True or False, or None if the deadline passed first.
+    """
+    if math.isqrt(number) ** 2 == number:
+        return False # a square never has a D with (D/number) = -1, so the search below would never end.
+    # D is the first of 5, -7, 9, -11, ... with (D/number) = -1.
+    D = 5
+    while True:
+        symbol = jacobi(D, number)
+        if symbol == -1:
+            break
+        if symbol == 0 and abs(D) != number:
+            return False # D shares a factor with number.
+        D = -D - 2 if D > 0 else -D + 2
+    P, Q = 1, (1 - D) // 4
+    # write number + 1 as d * 2^s with an odd d.
+    d, s = number + 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    def half(value):
+        """Divides by 2 modulo number, which is odd."""
+        value %= number
+        return (value + number if value % 2 else value) // 2
+
+    # U_k, V_k and Q^k modulo number, walking the bits of d from the top.
+    U, V, Q_k = 1, P, Q % number
+    for position, bit in enumerate(bin(d)[3:]):
+        if deadline is not None and position % 64 == 0 and time.perf_counter() > deadline:
+            return None
+        U, V, Q_k = U * V % number, (V * V - 2 * Q_k) % number, Q_k * Q_k % number # k -> 2k
+        if bit == "1":
+            U, V, Q_k = half(P * U + V), half(D * U + P * V), Q_k * Q % number # 2k -> 2k + 1
+    if U == 0 or V == 0:
+        return True
+    for step in range(1, s):
+        if deadline is not None and step % 64 == 0 and time.perf_counter() > deadline:
+            return None
+        V, Q_k = (V * V - 2 * Q_k) % number, Q_k * Q_k % number # k -> 2k
+        if V == 0:
+            return True
+    return False
+
+default_index = PrimeIndex() # shared by everything that doesn't need its own bounds.
+
+def is_prime(number, time_budget=None):
+    """Does a primality test on the provided input, using the shared index. See PrimeIndex.is_prime."""
+    return default_index.is_prime(number, time_budget)
+
+def classify(numbers, time_budget=None, workers=1):
+    """Tests every number of a list, using the shared index. See PrimeIndex.classify."""
+    return default_index.classify(numbers, time_budget, workers)
+
+def filter_primes(numbers, time_budget=None, workers=1):
+    """Finds the prime numbers in a list in the same order, using the shared index. See PrimeIndex.classify."""
+    return default_index.filter_primes(numbers, time_budget, workers)
+
+def trial_division(number):
+    """The original task1 test, kept to check and benchmark the index against."""
+    if number <= 1:
+        return False
+    if number % 2 == 0:
+        return number == 2
+    for i in range(3, 1 + int(number**(1/2)), 2):
+        if number % i == 0:
+            return False
+    return True
+
+def benchmark(count):
+    """Times trial division against the index on random numbers below 10^6, 10^7 and 10^8."""
+    rng = random.Random(0)
+    for magnitude in (10 ** 6, 10 ** 7, 10 ** 8):
+        numbers = [rng.randrange(magnitude) for _ in range(count)]
+        sample = numbers[:min(count, 20000)] # trial division is too slow to run on everything.
+        start = time.perf_counter()
+        expected = [number for number in sample if trial_division(number)]
+        trial_rate = len(sample) / (time.perf_counter() - start)
+
+        index = PrimeIndex(max_limit=magnitude)
+        start = time.perf_counter()
+        index.filter_primes(numbers)
+        cold_rate = count / (time.perf_counter() - start)
+        start = time.perf_counter()
+        index.filter_primes(numbers)
+        warm_rate = count / (time.perf_counter() - start)
+        matches = [number for number in numbers[:len(sample)] if index.is_prime(number)] == expected
+        print(f"below 10^{len(str(magnitude)) - 1}: trial division {trial_rate:,.0f} numbers/s, index {cold_rate:,.0f} numbers/s "
+              f"with building the sieve, {warm_rate:,.0f} numbers/s after ({warm_rate / trial_rate:.0f}x), results {'match' if matches else 'DO NOT MATCH'}")
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6)
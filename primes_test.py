@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the prime index.
+"""
+
+import random
+import unittest
+
+import primes
+
+class PrimeIndexTestCase(unittest.TestCase):
+    """Tests for 'primes.PrimeIndex' and 'primes.miller_rabin'."""
+
+    def test_growing_sieve_matches_trial_division(self):
+        index = primes.PrimeIndex(limit=10, max_limit=200000)
+        rng = random.Random(3)
+        numbers = list(range(-3, 2000)) + [rng.randrange(200000) for _ in range(2000)]
+        for number in numbers:
+            self.assertEqual(index.is_prime(number), primes.trial_division(number), number)
+        self.assertEqual(index.limit, 200000)
+
+    def test_filter_primes_keeps_order_and_duplicates(self):
+        index = primes.PrimeIndex(limit=10)
+        self.assertEqual(index.filter_primes([97, 4, 2, 97, -7, 1, 10 ** 9 + 7]), [97, 2, 97, 10 ** 9 + 7])
+
+    def test_past_the_sieve(self):
+        index = primes.PrimeIndex(limit=100, max_limit=100)
+        rng = random.Random(5)
+        for number in [rng.randrange(10 ** 6, 10 ** 7) for _ in range(500)]:
+            self.assertEqual(index.is_prime(number), primes.trial_division(number), number)
+        self.assertEqual(index.limit, 100) # the sieve didn't grow.
+        self.assertTrue(index.is_prime(2 ** 89 - 1)) # Mersenne primes.
+        self.assertFalse(index.is_prime(3215031751)) # strong pseudoprime to the bases 2, 3, 5 and 7.
+        self.assertFalse(index.is_prime((2 ** 61 - 1) * (2 ** 31 - 1)))
+
+    def test_baillie_psw(self):
+        # the first strong Lucas pseudoprimes, the base 2 test catches them.
+        for number in (5459, 5777, 10877, 16109, 18971):
+            self.assertTrue(primes.strong_lucas(number))
+            self.assertFalse(primes.miller_rabin(number, (2,)))
+        self.assertTrue(primes.probable_prime(2 ** 521 - 1))
+        self.assertFalse(primes.probable_prime((2 ** 127 - 1) * (2 ** 89 - 1)))
+        self.assertFalse(primes.probable_prime((2 ** 107 - 1) ** 2))
+        rng = random.Random(6)
+        for _ in range(2000): # agrees with the deterministic test where there is one.
+            number = rng.randrange(10 ** 17, 10 ** 18) | 1
+            if all(number % base for base in primes.MILLER_RABIN_BASES):
+                self.assertEqual(primes.miller_rabin(number, (2,)) and primes.strong_lucas(number), primes.miller_rabin(number, primes.MILLER_RABIN_BASES), number)
+
+    def test_time_budget(self):
+        self.assertIsNone(primes.probable_prime(2 ** 4423 - 1, deadline=0))
+        self.assertIsNone(primes.check_number(2 ** 9689 - 1, time_budget=0))
+        self.assertTrue(primes.check_number(2 ** 607 - 1, time_budget=10))
+        self.assertEqual(primes.PrimeIndex(max_limit=100).classify([2 ** 9941 - 1, 7, 8], time_budget=0), [None, True, False])
+
+    def test_parallel_classify_keeps_order(self):
+        rng = random.Random(7)
+        numbers = [rng.randrange(10 ** 30, 10 ** 31) for _ in range(primes.PARALLEL_MINIMUM * 2)] + [2, 9, 10 ** 9 + 7]
+        expected = primes.PrimeIndex(max_limit=100).classify(numbers)
+        self.assertEqual(primes.PrimeIndex(max_limit=100).classify(numbers, workers=2), expected)
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
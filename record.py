@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+"""
+    Compact binary game records for the twisted connect 4 game.
+
+    A record file is any amount of games one after another, so games can be appended as they finish
+    and millions of them can be read back through a memory map without parsing the whole file first.
+
+    Every game is a 22 byte header followed by one byte per move (all little endian):
+        2s  magic, always b"C4"
+        B   format version
+        B   rows
+        B   columns
+        B   connect size
+        B   obstacle rows
+        B   obstacle columns
+        B   obstacle column, the leftmost column the obstacle was placed at
+        B   player count
+        Q   seed the game was played with (0 if it wasn't seeded)
+        I   move count
+    A move byte holds the move type in the top 2 bits (normal, PopOut, special or a skipped turn) and
+    the column in the other 6, so boards can have up to 64 columns.
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import mmap
+import struct
+
+import numpy as np
+
+MAGIC = b"C4"
+VERSION = 1
+HEADER = struct.Struct("<2sBBBBBBBBQI")
+
+SKIP = "x" # move type of a turn that was lost, e.g. to the time limit.
+MOVE_TYPES = ("n", "p", "s", SKIP) # index is the code stored in the top 2 bits of a move byte.
+MAX_COLUMNS = 64
+
+class InvalidRecordException(Exception):
+    """Raised when a record file is corrupt or from an unknown version."""
+    def __init__(self, offset, message):
+        super().__init__(f"Invalid game record at byte {offset}: {message}")
+
+class GameHeader():
+    def __init__(self, board_size, connect_size, obstacle_size, obstacle_column, players, seed=0):
+        """The rules and starting position of a recorded game.
+
+        Arguments:
+        board_size -- A 2 element tuple that describes the size of the board.
+        connect_size -- The amount of discs that should be placed in one line to score a point.
+        obstacle_size -- A 2 element tuple that describes the size of the obstacle.
+        obstacle_column -- The leftmost column of the obstacle.
+        players -- The amount of players, they have the ids 1 to players.
+
+        Keyword Arguments:
+        seed (default: 0) -- The seed the game was played with.
+        """
+        self.board_size = tuple(board_size)
+        self.connect_size = connect_size
+        self.obstacle_size = tuple(obstacle_size)
+        self.obstacle_column = obstacle_column
+        self.players = players
+        self.seed = seed
+
+    @classmethod
+    def from_state(cls, state, obstacle_size, seed=0):
+        """Creates the header of a game from its starting engine.GameState."""
+        bitboard = state.bitboard
+        lowest_obstacle_bit = (bitboard.obstacles & -bitboard.obstacles).bit_length() - 1
+        return cls((bitboard.rows, bitboard.columns), state.connect_size, obstacle_size, lowest_obstacle_bit // bitboard.column_bits, len(state.player_ids), seed)
+
+    def pack(self, move_count):
+        """Packs the header for a game with the given amount of moves."""
+        return HEADER.pack(MAGIC, VERSION, *self.board_size, self.connect_size, *self.obstacle_size, self.obstacle_column, self.players, self.seed, move_count)
+
+    def __eq__(self, other):
+        return isinstance(other, GameHeader) and vars(self) == vars(other)
+
+def encode_move(move):
+    """Packs a (move type, column) tuple into a byte, a skipped turn is (SKIP, 0)."""
+    move_type, column = move
+    return MOVE_TYPES.index(move_type) << 6 | column
+
+def decode_move(byte):
+    """Unpacks a move byte into a (move type, column) tuple."""
+    return MOVE_TYPES[byte >> 6], byte & 63
+
+class RecordWriter():
+    def __init__(self, path):
+        """Opens a record file to append games to, it is created if it doesn't exist."""
+        self.file = open(path, "ab")
+
+    def write_game(self, header, moves):
+        """Appends a whole game in one write, so a crash never leaves half a game in the file.
+
+        Arguments:
+        header -- The GameHeader of the game.
+        moves -- The (move type, column) tuples of the game, in order.
+
+        Raises:
+        ValueError -- if the board has more columns than a move byte can hold.
+        """
+        if header.board_size[1] > MAX_COLUMNS:
+            raise ValueError(f"game records only support up to {MAX_COLUMNS} columns")
+        self.file.write(header.pack(len(moves)) + bytes(encode_move(move) for move in moves))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+def read_games(path):
+    """Reads every game of a record file through a memory map.
+
+    Arguments:
+    path -- The record file.
+
+    Returns:
+    A generator of (GameHeader, moves) where moves is a uint8 numpy array of move bytes, use decode_move on them.
+
+    Raises:
+    InvalidRecordException -- if the file is corrupt.
+    """
+    with open(path, "rb") as file:
+        if file.seek(0, 2) == 0:
+            return # an empty file can't be memory mapped.
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset = 0
+            while offset < len(data):
+                header, move_count = unpack_header(data, offset)
+                offset += HEADER.size
+                if offset + move_count > len(data):
+                    raise InvalidRecordException(offset, "the file ends in the middle of a game")
+                yield header, np.frombuffer(data, dtype=np.uint8, count=move_count, offset=offset).copy() # copy so the moves outlive the map.
+                offset += move_count
+
+def unpack_header(data, offset):
+    """Unpacks the header at an offset of a buffer.
+
+    Returns:
+    A tuple of (GameHeader, move count).
+    """
+    if offset + HEADER.size > len(data):
+        raise InvalidRecordException(offset, "the file ends in the middle of a header")
+    magic, version, rows, columns, connect_size, obstacle_rows, obstacle_columns, obstacle_column, players, seed, move_count = HEADER.unpack_from(data, offset)
+    if magic != MAGIC:
+        raise InvalidRecordException(offset, "this is not the start of a game")
+    if version != VERSION:
+        raise InvalidRecordException(offset, f"version {version} is not supported")
+    return GameHeader((rows, columns), connect_size, (obstacle_rows, obstacle_columns), obstacle_column, players, seed), move_count
+
+def index_games(path):
+    """Finds where every game of a record file starts, without reading any moves.
+
+    Returns:
+    A numpy int64 array of byte offsets, one per game.
+    """
+    offsets = []
+    with open(path, "rb") as file:
+        if file.seek(0, 2) == 0:
+            return np.array(offsets, dtype=np.int64)
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset = 0
+            while offset < len(data):
+                offsets.append(offset)
+                offset += HEADER.size + unpack_header(data, offset)[1]
+    return np.array(offsets, dtype=np.int64)
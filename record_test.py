@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the binary game records and the replay tool.
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import engine
+import record
+import replay
+import simulate
+
+class GameRecordTestCase(unittest.TestCase):
+    """Tests for 'record' and 'replay'."""
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".c4r")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_moves_round_trip(self):
+        for move in [("n", 0), ("p", 6), ("s", 63), (record.SKIP, 0)]:
+            self.assertEqual(record.decode_move(record.encode_move(move)), move)
+
+    def test_recorded_games_replay_the_same(self):
+        config = {"board_size": (6, 7), "obstacle_size": (2, 3), "connect_size": 3, "players": 3}
+        results = [simulate.play_game(config, seed) for seed in range(10)]
+        with open(self.path, "ab") as file:
+            for result in results:
+                file.write(result["record"])
+        games = list(record.read_games(self.path))
+        self.assertEqual(len(games), 10)
+        self.assertEqual(len(record.index_games(self.path)), 10)
+        for result, (header, moves) in zip(results, games):
+            self.assertEqual(header.seed, result["seed"])
+            self.assertEqual(len(moves), result["moves"])
+            board, scores = replay.replay_board(header, moves)
+            self.assertEqual(list(scores.values()), result["scores"])
+            np.testing.assert_array_equal(engine.board_array(replay.replay_engine(header, moves)), board.board)
+
+    def test_writer_appends_and_truncation_is_detected(self):
+        header = record.GameHeader((6, 7), 4, (2, 3), 1, 2, seed=99)
+        with record.RecordWriter(self.path) as writer:
+            writer.write_game(header, [("n", 3), (record.SKIP, 0), ("s", 2)])
+            writer.write_game(header, [])
+        (first, moves), (second, no_moves) = record.read_games(self.path)
+        self.assertEqual(first, header)
+        self.assertEqual([record.decode_move(int(byte)) for byte in moves], [("n", 3), (record.SKIP, 0), ("s", 2)])
+        self.assertEqual(len(no_moves), 0)
+        with open(self.path, "r+b") as file:
+            file.truncate(record.HEADER.size + 1)
+        with self.assertRaises(record.InvalidRecordException):
+            list(record.read_games(self.path))
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
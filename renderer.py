@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+    Terminal renderer for the twisted connect 4 board.
+
+    The coloured glyph of every cell type is made once and kept in a lookup table, so drawing a board is
+    one table lookup per cell and a join per row. The background pattern of the empty cells is fixed per
+    board (from a seed) instead of being rolled again every frame, which also means that redraw can
+    rewrite just the rows that changed since the last frame.
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import random
+
+import numpy as np
+
+import colours
+from bitboard import EMPTY, OBSTACLE
+
+class Renderer():
+    def __init__(self, seed=None, indent="\t\t"):
+        """Creates a renderer, set_colours needs to be called before any players can be drawn.
+
+        Keyword Arguments:
+        seed (default: None) -- seed for the background pattern of the empty cells, random if None.
+        indent (default: two tabs) -- what every line of the frame starts with.
+        """
+        self.random = random.Random(seed)
+        self.indent = indent
+        self.__colours = None
+        self.__glyphs = None # object array of 256 strings, the glyph of every cell type.
+        self.__background = None # glyph of every empty cell, for the shape of the last board drawn.
+        self.__last_lines = None # lines of the last frame, to find what redraw has to rewrite.
+        self.__borders = {} # (column count, column offset) -> (column numbers, bottom of the board) lines.
+        self.set_colours({})
+
+    def set_colours(self, colours_by_id):
+        """Sets the colour of every player, the glyphs are only made again if something changed.
+
+        Arguments:
+        colours_by_id -- dictionary of player id to a colour function from the colours module.
+        """
+        if colours_by_id == self.__colours:
+            return
+        glyphs = np.array([colours.player_glyph(player_id) for player_id in range(256)], dtype=object) # players without a colour are drawn without one.
+        for player_id, colour in colours_by_id.items():
+            glyphs[player_id] = colour(glyphs[player_id])
+        self.set_glyphs(glyphs)
+        self.__colours = dict(colours_by_id)
+
+    def set_glyphs(self, glyphs):
+        """Sets the glyph of every player id directly, e.g. from a task2.PlayerTable that already made them.
+
+        Arguments:
+        glyphs -- object array of 256 strings indexed by cell type, the obstacle and empty cells are drawn the usual way.
+        """
+        glyphs = np.array(glyphs, dtype=object) # a copy, so the obstacle glyph doesn't end up in the caller's array.
+        glyphs[OBSTACLE] = colours.light_purple("◌")
+        self.__glyphs = glyphs
+        self.__colours = None # set_colours has to make its glyphs again, even for the same colours.
+        self.__last_lines = None # every cell may look different now.
+
+    def __background_for(self, shape):
+        """Gets the glyph of every empty cell for a board shape, the pattern is only rolled once per shape."""
+        if self.__background is None or self.__background.shape != shape:
+            pattern = np.array([self.random.randint(0, 1) for _ in range(shape[0] * shape[1])]).reshape(shape)
+            self.__background = np.array([colours.dark_gray("◌"), colours.dark_gray("○")], dtype=object)[pattern]
+        return self.__background
+
+    def lines(self, board, column_offset=0):
+        """Draws the board as a list of lines: the column numbers, every row and the bottom of the board.
+
+        Arguments:
+        board -- matrix of cell types to draw.
+
+        Keyword Arguments:
+        column_offset (default: 0) -- how many columns of the whole board are left of this matrix, so the numbers match a viewport.
+        """
+        columns = board.shape[1]
+        if (columns, column_offset) not in self.__borders:
+            self.__borders[columns, column_offset] = (self.indent + colours.light_purple(colours.underline(" ".join(str(column) for column in range(column_offset + 1, column_offset + columns + 1)))), # Underlined numbers
+                                                      self.indent + colours.light_purple("‾" * (2 * columns - 1))) # the bottom of the board, this is responsive to the board size.
+        header, footer = self.__borders[columns, column_offset]
+        cells = self.__glyphs[board]
+        empty = board == EMPTY
+        cells[empty] = self.__background_for(board.shape)[empty]
+        return [header] + [self.indent + " ".join(row) + " " for row in cells.tolist()] + [footer]
+
+    def render(self, board, column_offset=0):
+        """Draws the whole board, see lines for column_offset.
+
+        Returns:
+        A string that can be printed to the terminal.
+        """
+        self.__last_lines = self.lines(board, column_offset)
+        return "\n".join(self.__last_lines)
+
+    def redraw(self, board, column_offset=0):
+        """Draws only the rows that changed since the last frame, using ANSI cursor movement.
+        The cursor has to be on the line after the last frame, which is where printing the frame leaves it, see lines for column_offset.
+
+        Returns:
+        A string to print with end="", which also leaves the cursor on the line after the frame.
+        """
+        lines = self.lines(board, column_offset)
+        if self.__last_lines is None or len(lines) != len(self.__last_lines):
+            self.__last_lines = lines
+            return "\n".join(lines) + "\n" # nothing to compare against, draw everything.
+        output = []
+        for index, (line, last_line) in enumerate(zip(lines, self.__last_lines)):
+            if line != last_line:
+                distance = len(lines) - index # how many lines above the cursor this line is.
+                output.append(f"\033[{distance}F\033[2K{line}\033[{distance}E")
+        self.__last_lines = lines
+        return "".join(output)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the board renderer.
+"""
+
+import unittest
+
+import numpy as np
+
+import colours
+import renderer
+
+class RendererTestCase(unittest.TestCase):
+    """Tests for 'renderer.Renderer'."""
+
+    def setUp(self):
+        colours.set_enabled(True) # in plain mode the discs and the background look the same.
+        self.board = np.zeros((6, 7), dtype=np.uint8)
+        self.board[4:, 2:5] = renderer.OBSTACLE
+
+    def tearDown(self):
+        colours.set_enabled(None)
+
+    def make_renderer(self, seed=4):
+        board_renderer = renderer.Renderer(seed)
+        board_renderer.set_colours({1: colours.lime, 2: colours.red})
+        return board_renderer
+
+    def test_seeded_frames_are_the_same(self):
+        frame = self.make_renderer().render(self.board)
+        self.assertEqual(frame, self.make_renderer().render(self.board))
+        self.assertEqual(len(frame.split("\n")), 8)
+        self.assertIn(colours.light_purple("◌"), frame)
+
+    def test_redraw_only_rewrites_changed_rows(self):
+        board_renderer = self.make_renderer()
+        full_frame = board_renderer.redraw(self.board)
+        self.assertTrue(full_frame.endswith("\n"))
+        self.assertEqual(board_renderer.redraw(self.board), "") # nothing changed.
+        self.board[3, 3] = 2
+        update = board_renderer.redraw(self.board)
+        self.assertEqual(update.count("\033[2K"), 1)
+        self.assertTrue(update.startswith("\033[4F")) # row 3 is the 5th line of an 8 line frame.
+        self.assertIn(colours.red("○"), update)
+
+    def test_column_offset_numbers_the_header(self):
+        board_renderer = self.make_renderer()
+        header = board_renderer.lines(self.board, column_offset=10)[0]
+        self.assertIn(" ".join(str(column) for column in range(11, 18)), header)
+        self.assertNotEqual(header, board_renderer.lines(self.board)[0]) # the header of each offset is kept apart.
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+    Replays recorded games through task2.Board and recomputes their scores.
+
+    This is for regression testing rule changes against a large corpus of recorded games: every game is
+    rebuilt move by move with Board.perform_move, and with --check it is also played through the engine
+    and any game where the two disagree is reported.
+
+    Example: python replay.py games.c4r --check --scores scores.jsonl
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+import engine
+import instrumentation
+import record
+import renderer
+import spectator
+import task2
+
+class ReplayPlayer():
+    def __init__(self, id):
+        """The parts of task2.Player that Board.perform_move uses, without asking for a name or registering it."""
+        self.id = id
+        self.pop_out_left = 1
+        self.special_disc_left = 1
+
+def replay_board(header, moves):
+    """Rebuilds a recorded game on a task2.Board.
+
+    Arguments:
+    header -- The record.GameHeader of the game.
+    moves -- The move bytes of the game.
+
+    Returns:
+    The board at the end of the game and the final scores (player id -> score, including players without points).
+
+    Raises:
+    IllegalMoveException -- if a recorded move is not allowed by the current rules.
+    """
+    board = task2.Board(header.board_size)
+    board.add_obstacle(header.obstacle_size, column=header.obstacle_column)
+    players = [ReplayPlayer(id) for id in range(1, header.players + 1)]
+    for turn, byte in enumerate(moves):
+        move_type, column = record.decode_move(int(byte))
+        if move_type != record.SKIP:
+            board.perform_move(players[turn % len(players)], move_type, column)
+    scores = board.calculate_scores(header.connect_size)
+    return board, {player.id: scores.get(player.id, 0) for player in players}
+
+def replay_engine(header, moves):
+    """Rebuilds a recorded game with the engine, returning the final engine.GameState."""
+    state = engine.new_game(header.board_size, range(1, header.players + 1), header.connect_size, header.obstacle_size, obstacle_column=header.obstacle_column)
+    for byte in moves:
+        move_type, column = record.decode_move(int(byte))
+        state = engine.skip_turn(state) if move_type == record.SKIP else engine.apply(state, (move_type, column))
+    return state
+
+def spectator_feed(header, moves):
+    """Encodes a recorded game as a spectator feed, see spectator.py.
+
+    Returns:
+    The length prefixed frames of the game, a keyframe and then a delta per move.
+    """
+    state = engine.new_game(header.board_size, range(1, header.players + 1), header.connect_size, header.obstacle_size, obstacle_column=header.obstacle_column)
+    encoder = spectator.SpectatorEncoder(state)
+    frames = [encoder.keyframe()]
+    for byte in moves:
+        move = record.decode_move(int(byte))
+        state = engine.skip_turn(state) if move[0] == record.SKIP else engine.apply(state, move)
+        frames.append(encoder.delta(state, move))
+    return b"".join(spectator.pack_frame(frame) for frame in frames)
+
+def watch(header, moves, delay):
+    """Plays a recorded game back in the terminal, only redrawing the rows each move changed.
+
+    Arguments:
+    header -- The record.GameHeader of the game.
+    moves -- The move bytes of the game.
+    delay -- Seconds to wait between moves.
+    """
+    board_renderer = renderer.Renderer(seed=header.seed)
+    board_renderer.set_colours({id: task2.player_colour(id) for id in range(1, header.players + 1)})
+    state = engine.new_game(header.board_size, range(1, header.players + 1), header.connect_size, header.obstacle_size, obstacle_column=header.obstacle_column)
+    print(board_renderer.redraw(engine.board_array(state)), end="")
+    for byte in moves:
+        move_type, column = record.decode_move(int(byte))
+        state = engine.skip_turn(state) if move_type == record.SKIP else engine.apply(state, (move_type, column))
+        print(board_renderer.redraw(engine.board_array(state)), end="", flush=True)
+        time.sleep(delay)
+    print(" ".join(f"Player {id}: {score}" for id, score in engine.scores(state).items()))
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Replays recorded games and recomputes their scores.")
+    parser.add_argument("records", nargs="+", help="record files to replay")
+    parser.add_argument("--check", action="store_true", help="also replay every game with the engine and report disagreements")
+    parser.add_argument("--scores", help="JSON lines file to write the final scores of every game to")
+    parser.add_argument("--watch", type=float, metavar="SECONDS", help="play every game back in the terminal, waiting this long between moves")
+    parser.add_argument("--feed", help="file to write the spectator feed of every game to, see spectator.py")
+    parser.add_argument("--metrics", help="time the board while replaying and write the timings to this file as Prometheus text")
+    arguments = parser.parse_args(arguments)
+    if arguments.metrics:
+        instrumentation.enable()
+
+    games = failures = 0
+    start = time.perf_counter()
+    scores_file = open(arguments.scores, "w") if arguments.scores else None
+    feed_file = open(arguments.feed, "wb") if arguments.feed else None
+    for path in arguments.records:
+        for header, moves in record.read_games(path):
+            try:
+                if arguments.watch is not None:
+                    watch(header, moves, arguments.watch)
+                board, scores = replay_board(header, moves)
+                if feed_file:
+                    feed_file.write(spectator_feed(header, moves))
+                if arguments.check:
+                    state = replay_engine(header, moves)
+                    if engine.scores(state) != scores or not np.array_equal(engine.board_array(state), board.board):
+                        failures += 1
+                        print(f"{path} game {games}: the engine and the board disagree, {engine.scores(state)} != {scores}")
+            except engine.IllegalMoveException as e:
+                failures += 1
+                print(f"{path} game {games}: {e.reason}")
+                scores = None
+            if scores_file:
+                scores_file.write(json.dumps({"file": path, "game": games, "scores": scores}) + "\n")
+            games += 1
+    if scores_file:
+        scores_file.close()
+    if feed_file:
+        feed_file.close()
+    if arguments.metrics:
+        with open(arguments.metrics, "w") as file:
+            file.write(instrumentation.prometheus_text())
+        instrumentation.disable()
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {games} games in {elapsed:.2f}s ({games / elapsed if elapsed else 0:.0f} games/s), {failures} failed.")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
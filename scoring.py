@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+    Scores many boards at once with numpy.
+
+    Instead of splitting every lane into runs like Board.calculate_scores, this counts the windows of
+    connect_size cells that all belong to the same player. A run of n discs contains n - (connect_size - 1)
+    of those windows, which is exactly the amount of points calculate_scores gives it, and counting
+    windows is just a few shifted comparisons over the whole (N, rows, columns) stack.
+
+    Run it to benchmark it against the per-board loop: python scoring.py [boards]
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import sys
+import time
+import random
+
+import numpy as np
+
+import engine
+import task2 # only for the benchmark, task2 builds its window table from window_slices so it imports this module too.
+from bitboard import EMPTY, OBSTACLE
+
+def window_slices(cells, connect_size):
+    """Enumerates every window of connect_size cells in a line, the one place both window_owners and task2.window_table get them from.
+
+    Arguments:
+    cells -- array with the board in its last two axes, (rows, columns) or (N, rows, columns).
+    connect_size -- the amount of cells in a row needed to score a point.
+
+    Returns:
+    A list with one list per direction (horizontal, vertical and both diagonals, if they fit), holding connect_size views of cells
+    where the k-th view is the k-th cell of every window starting at each cell.
+    """
+    rows, columns = cells.shape[-2:]
+    span = connect_size - 1
+    directions = []
+    if columns >= connect_size:
+        directions.append([cells[..., :, k:columns - span + k] for k in range(connect_size)]) # horizontal
+    if rows >= connect_size:
+        directions.append([cells[..., k:rows - span + k, :] for k in range(connect_size)]) # vertical
+    if rows >= connect_size and columns >= connect_size:
+        directions.append([cells[..., k:rows - span + k, k:columns - span + k] for k in range(connect_size)]) # down and to the right
+        directions.append([cells[..., k:rows - span + k, span - k:columns - k] for k in range(connect_size)]) # down and to the left
+    return directions
+
+def window_owners(boards, connect_size):
+    """Finds every window of connect_size cells in a line that belongs to a single player.
+
+    Arguments:
+    boards -- uint8 array with the shape (N, rows, columns).
+    connect_size -- the amount of cells in a row needed to score a point.
+
+    Returns:
+    A list with one array per direction, holding the owner of every window starting at each cell, or EMPTY.
+    """
+    owners = []
+    for cells in window_slices(boards, connect_size):
+        first = cells[0]
+        same = (first != EMPTY) & (first != OBSTACLE)
+        for other in cells[1:]:
+            same &= other == first
+        owners.append(np.where(same, first, EMPTY))
+    return owners
+
+def score_boards(boards, connect_size):
+    """Calculates the score of every player on every board, the same as Board.calculate_scores for each board.
+
+    Arguments:
+    boards -- uint8 array with the shape (N, rows, columns), or a single (rows, columns) board.
+    connect_size -- the amount of cells in a row needed to score a point.
+
+    Returns:
+    An int64 array with the shape (N, 256), where [i, player id] is the score of that player on board i.
+    """
+    boards = np.asarray(boards, dtype=np.uint8)
+    if boards.ndim == 2:
+        boards = boards[np.newaxis]
+    board_count = boards.shape[0]
+    scores = np.zeros(board_count * 256, dtype=np.int64)
+    for owners in window_owners(boards, connect_size):
+        board_index = np.broadcast_to(np.arange(board_count).reshape(-1, 1, 1), owners.shape)
+        scored = owners != EMPTY
+        scores += np.bincount(board_index[scored] * 256 + owners[scored], minlength=board_count * 256)
+    return scores.reshape(board_count, 256)
+
+def random_positions(count, board_size=(6, 7), connect_size=4, seed=0):
+    """Creates boards from random games, with a random amount of moves played on each."""
+    rng = random.Random(seed)
+    boards = np.zeros((count, *board_size), dtype=np.uint8)
+    for index in range(count):
+        state = engine.new_game(board_size, (1, 2), connect_size, (2, 3), rng=rng)
+        for _ in range(rng.randint(0, board_size[0] * board_size[1])):
+            if engine.is_terminal(state):
+                break
+            state = engine.apply(state, rng.choice(engine.legal_moves(state)))
+        boards[index] = engine.board_array(state)
+    return boards
+
+def benchmark(count):
+    """Times the batched scorer against calling Board.rescan_scores on every board."""
+    boards = random_positions(count)
+    for connect_size in (3, 4):
+        board = task2.Board(boards.shape[1:])
+        start = time.perf_counter()
+        expected = []
+        for cells in boards:
+            board.board = cells
+            expected.append(board.rescan_scores(connect_size))
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        scores = score_boards(boards, connect_size)
+        batch_time = time.perf_counter() - start
+
+        matches = all(scores[index].nonzero()[0].tolist() == sorted(expected[index]) and all(scores[index, id] == score for id, score in expected[index].items())
+                      for index in range(count))
+        print(f"connect {connect_size}: loop {count / loop_time:,.0f} boards/s, batched {count / batch_time:,.0f} boards/s "
+              f"({loop_time / batch_time:.0f}x), results {'match' if matches else 'DO NOT MATCH'}")
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
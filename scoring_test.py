@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the batched scorer.
+"""
+
+import unittest
+
+import numpy as np
+
+import scoring
+import task2
+
+class ScoreBoardsTestCase(unittest.TestCase):
+    """Tests for 'scoring.score_boards'."""
+
+    def assert_matches_board(self, boards, connect_size):
+        scores = scoring.score_boards(boards, connect_size)
+        board = task2.Board(boards.shape[1:])
+        for index, cells in enumerate(boards):
+            board.board = cells
+            expected = board.rescan_scores(connect_size)
+            self.assertEqual({int(id): int(scores[index, id]) for id in scores[index].nonzero()[0]}, expected)
+
+    def test_random_cells_with_any_player_id(self):
+        rng = np.random.default_rng(2)
+        for connect_size in (3, 4):
+            for shape in [(6, 7), (3, 9), (8, 4), (2, 2)]:
+                ids = rng.choice([1, 2, 7, 128, 254], size=3, replace=False)
+                cells = rng.choice(np.concatenate([[task2.EMPTY, task2.OBSTACLE], ids]), size=(300, *shape), p=[0.2, 0.1, 0.3, 0.2, 0.2])
+                self.assert_matches_board(cells.astype(np.uint8), connect_size)
+
+    def test_played_positions(self):
+        for connect_size in (3, 4):
+            self.assert_matches_board(scoring.random_positions(200, connect_size=connect_size, seed=connect_size), connect_size)
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
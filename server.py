@@ -0,0 +1,295 @@
+#!/usr/bin/env python
+"""
+    Asyncio game server for the twisted connect 4 game.
+
+    Hosts any amount of matches at once over a plain TCP line protocol, with a real deadline on every
+    move: a player that doesn't answer in time loses their turn, and nobody else has to wait for them.
+
+    Protocol (one line per message, columns start from 0):
+        client -> server    JOIN                          wait for a match
+                            STATS                         get the server statistics as a JSON line
+                            WATCH <game>                  watch a match, see below
+                            <prompt> <n|p|s> <column>     a move, only when asked for one, with the number of the YOUR_MOVE it answers
+        server -> client    START <game> <your id> <rows> <columns> <connect size> <player ids, comma seperated>
+                            STATE <player to move> <cells, rows seperated by / and cells by ,>
+                            YOUR_MOVE <prompt> <seconds left>    lines that don't start with the prompt number are ignored
+                            ILLEGAL <reason>              the move was rejected, try again before the deadline
+                            TIMEOUT                       the deadline passed, the turn goes to the next player
+                            MOVED <player id> <n|p|s|x> <column>    x means the turn was skipped
+                            SCORES <id:score, comma seperated>
+                            END <winner ids, comma seperated>
+                            WATCHING <game>               followed by the binary spectator feed of the match, see spectator.py
+                            NO_GAME <game>                the match isn't being played
+
+    Example: python server.py --port 4444
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import itertools
+
+import engine
+import record
+import spectator
+from simulate import parse_size
+
+class Connection():
+    def __init__(self, reader, writer):
+        """A connected client, the id is given out when the client joins a match."""
+        self.reader = reader
+        self.writer = writer
+        self.id = None
+        self.connected = True
+        self.prompts = 0 # YOUR_MOVE messages sent so far, a move has to start with the number of the last one.
+
+    async def send(self, line):
+        """Sends a line to the client, a client that went away is marked as disconnected instead of raising."""
+        if not self.connected:
+            return
+        try:
+            self.writer.write(line.encode() + b"\n")
+            await self.writer.drain()
+        except ConnectionError:
+            self.connected = False
+
+class Match():
+    def __init__(self, game_id, connections, state):
+        """A match in progress between some connections."""
+        self.game_id = game_id
+        self.connections = connections
+        self.state = state
+        self.turns = 0
+        self.latencies = [] # seconds every answered move took, from asking for it to receiving it.
+        self.task = None # the task running the match, so it can be cancelled.
+        self.spectators = spectator.SpectatorHub(state) # encodes every move once for everybody watching.
+
+    async def broadcast(self, line):
+        await asyncio.gather(*(connection.send(line) for connection in self.connections))
+
+    def latency(self):
+        """Gets the average and worst move latency in seconds."""
+        if not self.latencies:
+            return {"average": 0.0, "max": 0.0}
+        return {"average": sum(self.latencies) / len(self.latencies), "max": max(self.latencies)}
+
+class GameServer():
+    def __init__(self, board_size=(6, 7), connect_size=4, obstacle_size=(2, 3), players_per_game=2, move_time_limit=5, seed=None):
+        """Creates a server, call start to begin accepting connections.
+
+        Keyword Arguments:
+        board_size (default: (6, 7)) -- A 2 element tuple that describes the size of the board.
+        connect_size (default: 4) -- The amount of discs that should be placed in one line to score a point.
+        obstacle_size (default: (2, 3)) -- A 2 element tuple that describes the size of the obstacle.
+        players_per_game (default: 2) -- How many players every match waits for.
+        move_time_limit (default: 5) -- Seconds a player has for every move.
+        seed (default: None) -- Seed for the obstacle positions.
+        """
+        self.board_size = board_size
+        self.connect_size = connect_size
+        self.obstacle_size = obstacle_size
+        self.players_per_game = players_per_game
+        self.move_time_limit = move_time_limit
+        self.random = random.Random(seed)
+        self.matches = {} # game id -> Match, only the ones being played.
+        self.finished_games = 0
+        self.__waiting = []
+        self.__game_ids = itertools.count(1)
+        self.__server = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Starts listening, port 0 picks a free port.
+
+        Returns:
+        The port the server is listening on.
+        """
+        self.__server = await asyncio.start_server(self.__handle_client, host, port)
+        return self.__server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """Stops accepting connections and cancels the matches in progress."""
+        self.__server.close()
+        await self.__server.wait_closed()
+        for task in [match.task for match in self.matches.values()]:
+            task.cancel()
+
+    def stats(self):
+        """Gets the server statistics, including the latency of every active game."""
+        return {
+            "active_games": len(self.matches),
+            "finished_games": self.finished_games,
+            "waiting_players": len(self.__waiting),
+            "games": {game_id: {"turns": match.turns, "latency": match.latency(), "spectators": len(match.spectators.subscribers)} for game_id, match in self.matches.items()},
+        }
+
+    async def __handle_client(self, reader, writer):
+        """Reads the first line of a new connection to see what the client wants."""
+        connection = Connection(reader, writer)
+        try:
+            command = (await reader.readline()).decode().strip().upper()
+        except ConnectionError:
+            command = ""
+        if command == "STATS":
+            await connection.send(json.dumps(self.stats()))
+        elif command.startswith("WATCH"):
+            game_id = command[len("WATCH"):].strip()
+            match = self.matches.get(int(game_id)) if game_id.isdigit() else None
+            if match is None:
+                await connection.send(f"NO_GAME {game_id}")
+            else:
+                await connection.send(f"WATCHING {game_id}")
+                subscriber = match.spectators.subscribe()
+                try:
+                    await spectator.pump(subscriber, writer) # a slow watcher only ever falls behind, it never holds up the match.
+                finally:
+                    match.spectators.unsubscribe(subscriber) # a watcher that left shouldn't be sent keyframes for the rest of the match.
+        elif command == "JOIN":
+            self.__waiting.append(connection)
+            if len(self.__waiting) >= self.players_per_game:
+                connections, self.__waiting = self.__waiting[:self.players_per_game], self.__waiting[self.players_per_game:]
+                game_id = next(self.__game_ids)
+                for player_id, player in enumerate(connections, 1):
+                    player.id = player_id
+                state = engine.new_game(self.board_size, range(1, len(connections) + 1), self.connect_size, self.obstacle_size, rng=self.random)
+                match = self.matches[game_id] = Match(game_id, connections, state)
+                match.task = asyncio.current_task()
+                await self.__play(match) # the connection that completed the match runs it, the rest just wait.
+            return
+        writer.close()
+
+    async def __play(self, match):
+        """Plays a match until the board is full, then closes every connection in it."""
+        player_ids = ",".join(str(connection.id) for connection in match.connections)
+        rows, columns = self.board_size
+        for connection in match.connections:
+            await connection.send(f"START {match.game_id} {connection.id} {rows} {columns} {self.connect_size} {player_ids}")
+        try:
+            while not engine.is_terminal(match.state):
+                await match.broadcast(f"STATE {match.state.player_id} {encode_board(engine.board_array(match.state))}")
+                connection = match.connections[match.state.turn]
+                move = await self.__get_move(match, connection)
+                if move is None:
+                    match.state = engine.skip_turn(match.state)
+                    match.spectators.publish(match.state, (record.SKIP, 0))
+                    await match.broadcast(f"MOVED {connection.id} x -1")
+                else:
+                    match.spectators.publish(match.state, move)
+                    await match.broadcast(f"MOVED {connection.id} {move[0]} {move[1]}")
+                    await match.broadcast("SCORES " + ",".join(f"{player_id}:{score}" for player_id, score in engine.scores(match.state).items()))
+                match.turns += 1
+                if not any(connection.connected for connection in match.connections):
+                    break # everybody left, nobody is going to finish it.
+            await match.broadcast("END " + ",".join(str(player_id) for player_id in engine.winners(match.state)))
+        finally:
+            match.spectators.finish()
+            del self.matches[match.game_id]
+            self.finished_games += 1
+            for connection in match.connections:
+                connection.writer.close()
+
+    async def __get_move(self, match, connection):
+        """Asks a player for a move until they make a legal one or run out of time, the move is applied to the match.
+
+        Returns:
+        The move that was made, or None if the turn was lost.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.move_time_limit
+        while connection.connected:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            connection.prompts += 1
+            await connection.send(f"YOUR_MOVE {connection.prompts} {remaining:.1f}")
+            asked = time.perf_counter()
+            try:
+                reply = await self.__read_reply(connection, deadline)
+            except asyncio.TimeoutError:
+                break
+            except ValueError: # the line went past the StreamReader limit, which drops it.
+                await connection.send("ILLEGAL the line is too long")
+                continue
+            if reply is None: # the client went away, every turn they have left is skipped.
+                connection.connected = False
+                return None
+            match.latencies.append(time.perf_counter() - asked)
+            try:
+                move = parse_move(reply)
+                match.state = engine.apply(match.state, move)
+                return move
+            except engine.IllegalMoveException as e:
+                await connection.send(f"ILLEGAL {e.reason}")
+        await connection.send("TIMEOUT")
+        return None
+
+    async def __read_reply(self, connection, deadline):
+        """Reads lines until one answers the last prompt of a connection, a line for an earlier prompt
+        came in after its deadline (or after it was rejected) and is dropped.
+
+        Returns:
+        The rest of the line after the prompt number, or None if the client went away.
+
+        Raises:
+        asyncio.TimeoutError -- if the deadline passes first.
+        ValueError -- if a line is longer than the StreamReader limit.
+        """
+        loop = asyncio.get_running_loop()
+        prompt = str(connection.prompts)
+        while True:
+            try:
+                line = await asyncio.wait_for(connection.reader.readline(), deadline - loop.time())
+            except ConnectionError:
+                return None
+            if not line:
+                return None
+            parts = line.decode(errors="replace").split(maxsplit=1) # a client can send anything, it is only ever an illegal move.
+            if parts and parts[0] == prompt:
+                return parts[1] if len(parts) > 1 else ""
+
+def parse_move(line):
+    """Parses a move line like "n 3" into a move tuple.
+
+    Raises:
+    IllegalMoveException -- if the line isn't a move type followed by a column.
+    """
+    parts = line.split()
+    if len(parts) != 2 or not parts[0] or not parts[1].isdecimal(): # isdigit would let "²" through, which int can't read.
+        raise engine.IllegalMoveException(f"\"{line.strip()}\" is not a move type and a column")
+    return parts[0][0].lower(), int(parts[1])
+
+def encode_board(board):
+    """Encodes a board matrix for the STATE message, rows are seperated by / and cells by ,."""
+    return "/".join(",".join(str(cell) for cell in row) for row in board.tolist())
+
+def decode_board(text):
+    """Decodes the board of a STATE message into a list of rows."""
+    return [[int(cell) for cell in row.split(",")] for row in text.split("/")]
+
+async def serve(arguments):
+    server = GameServer(arguments.board, arguments.connect, arguments.obstacle, arguments.players, arguments.time_limit)
+    port = await server.start(arguments.host, arguments.port)
+    print(f"Listening on {arguments.host}:{port}")
+    while True:
+        await asyncio.sleep(10)
+        stats = server.stats()
+        print(f"{stats['active_games']} active games, {stats['finished_games']} finished, {stats['waiting_players']} waiting")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hosts twisted connect 4 matches over TCP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4444)
+    parser.add_argument("--board", type=parse_size, default=(6, 7))
+    parser.add_argument("--obstacle", type=parse_size, default=(2, 3))
+    parser.add_argument("--connect", type=int, default=4)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--time-limit", type=float, default=5)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the game server, using local asyncio clients.
+"""
+
+import json
+import random
+import asyncio
+import unittest
+
+import numpy as np
+
+import server
+import spectator
+
+class Client():
+    """A scripted client that plays random moves, retrying when a move is rejected."""
+
+    def __init__(self, seed, answer=True):
+        self.random = random.Random(seed)
+        self.answer = answer
+        self.lines = []
+
+    async def play(self, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"JOIN\n")
+        columns = 0
+        while line := (await reader.readline()).decode().strip():
+            self.lines.append(line)
+            if line.startswith("START"):
+                columns = int(line.split()[4])
+            elif line.startswith("YOUR_MOVE") and self.answer:
+                writer.write(f"{line.split()[1]} {self.random.choice('nnnps')} {self.random.randrange(columns)}\n".encode())
+        writer.close()
+        return self.lines
+
+class LateClient(Client):
+    """A client that misses its first deadline and then answers it anyway, with a move that is never legal."""
+
+    async def play(self, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"JOIN\n")
+        columns, late, prompt = 0, True, None
+        while line := (await reader.readline()).decode().strip():
+            self.lines.append(line)
+            if line.startswith("START"):
+                columns = int(line.split()[4])
+            elif line == "TIMEOUT" and late:
+                writer.write(f"{prompt} q 0\n".encode()) # too late, this must not be read as the next move.
+                late = False
+            elif line.startswith("YOUR_MOVE"):
+                prompt = line.split()[1]
+                if not late:
+                    writer.write(f"{prompt} n {self.random.randrange(columns)}\n".encode())
+        writer.close()
+        return self.lines
+
+class StaleClient(Client):
+    """A client whose every move is preceded by a line for the prompt before, as if it arrived just after the new prompt."""
+
+    async def play(self, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"JOIN\n")
+        columns = 0
+        while line := (await reader.readline()).decode().strip():
+            self.lines.append(line)
+            if line.startswith("START"):
+                columns = int(line.split()[4])
+            elif line.startswith("YOUR_MOVE"):
+                prompt = int(line.split()[1])
+                writer.write(f"{prompt - 1} q 0\nq 0\n{prompt} n {self.random.randrange(columns)}\n".encode())
+        writer.close()
+        return self.lines
+
+class GarbageClient(Client):
+    """A client that answers its first prompt with lines that aren't moves, and then plays like a Client."""
+
+    async def play(self, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"JOIN\n")
+        columns, garbage = 0, [b"\xff\xfe 3\n", "n \u00b2\n".encode(), b"n" * 70000 + b"\n"]
+        while line := (await reader.readline()).decode().strip():
+            self.lines.append(line)
+            if line.startswith("START"):
+                columns = int(line.split()[4])
+            elif line.startswith("YOUR_MOVE"):
+                prompt = line.split()[1].encode()
+                writer.write(prompt + b" " + garbage.pop(0) if garbage else prompt + f" n {self.random.randrange(columns)}\n".encode())
+        writer.close()
+        return self.lines
+
+async def get_stats(port):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"STATS\n")
+    stats = json.loads(await reader.readline())
+    writer.close()
+    return stats
+
+class GameServerTestCase(unittest.IsolatedAsyncioTestCase):
+    """Tests for 'server.GameServer'."""
+
+    async def asyncSetUp(self):
+        self.server = server.GameServer(board_size=(4, 5), connect_size=3, obstacle_size=(1, 2), move_time_limit=0.5, seed=1)
+        self.port = await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def test_concurrent_games_finish(self):
+        clients = [Client(seed) for seed in range(6)]
+        tasks = [asyncio.create_task(client.play(self.port)) for client in clients]
+        await asyncio.sleep(0.1)
+        self.assertEqual((await get_stats(self.port))["active_games"], 3)
+        for lines in await asyncio.wait_for(asyncio.gather(*tasks), 30):
+            self.assertTrue(lines[0].startswith("START"))
+            self.assertTrue(lines[-1].startswith("END"))
+            self.assertNotIn("TIMEOUT", lines)
+        stats = await get_stats(self.port)
+        self.assertEqual(stats["active_games"], 0)
+        self.assertEqual(stats["finished_games"], 3)
+
+    async def test_slow_player_loses_the_turn(self):
+        slow, fast = Client(1, answer=False), Client(2)
+        tasks = [asyncio.create_task(slow.play(self.port)), asyncio.create_task(fast.play(self.port))]
+        await asyncio.sleep(1.2) # long enough for the slow player to time out twice.
+        self.assertGreaterEqual(slow.lines.count("TIMEOUT"), 2)
+        self.assertIn("MOVED 1 x -1", fast.lines)
+        stats = await get_stats(self.port)
+        self.assertEqual(stats["active_games"], 1)
+        for task in tasks:
+            task.cancel()
+
+    async def test_late_reply_is_not_the_next_move(self):
+        late, other = LateClient(5), Client(6)
+        tasks = [asyncio.create_task(late.play(self.port)), asyncio.create_task(other.play(self.port))]
+        lines = (await asyncio.wait_for(asyncio.gather(*tasks), 30))[0]
+        self.assertIn("TIMEOUT", lines)
+        self.assertFalse([line for line in lines if line.startswith("ILLEGAL") and '"q"' in line])
+        self.assertTrue(lines[-1].startswith("END"))
+
+    async def test_lines_for_other_prompts_are_dropped(self):
+        stale, other = StaleClient(11), Client(12)
+        tasks = [asyncio.create_task(stale.play(self.port)), asyncio.create_task(other.play(self.port))]
+        lines = (await asyncio.wait_for(asyncio.gather(*tasks), 30))[0]
+        self.assertTrue(lines[-1].startswith("END"))
+        self.assertFalse([line for line in lines if line.startswith("ILLEGAL") and '"q"' in line])
+
+    async def test_bad_lines_are_illegal_moves(self):
+        self.server.move_time_limit = 5 # three rejected lines shouldn't use up the turn.
+        garbage, other = GarbageClient(9), Client(10)
+        tasks = [asyncio.create_task(garbage.play(self.port)), asyncio.create_task(other.play(self.port))]
+        for lines in await asyncio.wait_for(asyncio.gather(*tasks), 30):
+            self.assertTrue(lines[-1].startswith("END"))
+        self.assertGreaterEqual(len([line for line in garbage.lines if line.startswith("ILLEGAL")]), 3)
+        self.assertIn("ILLEGAL the line is too long", garbage.lines)
+
+    def test_parse_move(self):
+        self.assertEqual(server.parse_move("S 3\n"), ("s", 3))
+        for line in ("n \u00b2", "n", "n -1", "n 1 2", ""):
+            with self.assertRaises(server.engine.IllegalMoveException):
+                server.parse_move(line)
+
+    async def test_spectator_sees_the_whole_match(self):
+        players = [Client(seed) for seed in (3, 4)]
+        tasks = [asyncio.create_task(client.play(self.port)) for client in players]
+        await asyncio.sleep(0.05)
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(b"WATCH 1\n")
+        self.assertEqual((await reader.readline()).decode().strip(), "WATCHING 1")
+        decoder = spectator.SpectatorDecoder()
+        frames = [decoder.feed(frame) async for frame in spectator.read_frames(reader)]
+        writer.close()
+        lines = (await asyncio.wait_for(asyncio.gather(*tasks), 30))[0]
+        self.assertEqual(frames[0], "keyframe")
+        self.assertEqual(np.count_nonzero(decoder.board), decoder.board.size) # the match ends on a full board.
+        self.assertEqual(lines[-2], "SCORES " + ",".join(f"{player_id}:{score}" for player_id, score in decoder.scores.items()))
+
+    async def test_watcher_that_left_is_unsubscribed(self):
+        players = [Client(seed, answer=False) for seed in (7, 8)] # every turn times out, so the match lasts.
+        tasks = [asyncio.create_task(client.play(self.port)) for client in players]
+        await asyncio.sleep(0.05)
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(b"WATCH 1\n")
+        self.assertEqual((await reader.readline()).decode().strip(), "WATCHING 1")
+        self.assertEqual((await get_stats(self.port))["games"]["1"]["spectators"], 1)
+        writer.close()
+        await asyncio.sleep(1.6) # the server only notices when it writes the next frames.
+        self.assertEqual((await get_stats(self.port))["games"]["1"]["spectators"], 0)
+        for task in tasks:
+            task.cancel()
+
+    async def test_watching_a_missing_game(self):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(b"WATCH 42\n")
+        self.assertEqual((await reader.readline()).decode().strip(), "NO_GAME 42")
+        writer.close()
+
+    def test_board_encoding_round_trip(self):
+        board = [[0, 0, 1], [255, 2, 1]]
+        self.assertEqual(server.decode_board(server.encode_board(np.array(board))), board)
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+    Headless self-play simulator for the twisted connect 4 rule variants.
+
+    Plays batches of games for every combination of the given rules across all cores, writes every
+    finished game to a JSON lines file as soon as it is done, and prints a summary per configuration.
+    The games run on the engine, so no players need to be registered and nothing asks for input.
+
+    Example: python simulate.py --games 2000 --connect 3 4 --players 2 3 --output results.jsonl
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import ai
+import engine
+import record
+
+def play_game(config, seed, agent="random", ai_time_limit=0.05):
+    """Plays a single game between computer players.
+
+    Arguments:
+    config -- dictionary with the rules: board_size, obstacle_size, connect_size and players.
+    seed -- seed for the obstacle position and the random moves.
+
+    Keyword Arguments:
+    agent (default: "random") -- "random" to pick uniformly from the legal moves, "ai" to use ai.SearchPlayer.
+    ai_time_limit (default: 0.05) -- seconds per move for the "ai" agent.
+
+    Returns:
+    A dictionary describing the finished game.
+    """
+    rng = random.Random(seed)
+    state = engine.new_game(config["board_size"], range(1, config["players"] + 1), config["connect_size"], config["obstacle_size"], rng=rng)
+    header = record.GameHeader.from_state(state, config["obstacle_size"], seed)
+    search_player = ai.SearchPlayer(ai_time_limit, seed=seed) if agent == "ai" else None
+
+    moves = []
+    used = {"p": 0, "s": 0}
+    while not engine.is_terminal(state):
+        move = search_player.choose_move(state) if search_player else rng.choice(engine.legal_moves(state))
+        if move[0] in used:
+            used[move[0]] += 1
+        state = engine.apply(state, move)
+        moves.append(move)
+
+    final_scores = list(engine.scores(state).values())
+    best = max(final_scores)
+    return {
+        "config": config,
+        "seed": seed,
+        "agent": agent,
+        "scores": final_scores,
+        "winners": [index + 1 for index, score in enumerate(final_scores) if score == best], # more than one means a tie.
+        "moves": len(moves),
+        "pop_outs": used["p"],
+        "special_discs": used["s"],
+        "record": header.pack(len(moves)) + bytes(record.encode_move(move) for move in moves), # removed before the result is written as JSON.
+    }
+
+def play_batch(config, seeds, agent, ai_time_limit):
+    """Plays a batch of games in a worker process, batching keeps the process pool overhead low."""
+    return [play_game(config, seed, agent, ai_time_limit) for seed in seeds]
+
+def config_key(config):
+    """Gets a short readable name for a configuration, e.g. 6x7 c4 o2x3 p2."""
+    return f"{config['board_size'][0]}x{config['board_size'][1]} c{config['connect_size']} o{config['obstacle_size'][0]}x{config['obstacle_size'][1]} p{config['players']}"
+
+class Summary():
+    def __init__(self):
+        """Running totals of the games of one configuration."""
+        self.games = 0
+        self.ties = 0
+        self.wins = {} # player number -> outright wins
+        self.score_totals = {}
+        self.moves = 0
+        self.pop_outs = 0
+        self.special_discs = 0
+
+    def add(self, result):
+        """Adds a finished game to the totals."""
+        self.games += 1
+        if len(result["winners"]) > 1:
+            self.ties += 1
+        else:
+            self.wins[result["winners"][0]] = self.wins.get(result["winners"][0], 0) + 1
+        for index, score in enumerate(result["scores"]):
+            self.score_totals[index + 1] = self.score_totals.get(index + 1, 0) + score
+        self.moves += result["moves"]
+        self.pop_outs += result["pop_outs"]
+        self.special_discs += result["special_discs"]
+
+    def __str__(self):
+        win_rates = ", ".join(f"P{player} {self.wins.get(player, 0) / self.games:.1%}" for player in sorted(self.score_totals))
+        average_scores = ", ".join(f"P{player} {total / self.games:.2f}" for player, total in sorted(self.score_totals.items()))
+        return (f"{self.games} games | wins {win_rates} | ties {self.ties / self.games:.1%} | scores {average_scores} | "
+                f"length {self.moves / self.games:.1f} | PopOut/game {self.pop_outs / self.games:.2f} | special/game {self.special_discs / self.games:.2f}")
+
+def parse_size(text):
+    """Parses a size like 6x7 into a tuple."""
+    rows, columns = text.lower().split("x")
+    return int(rows), int(columns)
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Plays many headless games of every rule variant in parallel.")
+    parser.add_argument("--games", type=int, default=1000, help="games per configuration")
+    parser.add_argument("--boards", type=parse_size, nargs="+", default=[(6, 7)], help="board sizes, e.g. 6x7 8x9")
+    parser.add_argument("--obstacles", type=parse_size, nargs="+", default=[(2, 3)], help="obstacle sizes, e.g. 2x3 1x1")
+    parser.add_argument("--connect", type=int, nargs="+", default=[4], help="connect sizes, e.g. 3 4")
+    parser.add_argument("--players", type=int, nargs="+", default=[2], help="player counts, e.g. 2 3")
+    parser.add_argument("--agent", choices=["random", "ai"], default="random")
+    parser.add_argument("--ai-time", type=float, default=0.05, help="seconds per move for the ai agent")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: every core)")
+    parser.add_argument("--batch", type=int, default=50, help="games per task sent to a worker")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="simulation.jsonl", help="JSON lines file that every finished game is appended to")
+    parser.add_argument("--record", help="binary game record file to append every game to, see record.py")
+    arguments = parser.parse_args(arguments)
+
+    configs = [{"board_size": board, "obstacle_size": obstacle, "connect_size": connect, "players": players}
+               for board in arguments.boards for obstacle in arguments.obstacles for connect in arguments.connect for players in arguments.players
+               if obstacle[0] < board[0] and obstacle[1] <= board[1]] # the obstacle has to fit with room to play above it.
+    summaries = {config_key(config): Summary() for config in configs}
+
+    start = time.perf_counter()
+    records = open(arguments.record, "ab") if arguments.record else None
+    with ProcessPoolExecutor(arguments.workers) as executor, open(arguments.output, "a") as output:
+        futures = []
+        for config in configs:
+            for first in range(0, arguments.games, arguments.batch):
+                seeds = range(arguments.seed + first, arguments.seed + min(first + arguments.batch, arguments.games))
+                futures.append(executor.submit(play_batch, config, seeds, arguments.agent, arguments.ai_time))
+        for future in as_completed(futures): # stream the results out in the order the batches finish.
+            for result in future.result():
+                game_record = result.pop("record")
+                if records:
+                    records.write(game_record)
+                output.write(json.dumps(result) + "\n")
+                summaries[config_key(result["config"])].add(result)
+            output.flush()
+    if records:
+        records.close()
+    elapsed = time.perf_counter() - start
+
+    total_games = sum(summary.games for summary in summaries.values())
+    print(f"Played {total_games} games in {elapsed:.1f}s ({total_games / elapsed:.0f} games/s), results in {arguments.output}")
+    for key, summary in summaries.items():
+        print(f"{key}: {summary}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the headless self-play simulator.
+"""
+
+import io
+import os
+import json
+import tempfile
+import unittest
+import contextlib
+
+import record
+import simulate
+
+class SimulateTestCase(unittest.TestCase):
+    """Tests for 'simulate.main' and 'simulate.play_game'."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.directory.name, "results.jsonl")
+        self.records = os.path.join(self.directory.name, "games.c4r")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_main(self, *arguments):
+        with contextlib.redirect_stdout(io.StringIO()) as printed:
+            simulate.main(["--workers", "1", "--output", self.output, "--record", self.records, *arguments])
+        return printed.getvalue()
+
+    def test_every_game_is_written(self):
+        printed = self.run_main("--games", "3", "--batch", "2", "--boards", "4x5", "--obstacles", "1x2", "--connect", "3", "--players", "2", "3", "--seed", "10")
+        with open(self.output) as file:
+            results = [json.loads(line) for line in file]
+        self.assertEqual(len(results), 6) # 3 games of each player count.
+        self.assertEqual(len(record.index_games(self.records)), 6)
+        self.assertEqual(sorted((result["config"]["players"], result["seed"]) for result in results), [(players, seed) for players in (2, 3) for seed in (10, 11, 12)])
+        for result in results:
+            self.assertEqual(set(result), {"config", "seed", "agent", "scores", "winners", "moves", "pop_outs", "special_discs"})
+            config = dict(result["config"], board_size=tuple(result["config"]["board_size"]), obstacle_size=tuple(result["config"]["obstacle_size"]))
+            expected = simulate.play_game(config, result["seed"]) # the same seed plays the same game in this process.
+            self.assertEqual(result["scores"], expected["scores"])
+            self.assertEqual(result["winners"], expected["winners"])
+            self.assertEqual(len(result["scores"]), config["players"])
+            self.assertEqual([result["scores"][winner - 1] for winner in result["winners"]], [max(result["scores"])] * len(result["winners"]))
+        self.assertIn("4x5 c3 o1x2 p2: 3 games", printed)
+        self.assertIn("4x5 c3 o1x2 p3: 3 games", printed)
+
+    def test_results_are_appended(self):
+        for _ in range(2):
+            self.run_main("--games", "2", "--boards", "4x5", "--obstacles", "1x2", "--connect", "3")
+        with open(self.output) as file:
+            self.assertEqual(len(file.readlines()), 4)
+
+    def test_obstacles_that_dont_fit_are_skipped(self):
+        self.run_main("--games", "1", "--boards", "4x5", "--obstacles", "1x2", "4x2", "--connect", "3")
+        with open(self.output) as file:
+            self.assertEqual([json.loads(line)["config"]["obstacle_size"] for line in file], [[1, 2]])
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
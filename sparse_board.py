@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+"""
+    Sparse board for the twisted connect 4 game, for boards far too big for task2.Board.
+
+    task2.Board keeps a dense matrix, so its memory and the cost of scoring and drawing it grow with the
+    area of the board. This board only keeps the cells that are filled: every column is a bytearray of
+    its cells from the bottom up, which is enough since gravity keeps every column packed to the bottom.
+
+    Scoring counts the windows of connect_size cells in a line that all belong to one player, which adds
+    up to the same score as task2.Board (a run of n discs holds n - (connect_size - 1) windows). After a
+    move only the windows that contain a changed cell are counted again, so the cost of a move depends
+    on how many cells it changed and not on the size of the board. Drawing only draws a viewport.
+
+    The interface is the same as task2.Board, except that there is no dense board attribute.
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import random
+
+import numpy as np
+
+import colours
+import engine
+import renderer
+from bitboard import EMPTY, OBSTACLE
+
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1)) # (up, right) steps of the lines a point can be scored along.
+VIEWPORT_SIZE = (12, 30) # rows and columns drawn at most.
+
+class SparseBoard():
+    def __init__(self, board_size, seed=None):
+        """Creates an empty board, call add_obstacle to place the obstacle.
+
+        Arguments:
+        board_size -- A 2 element tuple that describes the size of the board.
+
+        Keyword Arguments:
+        seed (default: None) -- Seed for the obstacle position and the background pattern drawn on the empty cells.
+        """
+        self.rows, self.columns = board_size
+        self.cells = {} # column -> bytearray of its cells from the bottom up, empty columns are left out.
+        self.filled = 0 # how many cells have a disc or an obstacle in them.
+        self.scores = {} # running score of every player id, kept up to date by calculate_scores.
+        self.last_column = None # the column of the last move, the viewport follows it.
+        self.colours = {player_id: colours.player_colour(player_id) for player_id in range(EMPTY + 1, OBSTACLE)} # player id -> colour function, change it with set_colour.
+        self.random = random.Random(seed) # like task2.Board, so a seeded game plays out the same in any process.
+        self.renderer = renderer.Renderer(seed)
+        self.renderer.set_colours(self.colours) # the whole table once, drawing a frame doesn't have to look at which players are in view.
+        self.__scored_connect_size = None # the connect size self.scores was counted with.
+        self.__old_cells = {} # (height, column) -> what the cell was at the last scoring pass, for every cell that changed since.
+
+    def cell(self, height, column):
+        """Gets a cell, counting rows from the bottom of the board."""
+        cells = self.cells.get(column)
+        return cells[height] if cells is not None and height < len(cells) else EMPTY
+
+    def set_colour(self, player_id, colour):
+        """Changes the colour a player is drawn with.
+
+        Arguments:
+        player_id -- id of the player.
+        colour -- colour function from the colours module.
+        """
+        self.colours[player_id] = colour
+        self.renderer.set_colours(self.colours)
+
+    def add_obstacle(self, obstacle_size=(2, 3), column=None):
+        """Adds an obstacle at a point along the bottom of the board, the columns it goes in have to be empty.
+
+        Keyword Arguments:
+        obstacle_size (default (2, 3)) -- A 2 element tuple that describes the size of the obstacle.
+        column (default None) -- The leftmost column of the obstacle, picked at random if None.
+        """
+        if column is None:
+            column = self.random.randint(0, self.columns - obstacle_size[1])
+        self.__set_columns({obstacle_column: bytearray([OBSTACLE]) * obstacle_size[0] for obstacle_column in range(column, column + obstacle_size[1])})
+
+    def perform_move(self, player, move_type, column):
+        """Updates the board with respect to the player and move type, with the same rules as task2.Board.perform_move.
+
+        Arguments:
+        player -- The player that performs the move, anything with id, pop_out_left and special_disc_left.
+        move_type -- The type of move being used. (string containing "n", "p" or "s", for normal, pop and special respectively.)
+        column -- The column of the move.
+
+        Raises:
+        IllegalMoveException -- if the move is not allowed due to the rules of the game. e.g. the requested column is full.
+        """
+        cells = self.cells.get(column, bytearray())
+        if len(cells) == self.rows and move_type != "p":
+            raise engine.IllegalMoveException("the column is full")
+        match move_type:
+            case "n":
+                self.__old_cells.setdefault((len(cells), column), EMPTY) # only the new disc changes, so skip comparing the column.
+                self.cells[column] = cells # a new column if it was empty.
+                cells.append(player.id)
+                self.filled += 1
+            case "p":
+                if not player.pop_out_left:
+                    raise engine.IllegalMoveException("you have no more PopOut left")
+                if not cells or cells[0] != player.id:
+                    raise engine.IllegalMoveException("you cannot popout a disc that you don't own")
+                self.__set_columns({column: cells[1:]}) # everything above falls down one cell.
+                player.pop_out_left -= 1
+            case "s":
+                if not player.special_disc_left:
+                    raise engine.IllegalMoveException("you have no more special discs left")
+                height = len(cells) # where the disc lands, it blasts the 3x3 cells around that and is not placed itself.
+                blasted = {}
+                for blasted_column in range(max(0, column - 1), min(self.columns, column + 2)):
+                    blasted_cells = bytearray(self.cells.get(blasted_column, b""))
+                    del blasted_cells[max(0, height - 1):height + 2] # gravity closes the gap.
+                    blasted[blasted_column] = blasted_cells
+                self.__set_columns(blasted)
+                player.special_disc_left -= 1
+        self.last_column = column
+
+    def __set_columns(self, new_cells):
+        """Replaces some columns, remembering what every changed cell used to be for the next scoring pass.
+
+        Arguments:
+        new_cells -- dictionary of column to the new bytearray of its cells.
+        """
+        for column, cells in new_cells.items():
+            old = self.cells.get(column, b"")
+            for height in range(max(len(old), len(cells))):
+                before = old[height] if height < len(old) else EMPTY
+                after = cells[height] if height < len(cells) else EMPTY
+                if before != after:
+                    self.__old_cells.setdefault((height, column), before)
+            self.filled += len(cells) - len(old)
+            if cells:
+                self.cells[column] = cells
+            else:
+                self.cells.pop(column, None)
+
+    def __window_owner(self, height, column, direction, connect_size, overrides):
+        """Gets the player that owns every cell of a window, or None.
+
+        Arguments:
+        height, column -- the first cell of the window.
+        direction -- the (up, right) step between the cells of the window.
+        connect_size -- the amount of cells in the window.
+        overrides -- dictionary of (height, column) to a cell value to use instead of the board's.
+        """
+        up, right = direction
+        owner = None
+        for step in range(connect_size):
+            position = (height + step * up, column + step * right)
+            cell = overrides[position] if position in overrides else self.cell(*position)
+            if cell == EMPTY or cell == OBSTACLE or (owner is not None and cell != owner):
+                return None
+            owner = cell
+        return owner
+
+    def __windows_through(self, height, column, connect_size):
+        """Gets the first cell and direction of every window on the board that contains a cell."""
+        for up, right in DIRECTIONS:
+            for step in range(connect_size):
+                start_height, start_column = height - step * up, column - step * right
+                end_height, end_column = start_height + (connect_size - 1) * up, start_column + (connect_size - 1) * right
+                if 0 <= start_height and end_height < self.rows and 0 <= min(start_column, end_column) and max(start_column, end_column) < self.columns:
+                    yield start_height, start_column, (up, right)
+
+    def calculate_scores(self, connect_size=4, incremental=True):
+        """Calculates the scores of the players, the running totals are kept in self.scores.
+
+        Keyword Arguments:
+        connect_size (default 4) -- the amount of discs that should be placed in one line to score a point.
+        incremental (default True) -- only count the windows around cells that changed since the last call,
+                                      if False every filled cell is counted again.
+
+        Returns:
+        A dictionary of player id to score, players without a point are omitted.
+        """
+        if not incremental or self.__scored_connect_size != connect_size:
+            self.scores = {}
+            for column, cells in self.cells.items():
+                for height in range(len(cells)):
+                    for direction in DIRECTIONS: # every window is counted from its first cell, so only once.
+                        owner = self.__window_owner(height, column, direction, connect_size, {})
+                        if owner is not None:
+                            self.scores[owner] = self.scores.get(owner, 0) + 1
+            self.__scored_connect_size = connect_size
+        else:
+            windows = {window for cell in self.__old_cells for window in self.__windows_through(*cell, connect_size)}
+            for height, column, direction in windows:
+                before = self.__window_owner(height, column, direction, connect_size, self.__old_cells)
+                after = self.__window_owner(height, column, direction, connect_size, {})
+                if before != after:
+                    if before is not None:
+                        self.scores[before] -= 1
+                    if after is not None:
+                        self.scores[after] = self.scores.get(after, 0) + 1
+        self.__old_cells.clear()
+        return {player_id: score for player_id, score in self.scores.items() if score}
+
+    def is_empty_slot_available(self):
+        """Checks if the board has any empty spaces left."""
+        return self.filled < self.rows * self.columns
+
+    def viewport(self, column=None, size=VIEWPORT_SIZE):
+        """Gets part of the board as a dense matrix, like task2.Board.board, for drawing it.
+        The viewport is as wide as it can be around the column, and reaches from the bottom of the board up to
+        just above the highest cell in it.
+
+        Keyword Arguments:
+        column (default: None) -- the column to center on, the last move if None.
+        size (default: VIEWPORT_SIZE) -- the most rows and columns to get.
+
+        Returns:
+        A tuple of the uint8 matrix, its leftmost column and how many rows from the bottom it reaches.
+        A board that fits in the size is always got whole.
+        """
+        if column is None:
+            column = self.last_column if self.last_column is not None else 0
+        width = min(size[1], self.columns)
+        left = min(max(column - width // 2, 0), self.columns - width)
+        if self.rows <= size[0]:
+            height = self.rows
+        else:
+            tallest = max(len(self.cells.get(viewport_column, b"")) for viewport_column in range(left, left + width))
+            height = min(tallest + 1, size[0])
+        matrix = np.zeros((height, width), dtype=np.uint8)
+        for viewport_column in range(left, left + width):
+            cells = self.cells.get(viewport_column, b"")[:height]
+            matrix[height - len(cells):, viewport_column - left] = np.frombuffer(bytes(cells), dtype=np.uint8)[::-1] # the matrix has the top row first.
+        return matrix, left, height
+
+    def to_array(self):
+        """Gets the whole board as a dense matrix like task2.Board.board, only meant for small boards."""
+        return self.viewport(0, (self.rows, self.columns))[0]
+
+    def __str__(self):
+        """Draws the viewport around the last move.
+
+        Returns:
+        A string that can be printed to the terminal.
+        """
+        matrix, left, height = self.viewport()
+        frame = self.renderer.render(matrix, left)
+        if matrix.shape == (self.rows, self.columns):
+            return frame
+        return f"{self.renderer.indent}Columns {left + 1} to {left + matrix.shape[1]} of {self.columns}, the lowest {height} of {self.rows} rows\n" + frame
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the sparse board, these play the same games on it and on task2.Board.
+"""
+
+import random
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+import engine
+import sparse_board
+import task2
+
+def make_players(count):
+    """Creates lightweight stand-ins for task2.Player, so no input is needed."""
+    return [SimpleNamespace(id=id, pop_out_left=2, special_disc_left=2) for id in range(1, count + 1)]
+
+class SparseBoardTestCase(unittest.TestCase):
+    """Tests for 'sparse_board.SparseBoard'."""
+
+    def test_same_as_board(self):
+        rng = random.Random(8)
+        for _ in range(60):
+            size = (rng.randint(3, 8), rng.randint(3, 9))
+            connect_size = rng.choice([3, 4])
+            obstacle_column = rng.randrange(size[1] - 1)
+            dense, sparse = task2.Board(size), sparse_board.SparseBoard(size)
+            dense.add_obstacle((2, 2), column=obstacle_column)
+            sparse.add_obstacle((2, 2), column=obstacle_column)
+            dense_players, sparse_players = make_players(3), make_players(3)
+            for turn in range(size[0] * size[1] * 2):
+                if not dense.is_empty_slot_available():
+                    break
+                self.assertTrue(sparse.is_empty_slot_available())
+                move_type, column = rng.choice("nnnnps"), rng.randrange(size[1])
+                try:
+                    dense.perform_move(dense_players[turn % 3], move_type, column)
+                except engine.IllegalMoveException as e:
+                    with self.assertRaises(engine.IllegalMoveException) as context:
+                        sparse.perform_move(sparse_players[turn % 3], move_type, column)
+                    self.assertEqual(context.exception.reason, e.reason)
+                    continue
+                sparse.perform_move(sparse_players[turn % 3], move_type, column)
+                np.testing.assert_array_equal(sparse.to_array(), dense.board)
+                if rng.random() < 0.5: # sometimes let the changes of a few moves pile up before scoring.
+                    self.assertEqual(sparse.calculate_scores(connect_size), dense.rescan_scores(connect_size))
+            self.assertFalse(sparse.is_empty_slot_available() and not dense.is_empty_slot_available())
+            self.assertEqual(sparse.calculate_scores(connect_size), sparse.calculate_scores(connect_size, incremental=False))
+
+    def test_huge_board(self):
+        board = sparse_board.SparseBoard((1000, 10000))
+        board.add_obstacle(column=5000)
+        player = make_players(1)[0]
+        for column in range(100, 110):
+            board.perform_move(player, "n", column)
+        self.assertEqual(board.calculate_scores(4), {1: 7})
+        self.assertEqual(board.filled, 16)
+        self.assertEqual(len(board.cells), 13)
+        frame = str(board)
+        self.assertIn("Columns 95 to 124 of 10000, the lowest 2 of 1000 rows", frame)
+        self.assertEqual(len(frame.split("\n")), 5) # the title, the column numbers, 2 rows and the bottom.
+        self.assertIn("95 96 97", frame.split("\n")[1]) # the numbers of the columns in view, not 1 to 30.
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
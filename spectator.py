@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+"""
+    Compact spectator feed for live and replayed games.
+
+    Instead of a whole drawn board every turn, a game is sent as one keyframe with everything in it,
+    followed by a delta per move with only what the move changed: the cells (after a drop, a PopOut or a
+    blast and the gravity after it), the scores and the PopOuts and special discs left. On the classic
+    board a delta is about 20 bytes and a keyframe under 70, where a coloured drawn frame is over 700.
+
+    Every frame is a 4 byte length followed by the body (all little endian):
+        keyframe    c   b"K"
+                    I   sequence number, the same as the delta it stands in for
+                    B   rows
+                    B   columns
+                    B   connect size
+                    B   player count
+                    B   index of the player to move
+                    players of BBBi (id, PopOuts left, special discs left, score)
+                    cells, one byte each, row 0 is the top of the board
+        delta       c   b"D"
+                    I   sequence number, one more than the frame before
+                    B   the move, packed like a record.py move byte
+                    B   index of the player to move
+                    H   changed cell count
+                    changed cells of HB (flat cell index, new value)
+                    B   changed player count
+                    players of BBBi, like the keyframe
+    A game is encoded once per move by a SpectatorEncoder, and a SpectatorHub hands the same frames to
+    every subscriber through bounded queues. A subscriber that falls behind isn't waited for: its queue is
+    emptied and it is sent a keyframe of the current position instead, so the game never blocks on it.
+
+    General Styling: https://peps.python.org/pep-0008/
+    Docstring format: https://peps.python.org/pep-0257/
+"""
+
+import struct
+import asyncio
+
+import numpy as np
+
+import engine
+import record
+
+LENGTH = struct.Struct("<I")
+KEYFRAME = struct.Struct("<cIBBBBB")
+DELTA = struct.Struct("<cIBBH")
+PLAYER = struct.Struct("<BBBi")
+CELL = np.dtype([("index", "<u2"), ("value", "u1")])
+MAX_CELLS = 1 << 16 # cell indices are 2 bytes.
+QUEUE_SIZE = 64 # frames a subscriber can fall behind by before it is sent a keyframe instead.
+
+class InvalidFrameException(Exception):
+    """Raised when a frame can't be decoded, or a delta doesn't follow the frame before it."""
+
+class SpectatorEncoder():
+    def __init__(self, state):
+        """Encodes the frames of one game.
+
+        Arguments:
+        state -- the engine.GameState the game starts from.
+
+        Raises:
+        ValueError -- if the board has too many cells for a delta to index.
+        """
+        self.state = state
+        self.board = engine.board_array(state)
+        if self.board.size > MAX_CELLS:
+            raise ValueError(f"spectator feeds only support up to {MAX_CELLS} cells")
+        self.players = self.__players(state)
+        self.sequence = 0
+
+    @staticmethod
+    def __players(state):
+        """Gets the (id, PopOuts left, special discs left, score) of every player."""
+        scores = engine.scores(state)
+        return [(player_id, state.pop_out_left[index], state.special_disc_left[index], scores[player_id]) for index, player_id in enumerate(state.player_ids)]
+
+    def keyframe(self):
+        """Encodes the current position as a whole, for a new subscriber or one that fell behind."""
+        rows, columns = self.board.shape
+        state = self.state
+        return b"".join([KEYFRAME.pack(b"K", self.sequence, rows, columns, state.connect_size, len(state.player_ids), state.turn),
+                         *(PLAYER.pack(*player) for player in self.players), self.board.tobytes()])
+
+    def delta(self, state, move):
+        """Encodes the changes from the last position to a new one.
+
+        Arguments:
+        state -- the engine.GameState after the move.
+        move -- the (move type, column) tuple that was made, (record.SKIP, 0) for a skipped turn.
+        """
+        board = engine.board_array(state)
+        changed = np.flatnonzero(board != self.board)
+        cells = np.empty(len(changed), dtype=CELL)
+        cells["index"] = changed
+        cells["value"] = board.ravel()[changed]
+        players = self.__players(state)
+        changed_players = [player for player, old in zip(players, self.players) if player != old]
+        self.state, self.board, self.players = state, board, players
+        self.sequence += 1
+        return b"".join([DELTA.pack(b"D", self.sequence, record.encode_move(move), state.turn, len(cells)), cells.tobytes(),
+                         bytes([len(changed_players)]), *(PLAYER.pack(*player) for player in changed_players)])
+
+class SpectatorDecoder():
+    def __init__(self):
+        """Rebuilds a game from its frames, nothing is known until the first keyframe."""
+        self.board = None # uint8 matrix like task2.Board.board.
+        self.players = {} # player id -> (PopOuts left, special discs left, score), in turn order.
+        self.turn = 0 # index of the player to move.
+        self.connect_size = None
+        self.sequence = None
+        self.last_move = None
+
+    def feed(self, body):
+        """Applies a frame body (without its length) to the game.
+
+        Returns:
+        "keyframe" or "delta".
+
+        Raises:
+        InvalidFrameException -- if the frame is cut short, of an unknown kind, or a delta that doesn't follow on.
+        """
+        try:
+            if body[:1] == b"K":
+                _, self.sequence, rows, columns, self.connect_size, player_count, self.turn = KEYFRAME.unpack_from(body)
+                offset = KEYFRAME.size
+                self.players = {}
+                for _ in range(player_count):
+                    player_id, *resources = PLAYER.unpack_from(body, offset)
+                    self.players[player_id] = tuple(resources)
+                    offset += PLAYER.size
+                if len(body) != offset + rows * columns:
+                    raise InvalidFrameException(f"a keyframe of a {rows}x{columns} board has {len(body) - offset} cells")
+                self.board = np.frombuffer(body, dtype=np.uint8, offset=offset).reshape(rows, columns).copy()
+                self.last_move = None
+                return "keyframe"
+            if body[:1] == b"D":
+                _, sequence, move, turn, cell_count = DELTA.unpack_from(body)
+                if self.sequence is None or sequence != self.sequence + 1:
+                    raise InvalidFrameException(f"delta {sequence} doesn't follow frame {self.sequence}, a keyframe is needed")
+                offset = DELTA.size + cell_count * CELL.itemsize
+                player_count = body[offset]
+                if len(body) != offset + 1 + player_count * PLAYER.size:
+                    raise InvalidFrameException(f"a delta of {cell_count} cells and {player_count} players is {len(body)} bytes")
+                cells = np.frombuffer(body, dtype=CELL, count=cell_count, offset=DELTA.size)
+                self.board.ravel()[cells["index"]] = cells["value"] # the board is contiguous, so ravel is a view.
+                for index in range(player_count):
+                    player_id, *resources = PLAYER.unpack_from(body, offset + 1 + index * PLAYER.size)
+                    self.players[player_id] = tuple(resources)
+                self.sequence, self.turn, self.last_move = sequence, turn, record.decode_move(move)
+                return "delta"
+        except (struct.error, ValueError, IndexError) as e:
+            raise InvalidFrameException(f"the frame is cut short ({e})")
+        raise InvalidFrameException(f"unknown frame kind {body[:1]!r}")
+
+    @property
+    def scores(self):
+        """Dictionary of player id to score."""
+        return {player_id: score for player_id, (_, _, score) in self.players.items()}
+
+def pack_frame(body):
+    """Puts the length in front of a frame body, for writing it to a stream or a file."""
+    return LENGTH.pack(len(body)) + body
+
+def unpack_frames(data):
+    """Splits a buffer of length prefixed frames into their bodies, e.g. a whole recorded feed."""
+    offset = 0
+    while offset < len(data):
+        length = LENGTH.unpack_from(data, offset)[0]
+        offset += LENGTH.size
+        if offset + length > len(data):
+            raise InvalidFrameException(f"the frame at byte {offset - LENGTH.size} is cut short")
+        yield bytes(data[offset:offset + length])
+        offset += length
+
+async def read_frames(reader):
+    """Reads length prefixed frame bodies from an asyncio stream until it ends."""
+    while True:
+        try:
+            length = LENGTH.unpack(await reader.readexactly(LENGTH.size))[0]
+            yield await reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            return
+
+class Subscriber():
+    def __init__(self, queue_size=QUEUE_SIZE):
+        """A spectator of a SpectatorHub, its frames wait in a bounded queue until they are written."""
+        self.queue = asyncio.Queue(queue_size)
+        self.resyncs = 0 # how many times it fell behind and was sent a keyframe instead.
+
+class SpectatorHub():
+    def __init__(self, state, queue_size=QUEUE_SIZE):
+        """Hands the frames of one game to any amount of subscribers, encoding every move only once.
+
+        Arguments:
+        state -- the engine.GameState the game starts from.
+
+        Keyword Arguments:
+        queue_size (default: QUEUE_SIZE) -- frames a subscriber can fall behind by, at least 2.
+        """
+        self.encoder = SpectatorEncoder(state)
+        self.queue_size = queue_size
+        self.subscribers = []
+        self.finished = False
+
+    def subscribe(self):
+        """Adds a subscriber, its first frame is a keyframe of the current position."""
+        subscriber = Subscriber(self.queue_size)
+        subscriber.queue.put_nowait(self.encoder.keyframe())
+        if self.finished:
+            subscriber.queue.put_nowait(None) # the game is over, so the final position is all there is to see.
+        else:
+            self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+
+    def __offer(self, subscriber, frame):
+        """Queues a frame without waiting, a subscriber that is too far behind starts again from a keyframe."""
+        try:
+            subscriber.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(self.encoder.keyframe()) # the keyframe already has the frame that didn't fit in it.
+            subscriber.resyncs += 1
+            if frame is None:
+                subscriber.queue.put_nowait(None)
+
+    def publish(self, state, move):
+        """Encodes a move and queues it for every subscriber.
+
+        Returns:
+        The frame body, e.g. to also write it to a file.
+        """
+        frame = self.encoder.delta(state, move)
+        for subscriber in self.subscribers:
+            self.__offer(subscriber, frame)
+        return frame
+
+    def finish(self):
+        """Ends the feed, every subscriber gets None after its last frame."""
+        self.finished = True
+        for subscriber in self.subscribers:
+            self.__offer(subscriber, None)
+        self.subscribers = []
+
+async def pump(subscriber, writer):
+    """Writes the frames of a subscriber to an asyncio stream until the feed ends or the stream is closed.
+    Waiting for drain is what lets a slow stream fall behind, which the hub then handles with a keyframe.
+    """
+    try:
+        while (frame := await subscriber.queue.get()) is not None:
+            writer.write(pack_frame(frame))
+            await writer.drain()
+    except ConnectionError:
+        pass
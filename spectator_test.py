@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+    Unit tests for the spectator feed.
+"""
+
+import random
+import asyncio
+import unittest
+
+import numpy as np
+
+import engine
+import record
+import replay
+import simulate
+import spectator
+
+def random_game(seed, players=2):
+    """Plays a random game, yielding every state after the first and the move that led to it."""
+    rng = random.Random(seed)
+    state = engine.new_game((6, 7), range(1, players + 1), 4, (2, 3), rng=rng)
+    yield state, None
+    while not engine.is_terminal(state):
+        move = rng.choice(engine.legal_moves(state)) if rng.random() > 0.05 else (record.SKIP, 0)
+        state = engine.skip_turn(state) if move[0] == record.SKIP else engine.apply(state, move)
+        yield state, move
+
+class SpectatorFeedTestCase(unittest.TestCase):
+    """Tests for 'spectator.SpectatorEncoder' and 'spectator.SpectatorDecoder'."""
+
+    def assertDecoded(self, decoder, state):
+        np.testing.assert_array_equal(decoder.board, engine.board_array(state))
+        self.assertEqual(decoder.scores, engine.scores(state))
+        self.assertEqual(decoder.turn, state.turn)
+        self.assertEqual([resources[:2] for resources in decoder.players.values()], list(zip(state.pop_out_left, state.special_disc_left)))
+
+    def test_decoder_rebuilds_every_position(self):
+        for seed in range(20):
+            game = random_game(seed, players=2 + seed % 2)
+            state, _ = next(game)
+            encoder, decoder = spectator.SpectatorEncoder(state), spectator.SpectatorDecoder()
+            self.assertEqual(decoder.feed(encoder.keyframe()), "keyframe")
+            self.assertDecoded(decoder, state)
+            for state, move in game:
+                frame = encoder.delta(state, move)
+                self.assertEqual(decoder.feed(frame), "delta")
+                self.assertEqual(decoder.last_move, move)
+                self.assertDecoded(decoder, state)
+                if move[0] == "n":
+                    self.assertLessEqual(len(frame), spectator.DELTA.size + spectator.CELL.itemsize + 1 + spectator.PLAYER.size * 2)
+
+    def test_deltas_have_to_follow_on(self):
+        game = random_game(1)
+        encoder, decoder = spectator.SpectatorEncoder(next(game)[0]), spectator.SpectatorDecoder()
+        first = encoder.delta(*next(game))
+        with self.assertRaises(spectator.InvalidFrameException):
+            decoder.feed(first) # nothing to apply it to yet.
+        decoder.feed(encoder.keyframe())
+        encoder.delta(*next(game))
+        with self.assertRaises(spectator.InvalidFrameException):
+            decoder.feed(encoder.delta(*next(game))) # one was missed.
+        keyframe = encoder.keyframe()
+        with self.assertRaises(spectator.InvalidFrameException):
+            decoder.feed(keyframe[:-1])
+        with self.assertRaises(spectator.InvalidFrameException):
+            decoder.feed(b"X" + keyframe[1:])
+
+    def test_replayed_feed(self):
+        config = {"board_size": (6, 7), "obstacle_size": (2, 3), "connect_size": 4, "players": 2}
+        game = simulate.play_game(config, 5)
+        header = record.unpack_header(game["record"], 0)[0]
+        moves = game["record"][record.HEADER.size:]
+        decoder = spectator.SpectatorDecoder()
+        frames = list(spectator.unpack_frames(replay.spectator_feed(header, moves)))
+        self.assertEqual(len(frames), len(moves) + 1)
+        for frame in frames:
+            decoder.feed(frame)
+        self.assertDecoded(decoder, replay.replay_engine(header, moves))
+
+class SpectatorHubTestCase(unittest.IsolatedAsyncioTestCase):
+    """Tests for 'spectator.SpectatorHub'."""
+
+    async def test_slow_subscribers_are_sent_a_keyframe(self):
+        game = random_game(2)
+        hub = spectator.SpectatorHub(next(game)[0], queue_size=4)
+        fast, slow = hub.subscribe(), hub.subscribe()
+        fast_decoder, slow_decoder = spectator.SpectatorDecoder(), spectator.SpectatorDecoder()
+        for state, move in game:
+            hub.publish(state, move)
+            while not fast.queue.empty(): # the fast subscriber keeps up, the slow one never reads.
+                fast_decoder.feed(fast.queue.get_nowait())
+        hub.finish()
+        frames = []
+        while (frame := await slow.queue.get()) is not None:
+            frames.append(frame)
+        for frame in frames:
+            slow_decoder.feed(frame)
+        self.assertGreater(slow.resyncs, 0)
+        self.assertEqual(fast.resyncs, 0)
+        self.assertIsNone(await fast.queue.get())
+        np.testing.assert_array_equal(slow_decoder.board, fast_decoder.board)
+        np.testing.assert_array_equal(slow_decoder.board, engine.board_array(state))
+        self.assertEqual(slow_decoder.scores, engine.scores(state))
+
+    async def test_pump_writes_frames(self):
+        game = random_game(3)
+        hub = spectator.SpectatorHub(next(game)[0])
+        received = []
+
+        async def watch(reader, writer):
+            await spectator.pump(hub.subscribe(), writer)
+            writer.close()
+
+        tcp_server = await asyncio.start_server(watch, "127.0.0.1", 0)
+        reader, writer = await asyncio.open_connection("127.0.0.1", tcp_server.sockets[0].getsockname()[1])
+        await asyncio.sleep(0.05) # let the server subscribe before the game starts.
+        for state, move in game:
+            hub.publish(state, move)
+        hub.finish()
+        decoder = spectator.SpectatorDecoder()
+        async for frame in spectator.read_frames(reader):
+            received.append(decoder.feed(frame))
+        writer.close()
+        tcp_server.close()
+        await tcp_server.wait_closed()
+        self.assertEqual(received[0], "keyframe")
+        np.testing.assert_array_equal(decoder.board, engine.board_array(state))
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.
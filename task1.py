@@ -10,14 +10,39 @@
 __author__ = "Emmet Noman"
 __email__ = "27587991@students.lincoln.ac.uk"
 
-from typing import List, Tuple # Type annotations for easier readability.
+from typing import Iterable, List, Tuple # Type annotations for easier readability.
 # The criteria said builtin imports that aren't used to perform calculations are permitted.
 # These can be removed without affecting any of the logic
 
+import re # only used to split the input into numbers.
+import sys # only used to read the command line and stdin for the streaming mode.
+
+import decimal # only for the mean of numbers too big for a float.
+
+try:
+    import numpy as np # optional, large inputs are a lot faster with it, everything works without it.
+except ModuleNotFoundError:
+    np = None
+
+import primes # sieve backed prime index, this is what actually answers is_prime.
+
+PRIME_TIME_BUDGET = 2 # seconds the primality test of a single huge number may take before it is reported as undecided.
+PRIME_WORKERS = None # processes to test long lists of huge numbers with, None for one per core.
+
+ARRAY_CHARACTERS = b"0123456789+- \t\n\r\f\v" # the only characters parse_number_array handles itself.
+SEPARATORS = b" \t\n\r\f\v," # any mix of whitespace and commas seperates the numbers.
+COMMAS_TO_SPACES = bytes.maketrans(b",", b" ")
+# every run of characters between seperators, the number group only matches when all of it is a whole number.
+TOKEN_PATTERN = re.compile(rb"(?P<number>[+-]?[0-9]++(?=[\s,]|\Z))|[^\s,]+")
+WORD_PATTERN = re.compile(rb"[^\s,]+")
+INT64_LIMITS = (-2 ** 63, 2 ** 63 - 1) # NumPy saturates to these on overflow, so they could be a bigger number.
+
 class UnexpctedInputException(Exception):
     """Raised when input sanitization fails"""
-    def __init__(self, invalid_input):
-        super().__init__(f"\"{invalid_input}\" is not a valid input!")
+    def __init__(self, invalid_input, offset=None):
+        self.invalid_input = invalid_input
+        self.offset = offset # byte offset of the invalid input, None if it is all of the input.
+        super().__init__(f"\"{invalid_input}\"{f' at byte {offset}' if offset is not None else ''} is not a valid input!")
 
 def is_int(number):
     """Checks if the provided input is an integer"""
@@ -26,27 +51,22 @@ def is_int(number):
     return number.isdigit()
 
 def is_prime(number):
-    """Does a primality test on the provided input."""
-    if number <= 1: 
-        return False # only natural numbers can be prime.
-    if number % 2 == 0:
-        return number == 2 # 2 is a prime, any other number divisible by 2 is not.
-    for i in range(3, 1 + int(number**(1/2)), 2): # Loop over every possible divident for the given number in steps of 2
-        if number % i == 0: # if the number divides cleanly for a single number, it is not a prime!
-            return False
-    return True # if the program didn't return during the for loop, it must be a prime.
-
-def calculate_statistics(numbers: List[int]) -> Tuple[int, float, int, int]:
+    """Does a primality test on the provided input.
+    Small numbers are looked up in a sieve that grows when needed, big ones get a Miller-Rabin test, see the primes module.
+    """
+    return primes.is_prime(number)
+
+def calculate_statistics(numbers: Iterable[int]) -> Tuple[int, float, int, int]:
     """Determines and returns the sum, mean and minimum and maximum of a provided list.
     
     Arguments:
-    numbers -- List of integers
+    numbers -- List of integers, or any iterable of them e.g. tokenize_numbers, it is only looped over once.
 
     returns:
     A tuple containing the sum, mean, minimum & maximum respectively
     """
-    sum_of_numbers, min_of_numbers, max_of_numbers = 0, None, None # declare variables to store changing values
-    for number in numbers:
+    sum_of_numbers, min_of_numbers, max_of_numbers, count = 0, None, None, 0 # declare variables to store changing values
+    for count, number in enumerate(numbers, 1): # counted as we go, so the numbers can come from a generator.
         if min_of_numbers == None or number < min_of_numbers:
             min_of_numbers = number # update minimum variable
         if max_of_numbers == None or number > max_of_numbers:
@@ -54,11 +74,19 @@ def calculate_statistics(numbers: List[int]) -> Tuple[int, float, int, int]:
 
         sum_of_numbers += number # add the current iteration's value to the sum variable
     
-    mean_of_numbers = sum_of_numbers / len(numbers) # calculate the mean from the sum we computed earlier
+    mean_of_numbers = mean(sum_of_numbers, count) # calculate the mean from the sum we computed earlier
 
     return sum_of_numbers, mean_of_numbers, min_of_numbers, max_of_numbers # return a tuple of 3 ints and 1 float
 
 
+def mean(sum_of_numbers, count):
+    """Divides the sum by the count, as a Decimal when the mean of huge numbers doesn't fit in a float."""
+    try:
+        return sum_of_numbers / count
+    except OverflowError:
+        digits = len(str(abs(sum_of_numbers)))
+        return decimal.Context(prec=digits + 3).divide(decimal.Decimal(sum_of_numbers), count) # enough precision for every digit and the decimals.
+
 def find_prime_numbers(list_of_numbers):
     """A function to find the prime numbers in a list
 
@@ -68,55 +96,332 @@ def find_prime_numbers(list_of_numbers):
     Returns:
     A list containing the prime numbers which were in the input.
     """
-    return sorted(list(filter(lambda number: is_prime(number), list_of_numbers)))
+    return split_prime_numbers(list_of_numbers)[0]
+
+def split_prime_numbers(list_of_numbers):
+    """Finds the prime numbers in a list, and the numbers too big to test in PRIME_TIME_BUDGET.
+
+    Arguments:
+    list_of_numbers -- A list of validated integers provided by the user
+
+    Returns:
+    A tuple of a sorted list of the prime numbers in the input and a sorted list of the distinct undecided numbers.
+    """
+    # the sieve grows once for the whole list, and long lists of huge numbers are spread over every core.
+    results = primes.classify(list_of_numbers, PRIME_TIME_BUDGET, PRIME_WORKERS)
+    prime_numbers = sorted(number for number, prime in zip(list_of_numbers, results) if prime)
+    undecided = sorted(set(number for number, prime in zip(list_of_numbers, results) if prime is None))
+    return prime_numbers, undecided
 
 def validate_user_number_input(user_input) -> List[int] | str:
     """Validates and parses the text input given by the user.
 
     Arguments:
-    user_input -- An input from the user.
+    user_input -- An input from the user as a str or bytes, numbers are seperated by any mix of whitespace and commas.
     
     Returns:
     A list of integers or a string describing an unexpected input
 
     Raises:
-    UnexpctedInputException -- If the given list of inputs are invalid.
+    UnexpctedInputException -- If the given list of inputs are invalid, with the byte offset of the first invalid number.
+    """
+
+    data = user_input.encode() if isinstance(user_input, str) else user_input
+    number_list = None
+    if b"_" not in data: # int reads "1_000" as a number, so only the tokenizer can check those.
+        try:
+            number_list = list(map(int, WORD_PATTERN.findall(data))) # int checks and converts the bytes of a whole number in one go.
+        except ValueError:
+            pass # tokenize_numbers finds which word isn't a number, and where.
+    if number_list is None:
+        number_list = list(tokenize_numbers(data)) # validates and converts every number in the same pass.
+    if not number_list:
+        raise UnexpctedInputException(user_input) # there has to be at least one number to get the statistics of.
+    return number_list
+
+def tokenize_numbers(data, offset=0):
+    """Parses whole numbers seperated by any mix of whitespace and commas, one at a time in a single pass.
+
+    Arguments:
+    data -- A str, or anything bytes-like e.g. bytes, a bytearray or a memoryview, which is read without copying it.
+
+    Keyword Arguments:
+    offset (default: 0) -- The byte offset of data in the whole input, for the error.
+
+    Returns:
+    A generator of the integers, in the order they are in the data.
+
+    Raises:
+    UnexpctedInputException -- For the first thing that isn't a whole number, with its byte offset.
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    for match in TOKEN_PATTERN.finditer(data):
+        if match.lastgroup is None: # only the catch-all matched, so this is not a number.
+            raise UnexpctedInputException(match.group().decode(errors="replace"), offset + match.start())
+        yield int(match.group()) # int reads the bytes of the number directly.
+
+def parse_number_array(user_input):
+    """Parses whole numbers seperated by whitespace or commas into an int64 array, the fast path of validate_user_number_input.
+
+    Arguments:
+    user_input -- The text to parse as a str or anything bytes-like, commas seperate numbers like in validate_user_number_input.
+
+    Returns:
+    An int64 numpy array, or None if NumPy isn't installed, the input has nothing in it, or anything in it
+    needs validate_user_number_input, like an invalid number or one that doesn't fit in 64 bits.
+    """
+    if np is None:
+        return None
+    encoded = user_input.encode() if isinstance(user_input, str) else bytes(user_input)
+    if b"," in encoded:
+        encoded = encoded.translate(COMMAS_TO_SPACES)
+    if not encoded.strip():
+        return None # NumPy reads nothing but whitespace as a 0.
+    if encoded.translate(None, ARRAY_CHARACTERS):
+        return None # a character that can't be in a number, validate_user_number_input will say what is wrong with it.
+    # NumPy reads "- 5" as -5 and "1-2" as two numbers, so every sign has to be between whitespace and a digit.
+    characters = np.frombuffer(encoded, dtype=np.uint8)
+    signs = np.flatnonzero((characters == ord("+")) | (characters == ord("-")))
+    if signs.size:
+        if signs[-1] + 1 == characters.size:
+            return None
+        after, before = characters[signs + 1], characters[signs[signs > 0] - 1]
+        if not np.all((after >= ord("0")) & (after <= ord("9"))) or np.any((before >= ord("+")) & (before <= ord("9"))):
+            return None # only digits, signs and whitespace are left, and in ascii the signs and digits are all between "+" and "9".
+    try:
+        numbers = np.fromstring(encoded, dtype=np.int64, sep=" ") # a space seperator matches any amount of any whitespace.
+    except ValueError:
+        return None
+    if not numbers.size or numbers.min() == INT64_LIMITS[0] or numbers.max() == INT64_LIMITS[1]:
+        return None
+    return numbers
+
+def calculate_statistics_array(numbers) -> Tuple[int, float, int, int]:
+    """The same as calculate_statistics for an int64 array, with NumPy reductions.
+
+    Arguments:
+    numbers -- int64 numpy array with at least one number.
+
+    returns:
+    A tuple containing the sum, mean, minimum & maximum respectively, as python numbers.
+    """
+    min_of_numbers, max_of_numbers = int(numbers.min()), int(numbers.max())
+    # summing in int64 can overflow, so sum chunks that can't overflow and add those up as python ints.
+    largest = max(abs(min_of_numbers), abs(max_of_numbers), 1)
+    chunk_size = max(INT64_LIMITS[1] // largest, 1)
+    sum_of_numbers = sum(int(numbers[start:start + chunk_size].sum()) for start in range(0, numbers.size, chunk_size))
+    return sum_of_numbers, sum_of_numbers / numbers.size, min_of_numbers, max_of_numbers
+
+def find_prime_numbers_array(numbers):
+    """The same as find_prime_numbers for an int64 array, testing all of it at once with the sieve of the primes module.
+
+    Arguments:
+    numbers -- int64 numpy array.
+
+    Returns:
+    A sorted int64 array containing the prime numbers which were in the input.
+    """
+    return split_prime_numbers_array(numbers)[0]
+
+def split_prime_numbers_array(numbers):
+    """The same as split_prime_numbers for an int64 array.
+
+    Returns:
+    A tuple of a sorted int64 array of the prime numbers in the input and a sorted list of the distinct undecided numbers.
     """
+    index = primes.default_index
+    in_range = numbers[numbers < index.max_limit]
+    if in_range.size and in_range.max() >= index.limit:
+        index.grow(int(in_range.max()))
+    sieve = sieve_mask(index)
+    found = np.zeros(numbers.shape, dtype=bool)
+    small = (numbers >= 0) & (numbers < index.limit)
+    candidates = numbers[small]
+    # the sieve only has odd numbers, the odd number n is at n // 2.
+    found[small] = (candidates == 2) | ((candidates & 1) == 1) & sieve[candidates >> 1]
+    large = numbers >= index.limit # only past the largest sieve, these get a probable prime test one by one.
+    results = primes.classify(numbers[large].tolist(), PRIME_TIME_BUDGET, PRIME_WORKERS)
+    found[large] = [prime is True for prime in results]
+    undecided = sorted(set(number for number, prime in zip(numbers[large].tolist(), results) if prime is None))
+    return np.sort(numbers[found]), undecided
 
-    number_list = user_input.replace(',', '').split(" ") # seperate user input into an array and remove any commas
-    for number_candidate in number_list:    
-        if not is_int(number_candidate): # Check if the number is an integer, e.g. 1, 2, 3 and does not contain anything but digits / minus.
-            raise UnexpctedInputException(number_candidate) # oops, the user has input an invalid number, we should raise an error!
-    else:
-        return [int(number) for number in number_list] # if we passed all checks, cast every element of the array into an integer and return the newly generated array
+_sieve_mask = (0, None) # the limit of the index when the mask was made and the mask.
+
+def sieve_mask(index):
+    """Gets the sieve of a primes.PrimeIndex as a boolean array, only copying it again when the index has grown."""
+    global _sieve_mask
+    if _sieve_mask[0] != index.limit:
+        _sieve_mask = (index.limit, np.frombuffer(index.sieve(), dtype=np.uint8).astype(bool))
+    return _sieve_mask[1]
+
+class RunningStatistics():
+    def __init__(self):
+        """Keeps the statistics of a stream of integers without keeping the integers themselves, only the distinct primes."""
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+        self.primes = set()
+        self.undecided = set() # numbers that took longer than PRIME_TIME_BUDGET to test.
+
+    def add(self, numbers):
+        """Adds a batch of validated integers to the statistics.
+
+        Arguments:
+        numbers -- A list of integers or an int64 numpy array, it isn't kept after this returns.
+        """
+        if not len(numbers):
+            return
+        self.count += len(numbers)
+        if np is not None and isinstance(numbers, np.ndarray):
+            batch_sum, _, lowest, highest = calculate_statistics_array(numbers)
+            self.sum += batch_sum
+            prime_numbers, undecided = split_prime_numbers_array(numbers)
+            self.primes.update(prime_numbers.tolist())
+        else:
+            self.sum += sum(numbers)
+            lowest, highest = min(numbers), max(numbers) # builtins over the whole batch instead of comparing one number at a time.
+            prime_numbers, undecided = split_prime_numbers(numbers)
+            self.primes.update(prime_numbers)
+        self.undecided.update(undecided)
+        if self.min is None or lowest < self.min:
+            self.min = lowest
+        if self.max is None or highest > self.max:
+            self.max = highest
+
+    def statistics(self) -> Tuple[int, float, int, int]:
+        """Gets the same tuple as calculate_statistics: the sum, mean, minimum & maximum respectively."""
+        return self.sum, mean(self.sum, self.count), self.min, self.max
+
+def read_numbers(file, chunk_size=1 << 20):
+    """Reads the integers of a file a chunk at a time, numbers are seperated by whitespace and commas like in validate_user_number_input.
+
+    Arguments:
+    file -- A file object, e.g. sys.stdin. The bytes under a text file are read directly, so they are never decoded.
+
+    Keyword Arguments:
+    chunk_size (default: 1 << 20) -- How many bytes to read at once.
+
+    Returns:
+    A generator of lists of integers or int64 numpy arrays (see parse_number_array), one per chunk.
+
+    Raises:
+    UnexpctedInputException -- If something in the file is not an integer, with its byte offset in the file.
+    """
+    file = getattr(file, "buffer", file) # e.g. io.StringIO has no bytes under it, its chunks are encoded instead.
+    buffer = bytearray() # the chunk, after a number that was cut in half by the end of the last one.
+    offset = 0 # bytes of the file before the buffer.
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        buffer += chunk.encode() if isinstance(chunk, str) else chunk
+        # if the chunk doesn't end in a seperator, its last word might continue in the next chunk.
+        cut = max(buffer.rfind(separator) for separator in SEPARATORS) + 1
+        if not cut:
+            continue # one long word so far, keep reading until it ends.
+        with memoryview(buffer) as view: # the words are parsed straight from the buffer, without copying it.
+            numbers = parse_words(view[:cut], offset)
+        yield numbers
+        del buffer[:cut] # only after the view is released, a bytearray can't be resized while it is viewed.
+        offset += cut
+    if buffer:
+        yield parse_words(buffer, offset)
+
+def parse_words(data, offset=0):
+    """Parses whole numbers seperated by any whitespace or commas, trying parse_number_array before tokenize_numbers.
+
+    Arguments:
+    data -- A str, or anything bytes-like.
+
+    Keyword Arguments:
+    offset (default: 0) -- The byte offset of data in the whole input, for the error.
+
+    Returns:
+    An int64 numpy array or a list of integers.
+
+    Raises:
+    UnexpctedInputException -- If something is not an integer.
+    """
+    numbers = parse_number_array(data)
+    return numbers if numbers is not None else list(tokenize_numbers(data, offset))
+
+def print_report(count, number_stats, prime_numbers, undecided=()):
+    """Prints the statistics of the given numbers.
+
+    Arguments:
+    count -- The amount of numbers.
+    number_stats -- The tuple from calculate_statistics.
+    prime_numbers -- The sorted distinct prime numbers.
+
+    Keyword Arguments:
+    undecided (default: ()) -- The sorted distinct numbers that couldn't be tested in PRIME_TIME_BUDGET, only shown if there are any.
+    """
+    print(f"You inputted {count} whole number(s)") # count the number of inputs
+    primes_text = ", ".join([str(number) for number in prime_numbers]) # filter the list
+    undecided_text = f"\n          Undecided (too big to test in {PRIME_TIME_BUDGET}s): [{', '.join(str(number) for number in undecided)}]" if undecided else ""
+
+    print(f"""Statistics of the given whole number(s):
+          
+          Sum: {number_stats[0]}
+          Mean: {number_stats[1]:.2f}
+          Min: {number_stats[2]}
+          Max: {number_stats[3]}
+          Primes: [{primes_text}]{undecided_text}
+          """) # multi-line text to display the result in a clean manner.
 
 def main():
     number_list = []
+    number_array = None
     print("Enter whole numbers seperated by spaces below, e.g. (42 +1 -10 292 0)") # print the instructions for the input
     while True: # keep going until broken out of after getting a valid input
         try:
-            number_list = validate_user_number_input(input(": ")) # validate user input and store it in the function's scope
+            user_input = input(": ")
+            number_array = parse_number_array(user_input) # the fast path, None if the input needs to be validated the slow way.
+            if number_array is None:
+                number_list = validate_user_number_input(user_input) # validate user input and store it in the function's scope
             break # if the validation succeeds, break out of the loop
         except UnexpctedInputException as e: # catch only the custom error defintion
             print(e) # tell the user the error
 
-    print(f"You inputted {len(number_list)} whole number(s)") # count the number of inputs
-    # we know for a fact that they are all integers, since we did the input sanitization.
+    if number_array is not None:
+        prime_numbers, undecided = split_prime_numbers_array(number_array)
+        print_report(len(number_array), calculate_statistics_array(number_array), np.unique(prime_numbers).tolist(), undecided)
+        return
 
+    # we know for a fact that they are all integers, since we did the input sanitization.
     number_stats = calculate_statistics(number_list) # get the statistics of the number list
-    prime_numbers = sorted(set(find_prime_numbers(number_list)))
+    prime_numbers, undecided = split_prime_numbers(number_list)
+    print_report(len(number_list), number_stats, sorted(set(prime_numbers)), undecided)
 
-    primes = ", ".join([str(number) for number in prime_numbers]) # filter the list
+def stream_main(path):
+    """Prints the same report as main for every integer in a file, in one pass and without holding them all in memory.
 
-    print(f"""Statistics of the given whole number(s):
-          
-          Sum: {number_stats[0]}
-          Mean: {number_stats[1]:.2f}
-          Min: {number_stats[2]}
-          Max: {number_stats[3]}
-          Primes: [{primes}]
-          """) # multi-line text to display the result in a clean manner.
+    Arguments:
+    path -- The file to read, "-" reads stdin.
 
+    Returns:
+    The exit code, 1 if the file had no numbers or something that isn't a number.
+    """
+    running = RunningStatistics()
+    file = sys.stdin if path == "-" else open(path)
+    try:
+        for numbers in read_numbers(file):
+            running.add(numbers)
+    except UnexpctedInputException as e:
+        print(e)
+        return 1
+    finally:
+        if file is not sys.stdin:
+            file.close()
+    if not running.count:
+        print("There were no whole numbers in the input.")
+        return 1
+    print_report(running.count, running.statistics(), sorted(running.primes), sorted(running.undecided))
+    return 0
 
 if __name__ == "__main__": # make sure file is not being ran as a module
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1: # python task1.py <file or - for stdin> streams the numbers instead of asking for them.
+        sys.exit(stream_main(sys.argv[1]))
+    main()
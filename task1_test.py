@@ -4,6 +4,8 @@
     This does not need to be marked. These are my unit tests for task1, completely independent of the actual script.
 """
 
+import io
+import random
 import unittest
 import task1
 
@@ -19,6 +21,102 @@ class PrimeNumberTestCase(unittest.TestCase):
         non_prime_numbers = [4, 6, 8, 10, 12, 14, 16, 18, 20, 22, 24]
         for number in non_prime_numbers:
             self.assertFalse(task1.is_prime(number), f"'{number}' is falsely considered a prime number.")
-            
+
+    def test_large_numbers(self):
+        self.assertTrue(task1.is_prime(1000000007))
+        self.assertFalse(task1.is_prime(1000000007 * 998244353))
+
+class FindPrimeNumbersTestCase(unittest.TestCase):
+    """Tests for the 'find_prime_numbers' function."""
+
+    def test_sorted_primes(self):
+        self.assertEqual(task1.find_prime_numbers([42, 1, -10, 31, 292, 0, 2, 31]), [2, 31, 31])
+
+    def test_undecided_numbers(self):
+        budget, task1.PRIME_TIME_BUDGET = task1.PRIME_TIME_BUDGET, 0
+        try:
+            self.assertEqual(task1.split_prime_numbers([7, 2 ** 9689 - 1, 2 ** 9689 - 1, 9]), ([7], [2 ** 9689 - 1]))
+        finally:
+            task1.PRIME_TIME_BUDGET = budget
+
+    def test_mean_of_huge_numbers(self):
+        self.assertEqual(f"{task1.calculate_statistics([10 ** 400, 10 ** 400 + 1])[1]:.2f}", "1" + "0" * 399 + "0.50")
+
+class StreamingTestCase(unittest.TestCase):
+    """Tests for 'read_numbers' and 'RunningStatistics'."""
+
+    def test_same_statistics_as_a_list(self):
+        rng = random.Random(2)
+        numbers = [rng.randint(-10 ** 6, 10 ** 6) for _ in range(3000)]
+        separators = [" ", ",", ", ", "\t", "\n", "  ", " ,\r\n"]
+        text = "".join(f"{f'+{number}' if number > 0 and number % 3 else number}{rng.choice(separators)}" for number in numbers)
+        running = task1.RunningStatistics()
+        for chunk in task1.read_numbers(io.StringIO(text), chunk_size=7): # small chunks cut plenty of numbers in half.
+            running.add(chunk)
+        self.assertEqual(running.count, len(numbers))
+        self.assertEqual(running.statistics(), task1.calculate_statistics(numbers))
+        self.assertEqual(sorted(running.primes), sorted(set(task1.find_prime_numbers(numbers))))
+
+    def test_invalid_number(self):
+        with self.assertRaises(task1.UnexpctedInputException):
+            list(task1.read_numbers(io.StringIO("1 2\n3 4x"), chunk_size=3))
+
+    def test_reads_binary_files(self):
+        numbers = [number * 7919 - 10 ** 5 for number in range(500)] + [2 ** 70]
+        file = io.BytesIO("\n".join(map(str, numbers)).encode())
+        self.assertEqual([number for chunk in task1.read_numbers(file, chunk_size=5) for number in chunk], numbers)
+
+    def test_byte_offset_of_invalid_number(self):
+        with self.assertRaises(task1.UnexpctedInputException) as context:
+            list(task1.read_numbers(io.BytesIO(b"10 20\n30 4x0 50"), chunk_size=4))
+        self.assertEqual((context.exception.invalid_input, context.exception.offset), ("4x0", 9))
+
+@unittest.skipIf(task1.np is None, "NumPy is not installed")
+class ArrayPathTestCase(unittest.TestCase):
+    """Tests that the NumPy path gives the same results as the list path."""
+
+    def test_same_results(self):
+        rng = random.Random(4)
+        for magnitude in (10, 10 ** 4, 10 ** 9, 2 ** 62):
+            numbers = [rng.randint(-magnitude, magnitude) for _ in range(2000)]
+            text = " ".join(f"+{number}" if number > 0 and number % 2 else str(number) for number in numbers)
+            number_array = task1.parse_number_array(text)
+            self.assertEqual(number_array.tolist(), task1.validate_user_number_input(text))
+            self.assertEqual(task1.calculate_statistics_array(number_array), task1.calculate_statistics(numbers))
+            self.assertEqual(task1.find_prime_numbers_array(number_array).tolist(), task1.find_prime_numbers(numbers))
+
+    def test_falls_back(self):
+        for text in ("1 2 x", "1-2", "- 5", "5 +", "1.5", "", "   ", "99999999999999999999 1", "-9223372036854775808"):
+            self.assertIsNone(task1.parse_number_array(text), text)
+        self.assertEqual(task1.parse_number_array("1,2\t-2\n +3,,4").tolist(), [1, 2, -2, 3, 4])
+        self.assertEqual(task1.parse_number_array(memoryview(b"7, 8")).tolist(), [7, 8])
+
+class TokenizerTestCase(unittest.TestCase):
+    """Tests for 'tokenize_numbers' and 'validate_user_number_input'."""
+
+    def test_any_separators(self):
+        for text in ("42 +1 -10", "42  +1   -10", "42\t+1\n-10\n", "42,+1,-10", " 42, +1 ,,\r\n-10 "):
+            self.assertEqual(task1.validate_user_number_input(text), [42, 1, -10], repr(text))
+
+    def test_bytes_like_input(self):
+        for data in (b"1 2 3", bytearray(b"1 2 3"), memoryview(b"0 1 2 3 4")[2:-2]):
+            self.assertEqual(list(task1.tokenize_numbers(data)), [1, 2, 3])
+
+    def test_invalid_tokens(self):
+        for text, token, offset in (("1 2x 3", "2x", 2), ("1 - 2", "-", 2), ("5 1-2", "1-2", 2), ("é 1", "é", 0), ("12 1.5", "1.5", 3)):
+            with self.assertRaises(task1.UnexpctedInputException) as context:
+                task1.validate_user_number_input(text)
+            self.assertEqual((context.exception.invalid_input, context.exception.offset), (token, offset), text)
+        for text in ("", "  ", ",\n"):
+            with self.assertRaises(task1.UnexpctedInputException):
+                task1.validate_user_number_input(text)
+
+    def test_lazy(self):
+        numbers = task1.tokenize_numbers("1 2 3 x")
+        self.assertEqual([next(numbers), next(numbers), next(numbers)], [1, 2, 3]) # nothing past the third number is read yet.
+        with self.assertRaises(task1.UnexpctedInputException):
+            next(numbers)
+        self.assertEqual(task1.calculate_statistics(task1.tokenize_numbers("4 -2 10")), task1.calculate_statistics([4, -2, 10]))
+
 if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
     unittest.main() # Run all tests.
\ No newline at end of file
@@ -16,6 +16,7 @@
 __author__ = "Emmet Noman"
 __email__ = "27587991@students.lincoln.ac.uk"
 
+import os
 import sys
 import time
 import random
@@ -27,54 +28,82 @@ except ModuleNotFoundError:
     print("colour.py was not found in the same folder. please make sure you have both required files.")
     sys.exit()
 
+import ai # computer players
+import book # solved positions for the computer players
+import engine # the rules of the game, without any input or output
+import instrumentation # timing the game, only when it is turned on
+import mcts # monte carlo tree search computer players
+import record # binary game records
+import renderer # drawing the board
+import scoring # the scoring windows of a board shape
+import spectator # compact feed of the game for watching it somewhere else
+
 # Game rules
-BOARD_SIZE = (6, 7) # x, y # Can support infinite length boards, although it can get hard to count columns past 10
+BOARD_SIZE = (6, 7) # x, y # Can support infinite length boards, although it can get hard to count columns past 10. sparse_board.SparseBoard is for the really big ones.
 OBSTACLE_SIZE = (2, 3) # x, y 
 CONNECT_SIZE = 4 # the amount of cells in a row required to score a point.
 MOVE_TIME_LIMIT = 5 # seconds of inactivity till move is lost
+GAME_SEED = None # seed for the obstacle and the background of a game, so it can be played again exactly. None to draw a new one every game, which is still recorded.
+RECORD_FILE = None # file every finished game is appended to, e.g. "games.c4r", replay.py can read it back. None to turn it off.
+BOOK_FILE = "book.c4b" # positions solved ahead of time by book.py, the computer players use it if it exists.
+METRICS_FILE = None # JSON lines file that the timings and counters are appended to after every turn. None to turn it off.
+PROMETHEUS_FILE = None # file the timings and counters are written to as Prometheus text when the game ends. None to turn it off.
+SPECTATOR_FILE = None # file the spectator feed of every game is appended to, see spectator.py. None to turn it off.
+PLAYER_COUNT = 2 # players in a game, any amount up to MAX_PLAYERS works. Past the first few they get colours from colours.PLAYER_PALETTE.
 
 # Since we aren't allowed to import enum, we have to use constants to store enum values
 # Cell types
 EMPTY = 0
 # ... any amount of player ids can go between 0 and 255 e.g. player 42, 21
 OBSTACLE = 255 # unsigned 8 bit max int
+MAX_PLAYERS = OBSTACLE - 1 # every id between EMPTY and OBSTACLE.
+
 
 class RanOutOfTimeException(Exception):
     def __init__(self):
         super().__init__(colours.yellow("You took too long") + ", the move has been transferred to the next player.")
 
 
-class IllegalMoveException(Exception):
+class IllegalMoveException(engine.IllegalMoveException):
     def __init__(self, reason=None):
         """Tells the user they move was illegal and provide a reason if given.
         
         Keyword Arguemnts:
         reason (default: None) -- The reason their move is illegal.
         """
-        super().__init__(colours.yellow(f"That move is not possible{f' because {reason}' if reason else ''}, try again."))
+        super().__init__(reason, colours.yellow(f"That move is not possible{f' because {reason}' if reason else ''}, try again."))
 
 class InvalidInputException(Exception):
     """Raised when input validation fails."""
     def __init__(self, invalid_value, message):
         super().__init__(colours.yellow(f"\"{invalid_value}\" {message}"))
 
+class TooManyPlayersException(Exception):
+    """Raised when a player joins a board that already has MAX_PLAYERS players, their id would be taken by OBSTACLE."""
+    def __init__(self):
+        super().__init__(f"A board can't have more than {MAX_PLAYERS} players.")
+
+# the id -> colour and disc shape mapping lives in colours so the renderers that can't import this module draw players the same way.
+player_colour = colours.player_colour
+player_glyph = colours.player_glyph
+
 class Player():
-    player_counter = 0
-    players = {}
-    def __init__(self, colour):
-        """Creates a unique player.
+    def __init__(self, table, colour=None, name=None):
+        """Creates a unique player on a board.
         
         Arguments:
-        name -- The name of the player (string).
+        table -- The PlayerTable of the board to join, which gives the player the next id and keeps their score and resources.
+
+        Keyword Arguments:
+        colour (default: None) -- The colour function from the colours module to draw the player with, see player_colour if None.
+        name (default: None) -- The name of the player (string), the user is asked for one if None.
+
+        Raises:
+        TooManyPlayersException -- If the table already has MAX_PLAYERS players.
         """
-        Player.player_counter += 1
-        self.id = Player.player_counter # static reference to player count
-        Player.players[self.id] = self
-        self.colour = colour
-        self.__name = self.__get_username_input() # name should not be directly used, as it is formatted with colour in __str__.
-        self.__score = 0
-        self.pop_out_left = 1 # amount of pop outs left
-        self.special_disc_left = 1 # ammount of special discs left
+        self.table = table
+        self.id = table.add(self, colour)
+        self.__name = name if name is not None else self.__get_username_input() # name should not be directly used, as it is formatted with colour in __str__.
 
     def __get_username_input(self):
         """Private function to get username from player"""
@@ -87,48 +116,331 @@ class Player():
 
     def __str__(self):
         return self.colour(self.__name) # print the name of the player when the object is printed.
-    
+
+    @property
+    def colour(self):
+        return self.table.colours[self.id]
+
+    @colour.setter
+    def colour(self, colour):
+        self.table.set_colour(self.id, colour)
+
+    # the resources live in the arrays of the table, Board.perform_move takes them away through these.
+    @property
+    def pop_out_left(self):
+        """Amount of pop outs left."""
+        return int(self.table.pop_out_left[self.id])
+
+    @pop_out_left.setter
+    def pop_out_left(self, value):
+        self.table.pop_out_left[self.id] = value
+
+    @property
+    def special_disc_left(self):
+        """Amount of special discs left."""
+        return int(self.table.special_disc_left[self.id])
+
+    @special_disc_left.setter
+    def special_disc_left(self, value):
+        self.table.special_disc_left[self.id] = value
+
     @property
     def score(self):
-        return self.__score
+        return int(self.table.scores[self.id])
 
     @score.setter # Setting the player.score will call this method.
     def score(self, value):
         """Prints score change on assignment"""
-        
-        difference = value - self.score
+        self.announce_score(value - self.score, value)
+        self.table.scores[self.id] = value
+
+    def announce_score(self, difference, value):
+        """Prints a change of score.
+
+        Arguments:
+        difference -- How many points were gained, negative if they were lost.
+        value -- The score after the change.
+        """
         if difference > 0:
             print(f"{self} gained {colours.yellow(abs(difference))} point{'s' if difference > 1 else ''}, They now have {colours.yellow(value)} points.")
         elif difference < 0:
-            print(f"{self} lost {colours.yellow(abs(difference))} point{'s' if difference > 1 else ''}. They now have {colours.yellow(value)} points.")
-        self.__score = value
+            print(f"{self} lost {colours.yellow(abs(difference))} point{'s' if difference < -1 else ''}. They now have {colours.yellow(value)} points.")
+
+class PlayerTable():
+    def __init__(self, pop_outs=1, special_discs=1):
+        """The players of one board, everything about them is kept in arrays indexed by player id (like the cells of the board),
+        so scoring and drawing the board cost the same whether there are 2 or MAX_PLAYERS players.
+
+        Keyword Arguments:
+        pop_outs (default: 1) -- PopOuts every player starts with.
+        special_discs (default: 1) -- special discs every player starts with.
+        """
+        self.players = {} # player id -> Player, in the order they joined, which is the order they take turns in.
+        self.colours = np.full(256, None, dtype=object) # player id -> colour function.
+        self.glyphs = np.full(256, "○", dtype=object) # player id -> coloured disc, the renderer draws every cell with one lookup in this.
+        self.scores = np.zeros(256, dtype=np.int64)
+        self.pop_out_left = np.zeros(256, dtype=np.int64)
+        self.special_disc_left = np.zeros(256, dtype=np.int64)
+        self.version = 0 # goes up whenever a glyph changes, so boards only hand the renderer new glyphs then.
+        self.__pop_outs = pop_outs
+        self.__special_discs = special_discs
+
+    def add(self, player, colour=None):
+        """Gives a player the next free id, this is called by Player.
+
+        Keyword Arguments:
+        colour (default: None) -- The colour function of the player, see player_colour if None.
+
+        Returns:
+        The id of the player.
+
+        Raises:
+        TooManyPlayersException -- If the table already has MAX_PLAYERS players.
+        """
+        player_id = len(self.players) + 1 # players never leave, so the ids count up from 1 without gaps.
+        if player_id > MAX_PLAYERS:
+            raise TooManyPlayersException()
+        self.players[player_id] = player
+        self.pop_out_left[player_id] = self.__pop_outs
+        self.special_disc_left[player_id] = self.__special_discs
+        self.set_colour(player_id, colour if colour is not None else player_colour(player_id))
+        return player_id
+
+    def set_colour(self, player_id, colour):
+        """Changes the colour of a player, making their glyph again."""
+        self.colours[player_id] = colour
+        self.glyphs[player_id] = colour(player_glyph(player_id))
+        self.version += 1
+
+    def update_scores(self, score_counts, announce=False):
+        """Sets the score of every player at once from an array indexed by player id, e.g. Board.score_counts.
+
+        Arguments:
+        score_counts -- int array of 256 scores.
+
+        Keyword Arguments:
+        announce (default: False) -- print the change of every player whose score changed, like setting Player.score.
+
+        Returns:
+        An int array of the ids of the players whose score changed.
+        """
+        changed = np.flatnonzero(score_counts != self.scores) # only the players that scored are looked at one by one.
+        if announce:
+            for player_id in changed.tolist():
+                self.players[player_id].announce_score(int(score_counts[player_id] - self.scores[player_id]), int(score_counts[player_id]))
+        np.copyto(self.scores, score_counts)
+        return changed
+
+    def leaders(self):
+        """Gets the ids of the players with the highest score, more than one means a tie."""
+        ids = np.fromiter(self.players, dtype=np.intp, count=len(self.players))
+        scores = self.scores[ids]
+        return ids[scores == scores.max()].tolist()
+
+    # a table can be used like the dictionary of player id to Player it used to be.
+    def __getitem__(self, player_id):
+        return self.players[player_id]
+
+    def __contains__(self, player_id):
+        return player_id in self.players
+
+    def __iter__(self):
+        return iter(self.players)
+
+    def __len__(self):
+        return len(self.players)
+
+    def keys(self):
+        return self.players.keys()
+
+    def values(self):
+        return self.players.values()
+
+    def items(self):
+        return self.players.items()
+
+# (rows, columns, connect size) -> the window table of a board shape, see window_table.
+WINDOW_TABLES = {}
+
+def window_table(shape, connect_size):
+    """Gets the index tables of every scoring window of a board shape, they are only built once per shape and connect size.
+    A window is connect_size cells in a line (horizontal, vertical or either diagonal), and a player scores a point
+    for every window that only has their discs in it, which adds up to the same as counting runs lane by lane.
+
+    Arguments:
+    shape -- the (rows, columns) of the board.
+    connect_size -- the amount of discs that should be placed in one line to score a point.
+
+    Returns:
+    A tuple of:
+        windows -- int array with the shape (window count, connect_size), the flat cell indices of every window.
+        cell_windows -- list with an int array per flat cell index, the windows that cell is in.
+    """
+    key = (*shape, connect_size)
+    if key not in WINDOW_TABLES:
+        rows, columns = shape
+        cells = np.arange(rows * columns).reshape(shape)
+        # the same windows scoring.window_owners checks, as the flat indices of their cells instead of the cells themselves.
+        windows = np.concatenate([np.zeros((0, connect_size), dtype=np.intp)] + [np.stack(slices, axis=-1).reshape(-1, connect_size) for slices in scoring.window_slices(cells, connect_size)])
+        # invert the table, sorting the (cell, window) pairs by cell groups every cell's windows together.
+        window_ids = np.repeat(np.arange(len(windows)), connect_size)
+        order = np.argsort(windows.ravel(), kind="stable")
+        bounds = np.searchsorted(windows.ravel()[order], np.arange(rows * columns + 1))
+        cell_windows = [window_ids[order[bounds[cell]:bounds[cell + 1]]] for cell in range(rows * columns)]
+        WINDOW_TABLES[key] = (windows, cell_windows)
+    return WINDOW_TABLES[key]
+
+class BoardSnapshot():
+    __slots__ = ("board", "heights", "window_owners", "score_counts", "has_scores", "scored_connect_size", "changed_cells", "scores", "players")
+
+    def __init__(self, shape):
+        """Buffers that hold everything needed to put a Board back the way it was, see Board.snapshot.
+        The arrays are allocated once, so a snapshot can be taken into again and again without allocating.
+
+        Arguments:
+        shape -- the (rows, columns) of the board.
+        """
+        self.board = np.zeros(shape, dtype=np.uint8)
+        self.heights = np.zeros(shape[1], dtype=np.intp)
+        self.window_owners = None # uint8 array of the owner of every scoring window, made by the first snapshot of a scored board.
+        self.score_counts = np.zeros(256, dtype=np.int64)
+        self.has_scores = False # whether the board had scored its windows yet when the snapshot was taken.
+        self.scored_connect_size = None
+        self.changed_cells = set()
+        self.scores = {}
+        self.players = [] # (player, pop_out_left, special_disc_left) of every player passed to snapshot.
 
 class Board():
-    def __init__(self, board_size):
+    def __init__(self, board_size, seed=None, players=None):
         """Creates a board with an obstacle placed randomly at the bottom.
 
         Arguments:
         board_size -- A 2 element tuple that describes the size of the board.
+
+        Keyword Arguments:
+        seed (default: None) -- Seed for the obstacle position and the background pattern drawn on the empty cells.
+        players (default: None) -- The PlayerTable of the board, a new empty one if None.
         """
+        self.scores = {} # running score of every player id on the board, kept up to date by calculate_scores.
+        self.random = random.Random(seed) # every board has its own random numbers, so a seeded game plays out the same in any process.
+        self.players = players if players is not None else PlayerTable()
+        self.renderer = renderer.Renderer(seed) # draws the board, keeping the coloured glyphs between frames.
+        self.__drawn_players = None # (table id, version) of the glyphs the renderer has, see __str__.
         self.board = np.zeros(board_size, dtype=np.uint8) # generate a 2 dimentional array, with zeroed 8 bit unsigned integer as the values.
 
-    def add_obstacle(self, obstacle_size=OBSTACLE_SIZE):
+    @property
+    def board(self):
+        """The cells of the board, row 0 is the top.
+        Assigning a new matrix keeps the column heights and the scores right, after editing the cells in place call refresh.
+        """
+        return self.__board
+
+    @board.setter
+    def board(self, cells):
+        self.__board = cells
+        self.refresh()
+
+    def refresh(self):
+        """Recounts the column heights and forgets the cached scores, for after the cells were edited in place."""
+        self.__heights = None # filled cells in every column, counted when first needed and then kept up to date by every move.
+        self.__window_owners = None # owner of every scoring window, or EMPTY, built by the first scoring pass.
+        self.__score_counts = None # int64 array of the score of every player id, the running totals behind self.scores.
+        self.__scored_connect_size = None # the connect size the window owners were found with.
+        self.__changed_cells = set() # flat index of every cell that changed since the last scoring pass.
+
+    @property
+    def heights(self):
+        """An int array of how many cells are filled in every column."""
+        if self.__heights is None:
+            self.__heights = np.count_nonzero(self.__board, axis=0) # cells in a column are always packed to the bottom, so counting them gives the height.
+        return self.__heights
+
+    def add_obstacle(self, obstacle_size=OBSTACLE_SIZE, column=None):
         """Adds an obstacle at a random point along the bottom of the board.
         
         
         Keyword Arguments:
         obstacle_size (default OBSTACLE_SIZE) -- A 2 element tuple that describes the size of the obstacle.
+        column (default None) -- The leftmost column of the obstacle, picked at random if None (e.g. when replaying a game).
         """
 
-        rand_y = random.randint(0, self.board.shape[1]-obstacle_size[1]) # get the last possible leftmost position of the obstacle.
+        rand_y = self.random.randint(0, self.board.shape[1]-obstacle_size[1]) if column is None else column # get the last possible leftmost position of the obstacle.
         self.board[self.board.shape[0]-obstacle_size[0]:self.board.shape[0], rand_y:rand_y+obstacle_size[1]] = OBSTACLE # calculate and set the obstucted cells to the pesudo-enum OBSTACLE, to denote that they have been obstructed.
+        self.heights[rand_y:rand_y+obstacle_size[1]] = np.count_nonzero(self.board[:, rand_y:rand_y+obstacle_size[1]], axis=0)
+        self.__changed_cells.update(row * self.board.shape[1] + column for row in range(self.board.shape[0]-obstacle_size[0], self.board.shape[0]) for column in range(rand_y, rand_y+obstacle_size[1]))
+
+
+    def calculate_scores(self, connect_size=CONNECT_SIZE, incremental=True):
+        """Calculates the scores of the players, the running totals are kept in self.scores.
+        This is score_counts as a dictionary, which only has the players with a point in it.
+
+        Keyword Arguments:
+        connect_size (default CONNECT_SIZE) -- the amount of discs that should be placed in one line to score a point.
+        incremental (default True) -- see score_counts.
+
+        Returns:
+        A dictionary of player id to score, players without a point are omitted.
+        """
+        score_counts = self.score_counts(connect_size, incremental)
+        self.scores = {int(player_id): int(score_counts[player_id]) for player_id in np.flatnonzero(score_counts)}
+        return dict(self.scores)
+
+    def score_counts(self, connect_size=CONNECT_SIZE, incremental=True):
+        """Calculates the score of every player id at once, e.g. for PlayerTable.update_scores.
+
+        Every scoring window of the board is looked up in one gather with the cached window table. The owner of
+        every window is kept, so an incremental pass only looks again at the windows of the cells that changed.
+
+        Keyword Arguments:
+        connect_size (default CONNECT_SIZE) -- the amount of discs that should be placed in one line to score a point.
+        incremental (default True) -- only look at the windows of cells that changed since the last call,
+                                      if False the whole board is scored again, for after it was edited in place.
+
+        Returns:
+        A read only int64 array of 256 scores indexed by player id, it changes with the board so copy it to keep it.
+        """
+        if not incremental:
+            self.refresh() # the board may have been edited directly, so don't trust the heights or the cache anymore.
+        windows, cell_windows = window_table(self.board.shape, connect_size)
+        if self.__window_owners is None or self.__scored_connect_size != connect_size: # nothing cached yet, score every window once.
+            self.__window_owners = self.__find_owners(windows)
+            self.__score_counts = np.bincount(self.__window_owners, minlength=256)
+            self.__scored_connect_size = connect_size
+        elif self.__changed_cells:
+            window_ids = np.unique(np.concatenate([cell_windows[cell] for cell in self.__changed_cells]))
+            owners = self.__find_owners(windows[window_ids])
+            self.__score_counts -= np.bincount(self.__window_owners[window_ids], minlength=256) # take away what the windows used to be worth
+            self.__score_counts += np.bincount(owners, minlength=256) # and add what they are worth now
+            self.__window_owners[window_ids] = owners
+        self.__changed_cells.clear()
+        self.__score_counts[EMPTY] = self.__score_counts[OBSTACLE] = 0 # windows without an owner are counted as EMPTY.
+        score_counts = self.__score_counts.view()
+        score_counts.flags.writeable = False
+        return score_counts
+
+    def __find_owners(self, windows):
+        """Finds the owner of some windows with a single gather.
+
+        Arguments:
+        windows -- int array of flat cell indices with the shape (window count, connect size).
 
+        Returns:
+        A uint8 array with the player that owns every cell of each window, or EMPTY.
+        """
+        cells = self.board.ravel()[windows]
+        first = cells[:, 0]
+        owned = np.all(cells == first[:, np.newaxis], axis=1) & (first != EMPTY) & (first != OBSTACLE)
+        return np.where(owned, first, EMPTY).astype(np.uint8)
 
-    def calculate_scores(self, connect_size=CONNECT_SIZE):
-        """Calculates and sets the scores of the players.
+    def rescan_scores(self, connect_size=CONNECT_SIZE):
+        """Calculates the scores of the players by scanning every lane of the board.
+        This does not touch the players or the cached windows, so it can be used to verify calculate_scores.
 
         Keyword Arguments:
         connect_size (default CONNECT_SIZE) -- the amount of discs that should be placed in one line to score a point.
+
+        Returns:
+        A dictionary of player id to score, players without a point are omitted.
         """
         matrix = self.board
 
@@ -142,22 +454,47 @@ class Board():
 
         for direction in [backwards_diag, fowards_diag, vertical, horizontal]:
             for lane in direction:
-                if len(lane) < connect_size: continue
-                indices = np.where(np.diff(lane) != 0)[0] + 1 # find the indices where the discs change
-                sublanes = np.split(lane, indices) # split the lane at the found indices
-                results = [(sublane[0], len(sublane)) for sublane in sublanes] # create a list of tuples containing the value and its count for each lane
-                for cell, connection_length in results:
-                    if connection_length < connect_size or cell in [EMPTY, OBSTACLE]: # make sure it is a player that we are tracking
-                        continue
-                    # if score is not already set this round for the given player, default it to 0 and add the calculated score to it.
-                    score_buffer[cell] = score_buffer.setdefault(cell, 0) + connection_length - (connect_size - 1)
-            
-        for playerid, score in score_buffer.items():
-            Player.players[playerid].score = score
-
-        for id, player in Player.players.items():
-            if id not in score_buffer.keys():
-                player.score = 0
+                Board.__score_lane(lane, connect_size, score_buffer)
+
+        return score_buffer
+
+    @staticmethod
+    def __score_lane(lane, connect_size, score_buffer):
+        """Adds the points scored in a single lane to the score buffer.
+
+        Arguments:
+        lane -- 1 dimentional array of cells.
+        connect_size -- the amount of discs that should be placed in one line to score a point.
+        score_buffer -- dictionary of player id to score, which is updated in place.
+        """
+        if len(lane) < connect_size: return
+        indices = np.where(np.diff(lane) != 0)[0] + 1 # find the indices where the discs change
+        sublanes = np.split(lane, indices) # split the lane at the found indices
+        results = [(sublane[0], len(sublane)) for sublane in sublanes] # create a list of tuples containing the value and its count for each lane
+        for cell, connection_length in results:
+            if connection_length < connect_size or cell in [EMPTY, OBSTACLE]: # make sure it is a player that we are tracking
+                continue
+            # if score is not already set this round for the given player, default it to 0 and add the calculated score to it.
+            score_buffer[int(cell)] = score_buffer.setdefault(int(cell), 0) + connection_length - (connect_size - 1)
+
+    def legal_move_mask(self, player, move_type):
+        """Finds the columns a move type is legal in, from the column heights without looking at any column.
+
+        Arguments:
+        player -- The Player (object) that would perform the move.
+        move_type -- The type of move. (string containing "n", "p" or "s", for normal, pop and special respectively.)
+
+        Returns:
+        A bool array with an entry per column.
+        """
+        match move_type:
+            case "n":
+                return self.heights < self.board.shape[0]
+            case "p":
+                return (self.board[-1] == player.id) & bool(player.pop_out_left)
+            case "s":
+                return (self.heights < self.board.shape[0]) & bool(player.special_disc_left)
+        return np.zeros(self.board.shape[1], dtype=bool)
 
     def perform_move(self, player, move_type, column):
         """Updates the board with respect to the player and move type.
@@ -169,24 +506,26 @@ class Board():
         Raises:
         IllegalMoveException -- if the move performed by the user is not allowed due to the rules of the game. e.g. the requested column is full.
         """
+        rows = self.board.shape[0]
+        if self.heights[column] == rows and move_type != 'p': # check if it is full unless it's popout.
+            raise IllegalMoveException("the column is full")
+        row = rows - 1 - self.heights[column] # the last free slot of the column, the cells are always packed to the bottom.
 
-        column_cells = self.board[:, column] # get the column slice of the move
-
-        for row in range(0, len(column_cells)): # loop over every row
-            if np.all(column_cells) and move_type != 'p': # check if it is full unless it's popout.
-                raise IllegalMoveException("the column is full")
-            if row == self.board.shape[0]-1 or column_cells[row+1]: # check if column is full / is the bottom of the board / is the current spot the last free slot
-                break # we will use this row, as this is the correct row.
-        
         match move_type:
             case "n":
                 self.board[row, column] = player.id # set the cell to the player's id to mark it as theirs
+                self.heights[column] += 1
+                self.__changed_cells.add(int(row) * self.board.shape[1] + column % self.board.shape[1])
                 return
             case "p":
                 if not player.pop_out_left: raise IllegalMoveException("you have no more PopOut left")
                 if self.board[-1, column] == player.id:
-                    self.board[-1, column] = EMPTY
-                    self.__apply_gravity()
+                    column_before = np.copy(self.board[:, column:column+1]) # only this column can move, so only it needs to be compared.
+                    top = row + 1 # the highest filled cell.
+                    self.board[top+1:, column] = column_before[top:-1, 0] # everything above the popped disc falls down one cell.
+                    self.board[top, column] = EMPTY
+                    self.heights[column] -= 1
+                    self.__record_changes(column_before, column % self.board.shape[1])
                     player.pop_out_left -= 1
                 else:
                     raise IllegalMoveException("you cannot popout a disc that you don't own")
@@ -194,25 +533,42 @@ class Board():
             case "s":
                 # grab all 9 tiles around the cell it landed on.
                 if not player.special_disc_left: raise IllegalMoveException("you have no more special discs left")
-                row_slice = slice(max(0, row - 1), min(self.board.shape[0], row + 2)) # make sure it is not out of bounds
+                column %= self.board.shape[1]
+                row_slice = slice(max(0, row - 1), min(rows, row + 2)) # make sure it is not out of bounds
                 col_slice = slice(max(0, column - 1), min(self.board.shape[1], column + 2)) # make sure it is not out of bounds.
+                columns_before = np.copy(self.board[:, col_slice]) # the blast and the gravity after it only touch these columns.
                 self.board[row_slice, col_slice] = EMPTY # set the grabbed cells to be empty
-                self.__apply_gravity() # do a gravity simulation on the array
+                self.__apply_gravity(columns=col_slice) # do a gravity simulation on the blasted columns
+                self.__record_changes(columns_before, col_slice.start)
                 player.special_disc_left -= 1
                 return 
 
-    def __apply_gravity(self):
-        """Iterate over the board matrix multiple times until every cell is in it's lowest state."""
-        while True:
-            oldState = np.copy(self.board) # make a clone of the matrix, so we don't accidentally use a reference.
-            for (row, column), cell in np.ndenumerate(self.board[:-1, :]): # loop over board, with the last row omitted.
-                if self.board[row + 1, column] == EMPTY: # if slot below is empty
-                    self.board[row, column] = EMPTY # set the current to empty
-                    self.board[row + 1, column] = cell # set the slot below to what current was
-            if np.array_equal(oldState, self.board): 
-                break # nothing was changed on the board this iteration, break
-            else:
-                continue # there was something that moved, so we need to iterate again to make sure everything is settled.
+    def __record_changes(self, columns_before, first_column):
+        """Marks the cells that differ from a copy of some neighbouring columns as changed, so they get rescored.
+
+        Arguments:
+        columns_before -- copy of the columns taken before the move.
+        first_column -- the index of the leftmost column in the copy.
+        """
+        columns_after = self.board[:, first_column:first_column + columns_before.shape[1]]
+        for row, column in zip(*np.nonzero(columns_before != columns_after)):
+            self.__changed_cells.add(int(row) * self.board.shape[1] + first_column + int(column))
+
+    def __apply_gravity(self, columns=None):
+        """Settles every cell to the lowest state in a single pass over the columns.
+        Non-empty cells (discs and obstacles) are stably partitioned to the bottom of their column, so their order is kept.
+
+        Keyword Arguments:
+        columns (default: None) -- index, slice or list of the columns to settle, every column is settled if None.
+        """
+        if columns is None: columns = slice(None)
+        cells = self.board[:, columns]
+        filled = cells != EMPTY
+        instrumentation.count("gravity_iterations", cells.size // cells.shape[0]) # the pass settles each column once, so a column is an iteration.
+        order = np.argsort(filled, axis=0, kind="stable") # empty cells sort first (to the top), the rest keep their relative order.
+        self.board[:, columns] = np.take_along_axis(cells, order, axis=0)
+        if self.__heights is not None: # otherwise they will be counted when needed.
+            self.__heights[columns] = np.count_nonzero(filled, axis=0)
 
     def __str__(self):
         """Creates an ascii representation of the board.
@@ -220,23 +576,11 @@ class Board():
         Returns:
         A string that can be printed to the terminal.
         """
-        string_repr = "\t\t"
-        string_repr += colours.light_purple(colours.underline(" ".join(str(y) for y in range(1, BOARD_SIZE[1]+1)))) + "\n\t\t" # Underlined numbers
-        for y in range(len(self.board)):
-            row = self.board[y]
-            for cell in row: # go over every cell
-                if cell == OBSTACLE:
-                    string_repr += colours.light_purple("◌") # draw light purple cell for obstacle
-                elif cell == EMPTY:
-                    string_repr += [colours.dark_gray("◌"), colours.dark_gray("○")][random.randint(0, 1)] # draw a random pattern for background (for aesthetics)
-                for id, player in Player.players.items():
-                    if cell == id:
-                        string_repr += player.colour("○") # draw the player depending on their colour.
-
-                string_repr += " "
-            string_repr += "\n\t\t"
-        string_repr += colours.light_purple("‾"*(2*BOARD_SIZE[1]-1)) # draw the bottom of the board, this is responsive to the board size.
-        return string_repr.encode('utf8').decode(sys.stdout.encoding) # make sure to be using the utf-8 encoding as the circles do not work in some other encodings.
+        drawn_players = (id(self.players), self.players.version)
+        if drawn_players != self.__drawn_players: # only hand over the glyphs when a player joined or changed colour.
+            self.renderer.set_glyphs(self.players.glyphs)
+            self.__drawn_players = drawn_players
+        return self.renderer.render(self.board)
 
     def is_empty_slot_available(self):
         """Checks if the board has any empty spaces left.
@@ -244,7 +588,73 @@ class Board():
         Returns:
         True if there is an empty slot available, else False.
         """
-        return not np.all(self.board)
+        return bool(np.any(self.heights < self.board.shape[0]))
+
+    def snapshot(self, players=(), into=None):
+        """Saves the board, its cached scores and the resources of some players, to go back to with restore.
+        Searches and rollouts can keep one snapshot per depth and take into it every time, which copies into
+        the buffers it already has instead of allocating new ones.
+
+        Keyword Arguments:
+        players (default: ()) -- the players whose PopOuts and special discs should be saved too.
+        into (default: None) -- a BoardSnapshot of a board the same shape to reuse, a new one is made if None.
+
+        Returns:
+        The BoardSnapshot.
+        """
+        if into is None or into.board.shape != self.board.shape:
+            into = BoardSnapshot(self.board.shape)
+        np.copyto(into.board, self.board)
+        np.copyto(into.heights, self.heights)
+        into.has_scores = self.__window_owners is not None
+        if into.has_scores:
+            if into.window_owners is None or into.window_owners.shape != self.__window_owners.shape:
+                into.window_owners = np.empty_like(self.__window_owners)
+            np.copyto(into.window_owners, self.__window_owners)
+            np.copyto(into.score_counts, self.__score_counts)
+        into.scored_connect_size = self.__scored_connect_size
+        into.changed_cells.clear()
+        into.changed_cells.update(self.__changed_cells)
+        into.scores = self.scores # calculate_scores always makes a new dictionary, so this one never changes.
+        into.players[:] = [(player, player.pop_out_left, player.special_disc_left) for player in players]
+        return into
+
+    def restore(self, snapshot):
+        """Puts the board and the players saved in a snapshot back, copying into the buffers the board already has.
+
+        Arguments:
+        snapshot -- a BoardSnapshot from snapshot, it can be restored any amount of times.
+        """
+        if self.__board.shape != snapshot.board.shape:
+            self.board = snapshot.board.copy() # a different board was assigned since, so there is nothing to copy into.
+        else:
+            np.copyto(self.__board, snapshot.board)
+        if self.__heights is None:
+            self.__heights = snapshot.heights.copy()
+        else:
+            np.copyto(self.__heights, snapshot.heights)
+        if snapshot.has_scores:
+            if self.__window_owners is None or self.__window_owners.shape != snapshot.window_owners.shape:
+                self.__window_owners = snapshot.window_owners.copy()
+                self.__score_counts = snapshot.score_counts.copy()
+            else:
+                np.copyto(self.__window_owners, snapshot.window_owners)
+                np.copyto(self.__score_counts, snapshot.score_counts)
+        else:
+            self.__window_owners = self.__score_counts = None
+        self.__scored_connect_size = snapshot.scored_connect_size
+        self.__changed_cells.clear()
+        self.__changed_cells.update(snapshot.changed_cells)
+        self.scores = snapshot.scores
+        for player, pop_out_left, special_disc_left in snapshot.players:
+            player.pop_out_left = pop_out_left
+            player.special_disc_left = special_disc_left
+
+# Timed when instrumentation is enabled, see instrumentation.py.
+instrumentation.register(Board, "perform_move", "perform_move", lambda args: {"move_type": args[2]})
+instrumentation.register(Board, "_Board__apply_gravity", "gravity")
+instrumentation.register(Board, "score_counts", "calculate_scores") # calculate_scores goes through it too.
+instrumentation.register(Board, "__str__", "render")
     
 def validate_username_input(string, default):
     """Does a sanity check on the given user input
@@ -370,47 +780,107 @@ def get_obstacle_size_from_players():
 
 def main():
     print("*"*60 + "\n If you do not see colour, please use a different terminal.\n" + "*"*60)
-    board = Board(BOARD_SIZE) # Create the board.
+    if METRICS_FILE or PROMETHEUS_FILE:
+        instrumentation.enable()
+    metrics_file = open(METRICS_FILE, "a") if METRICS_FILE else None
+    seed = GAME_SEED if GAME_SEED is not None else random.randrange(2 ** 32) # a game is always seeded, so every recorded one can be played again.
+    rng = random.Random(seed) # every random choice of the game comes from here, so a seed replays it exactly.
+    board = Board(BOARD_SIZE, seed=seed) # Create the board.
     try:
         print(board)
     except UnicodeEncodeError:
         colours.red("Your terminal does not support unicode encoding, please use a different terminal.")
         sys.exit(1)
 
-    Player(colours.lime) # Create Lime player.
-    Player(colours.red) # Create Red player.
-    # Player(colours.yellow) # Add a third player, this is fully supported and works as expected.
+    players = board.players # the player table of the board, which keeps the scores and resources of everyone.
+    for _ in range(PLAYER_COUNT):
+        Player(players) # Create the players, lime, red, yellow and then the colours of the palette.
 
+    computer_players = {} # player id -> ai.SearchPlayer or mcts.MCTSPlayer, for every player that the computer plays for.
+    opening_book = book.OpeningBook(BOOK_FILE) if BOOK_FILE and os.path.exists(BOOK_FILE) else None
+    for player in players.values():
+        if get_generic_choice_from_input(f"Should {player} be played by the computer?", ["yes", "no"], "no") == "yes":
+            if get_generic_choice_from_input(f"Should {player} look ahead with a search or with random games (monte carlo)?", ["search", "monte carlo"], "search") == "search":
+                computer_players[player.id] = ai.SearchPlayer(MOVE_TIME_LIMIT, book=opening_book)
+            else:
+                computer_players[player.id] = mcts.MCTSPlayer(MOVE_TIME_LIMIT, workers=None, book=opening_book) # rollouts on every core.
 
     connect_size = get_generic_choice_from_input("How many discs should you connect in a row to gain a point? (default 4)", range(3,5), 4)
     user_obstacle_dimention_input = get_obstacle_size_from_players()
 
-    board.add_obstacle((next(user_obstacle_dimention_input), next(user_obstacle_dimention_input))) # Add an obstacle to the bottom of the board.
+    obstacle_size = (next(user_obstacle_dimention_input), next(user_obstacle_dimention_input))
+    state = engine.new_game(BOARD_SIZE, players.keys(), connect_size, obstacle_size, rng=rng) # Add an obstacle to the bottom of the board.
+    board.board = engine.board_array(state)
     print(board)
-
-    while board.is_empty_slot_available(): # check if there is an empty slot left on the board.
-        for player in Player.players.values():
-            move_begin_time = time.time() # set the timer to start from here.
-            while True:
-                try:
+    header = record.GameHeader.from_state(state, obstacle_size, seed)
+    recorded_moves = []
+    spectator_file = open(SPECTATOR_FILE, "ab") if SPECTATOR_FILE else None
+    if spectator_file:
+        spectator_encoder = spectator.SpectatorEncoder(state)
+        spectator_file.write(spectator.pack_frame(spectator_encoder.keyframe()))
+
+    while not engine.is_terminal(state): # check if there is an empty slot left on the board.
+        player = players[state.player_id]
+        move_begin_time = time.time() # set the timer to start from here.
+        input_start = instrumentation.start() # 0 unless instrumentation is on.
+        while True:
+            try:
+                if player.id in computer_players:
+                    user_input = computer_players[player.id].get_move(state) # yields the same way as get_move_from_player.
+                else:
                     user_input = get_move_from_player(player, MOVE_TIME_LIMIT, move_begin_time)
-                    board.perform_move(player, move_type=next(user_input), column=next(user_input)) # Get row and column from user and perform a move with it.
-                except RanOutOfTimeException as e:
-                    print(e)
-                    time.sleep(2) # give users time to read the exception.
-                except IllegalMoveException as e:
-                    print(e)
-                    continue # if the user made an illegal move, repeat the process.
-                break
-
-            print(board)
-            board.calculate_scores(connect_size) # calculate scores based on custom connect length
-            if not board.is_empty_slot_available():
-                break
-
-    winning_player = max(Player.players.values(), key=lambda player: player.score) # get the player who wins by comparing the scores
-    tied_players = filter(lambda player: player.score == winning_player.score, Player.players.values())
-    tied_players = list(map(lambda player: str(player), tied_players))
+                move = (next(user_input), next(user_input))
+                instrumentation.observe("input", input_start, player="computer" if player.id in computer_players else "human")
+                state = engine.apply(state, move) # Get row and column from user and perform a move with it.
+                board.perform_move(player, *move) # the engine checked it, so the board can follow it without redrawing every cell from the engine.
+                recorded_moves.append(move)
+                instrumentation.count("moves", move_type=move[0])
+            except RanOutOfTimeException as e:
+                instrumentation.observe("input", input_start, player="human") # the slowest inputs are the ones that ran out of time.
+                instrumentation.count("timeouts")
+                print(e)
+                state = engine.skip_turn(state)
+                recorded_moves.append((record.SKIP, 0))
+                time.sleep(2) # give users time to read the exception.
+            except engine.IllegalMoveException as e:
+                instrumentation.count("illegal_moves", reason=e.reason)
+                print(IllegalMoveException(e.reason)) # the engine doesn't know about colours, so format it like the rest of the game.
+                continue # if the user made an illegal move, repeat the process.
+            break
+
+        if player.id in computer_players:
+            report = computer_players[player.id].report
+            if report["book"]:
+                print(f"{player} played a move from the opening book.")
+            elif "playouts" in report: # a mcts.MCTSPlayer
+                print(f"{player} played {colours.yellow(report['playouts'])} random games at {colours.yellow(f'{report['playouts_per_second']:.0f}')} games per second ({report['reused_visits']} kept from the last turn), and expects to win {report['win_rate']:.0%} of the time.")
+            else:
+                print(f"{player} searched {report['depth']} move{'s' if report['depth'] != 1 else ''} ahead at {colours.yellow(f'{report['nodes_per_second']:.0f}')} positions per second ({report['tt_hit_rate']:.0%} transposition table hits).")
+        print(board)
+        players.update_scores(board.score_counts(connect_size), announce=True) # calculate scores based on custom connect length, in one go for every player.
+        if metrics_file:
+            instrumentation.write_jsonl(metrics_file)
+        if spectator_file:
+            spectator_file.write(spectator.pack_frame(spectator_encoder.delta(state, recorded_moves[-1])))
+
+    for computer_player in computer_players.values():
+        if isinstance(computer_player, mcts.MCTSPlayer):
+            computer_player.close() # stop the rollout processes.
+    if metrics_file:
+        metrics_file.close()
+    if spectator_file:
+        spectator_file.close()
+    if PROMETHEUS_FILE:
+        with open(PROMETHEUS_FILE, "w") as file:
+            file.write(instrumentation.prometheus_text())
+
+    if RECORD_FILE:
+        with record.RecordWriter(RECORD_FILE) as writer:
+            writer.write_game(header, recorded_moves)
+
+    leaders = players.leaders() # get the players who win by comparing the scores
+    winning_player = players[leaders[0]]
+    tied_players = [str(players[id]) for id in leaders]
 
     if len(tied_players) > 1:
         print(f"Game finished, tie between {", ".join(tied_players[:-1])} and {tied_players[-1]} at {winning_player.score} points.")
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+"""
+    Unit tests for task2, these check the optimised parts of the board against the original algorithms.
+"""
+
+import random
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+import task2
+
+def make_players(count):
+    """Creates lightweight stand-ins for task2.Player, so no input is needed."""
+    return [SimpleNamespace(id=id, pop_out_left=1, special_disc_left=1) for id in range(1, count + 1)]
+
+def play_random_moves(board, players, rng, move_count):
+    """Plays random legal moves on the board, yielding after each one."""
+    for turn in range(move_count):
+        if not board.is_empty_slot_available():
+            return
+        player = players[turn % len(players)]
+        while True:
+            try:
+                board.perform_move(player, rng.choice("nnnnps"), rng.randrange(board.board.shape[1]))
+                break
+            except task2.IllegalMoveException:
+                continue
+        yield player
+
+def reference_gravity(board):
+    """The original gravity algorithm, which moves cells down one slot at a time until nothing changes."""
+    while True:
+        old_state = np.copy(board)
+        for (row, column), cell in np.ndenumerate(board[:-1, :]):
+            if board[row + 1, column] == task2.EMPTY:
+                board[row, column] = task2.EMPTY
+                board[row + 1, column] = cell
+        if np.array_equal(old_state, board):
+            return board
+
+def random_floating_board(rng, shape):
+    """Creates a board with discs and obstacles scattered anywhere, including mid air."""
+    cells = rng.choice([task2.EMPTY, task2.EMPTY, 1, 2, 3, task2.OBSTACLE], size=shape)
+    return cells.astype(np.uint8)
+
+class GravityTestCase(unittest.TestCase):
+    """Tests for the column compaction in 'Board.__apply_gravity'."""
+
+    def test_matches_reference_gravity(self):
+        rng = np.random.default_rng(3)
+        for _ in range(200):
+            board = task2.Board((int(rng.integers(1, 9)), int(rng.integers(1, 10))))
+            board.board = random_floating_board(rng, board.board.shape)
+            expected = reference_gravity(np.copy(board.board))
+            board._Board__apply_gravity()
+            np.testing.assert_array_equal(board.board, expected)
+
+    def test_restricted_columns(self):
+        rng = np.random.default_rng(5)
+        for columns in [0, 3, slice(1, 4), [0, 5], slice(5, 7)]:
+            board = task2.Board((6, 7))
+            board.board = random_floating_board(rng, board.board.shape)
+            expected = np.copy(board.board)
+            expected[:, columns] = reference_gravity(np.copy(board.board[:, columns]).reshape(6, -1)).reshape(expected[:, columns].shape)
+            board._Board__apply_gravity(columns=columns)
+            np.testing.assert_array_equal(board.board, expected)
+
+class IncrementalScoreTestCase(unittest.TestCase):
+    """Tests for the incremental mode of 'Board.calculate_scores'."""
+
+    def test_matches_full_rescan(self):
+        rng = random.Random(7)
+        for game in range(40):
+            random.seed(game)
+            connect_size = rng.choice([3, 4])
+            board = task2.Board((rng.randint(4, 8), rng.randint(4, 9)))
+            board.add_obstacle((rng.randint(1, 2), rng.randint(1, 3)))
+            players = make_players(rng.randint(2, 3))
+            for player in play_random_moves(board, players, rng, 60):
+                expected = board.rescan_scores(connect_size)
+                self.assertEqual(board.calculate_scores(connect_size), expected)
+                self.assertEqual({id: score for id, score in board.scores.items() if score}, expected)
+
+    def test_connect_size_change_rebuilds_cache(self):
+        board = task2.Board((6, 7))
+        board.board[5, 0:4] = 1
+        self.assertEqual(board.calculate_scores(4, incremental=False), {1: 1})
+        self.assertEqual(board.calculate_scores(4), {1: 1})
+        self.assertEqual(board.calculate_scores(3), {1: 2})
+
+class ColumnHeightTestCase(unittest.TestCase):
+    """Tests for the column heights and 'Board.legal_move_mask'."""
+
+    def test_heights_and_masks_follow_the_moves(self):
+        rng = random.Random(11)
+        for game in range(30):
+            board = task2.Board((rng.randint(3, 7), rng.randint(3, 8)), seed=game)
+            board.add_obstacle((rng.randint(1, 2), rng.randint(1, 3)))
+            players = make_players(2)
+            for player in play_random_moves(board, players, rng, 80):
+                np.testing.assert_array_equal(board.heights, np.count_nonzero(board.board, axis=0))
+                position = np.copy(board.board)
+                for other in players:
+                    for move_type in "nps":
+                        mask = board.legal_move_mask(other, move_type)
+                        for column in range(board.board.shape[1]):
+                            try:
+                                board.perform_move(SimpleNamespace(**vars(other)), move_type, column) # a copy, so nothing is used up.
+                                board.board = np.copy(position) # undo the move, assigning the board recounts the heights.
+                                legal = True
+                            except task2.IllegalMoveException:
+                                legal = False
+                            self.assertEqual(mask[column], legal, (move_type, column))
+
+    def test_window_table(self):
+        windows, cell_windows = task2.window_table((6, 7), 4)
+        self.assertEqual(len(windows), 69) # the classic board has 69 ways to connect 4.
+        self.assertEqual(sum(len(ids) for ids in cell_windows), 69 * 4)
+        self.assertEqual(len(task2.window_table((2, 2), 3)[0]), 0)
+
+class SnapshotTestCase(unittest.TestCase):
+    """Tests for 'Board.snapshot', 'Board.restore' and seeding a board."""
+
+    def test_restore_undoes_every_branch(self):
+        rng = random.Random(5)
+        for game in range(20):
+            board = task2.Board((6, 7), seed=game)
+            board.add_obstacle()
+            players = make_players(2)
+            for _ in play_random_moves(board, players, rng, rng.randrange(25)):
+                pass
+            board.calculate_scores()
+            position, scores, heights = np.copy(board.board), board.calculate_scores(), np.copy(board.heights)
+            resources = [(player.pop_out_left, player.special_disc_left) for player in players]
+            snapshot = board.snapshot(players)
+            branch = None
+            for _ in range(10):
+                for _ in play_random_moves(board, players, rng, 6):
+                    board.calculate_scores()
+                branch = board.snapshot(players, into=branch) # taking into the same snapshot reuses its buffers.
+                board.restore(snapshot)
+                np.testing.assert_array_equal(board.board, position)
+                np.testing.assert_array_equal(board.heights, heights)
+                self.assertEqual(board.scores, scores)
+                self.assertEqual(board.calculate_scores(), board.rescan_scores())
+                self.assertEqual([(player.pop_out_left, player.special_disc_left) for player in players], resources)
+            board.restore(branch)
+            self.assertEqual(board.calculate_scores(), board.rescan_scores())
+
+    def test_snapshot_reuses_its_buffers(self):
+        board = task2.Board((6, 7), seed=1)
+        board.add_obstacle()
+        board.calculate_scores()
+        snapshot = board.snapshot()
+        buffers = (snapshot.board, snapshot.heights, snapshot.window_owners, snapshot.score_counts)
+        board.perform_move(make_players(1)[0], "n", 0)
+        self.assertIs(board.snapshot(into=snapshot), snapshot)
+        self.assertEqual(buffers, (snapshot.board, snapshot.heights, snapshot.window_owners, snapshot.score_counts))
+
+    def test_seed_places_the_same_obstacle(self):
+        boards = [task2.Board((6, 7), seed=42) for _ in range(2)]
+        for board in boards:
+            random.seed() # the global random numbers don't matter anymore.
+            board.add_obstacle()
+        np.testing.assert_array_equal(boards[0].board, boards[1].board)
+
+class PlayerTableTestCase(unittest.TestCase):
+    """Tests for 'task2.PlayerTable' and 'task2.Player'."""
+
+    def test_player_table(self):
+        table, other_table = task2.PlayerTable(), task2.PlayerTable()
+        players = [task2.Player(table, name=name) for name in ("a", "b")]
+        self.assertEqual([player.id for player in players], [1, 2])
+        self.assertEqual(dict(table.items()), {1: players[0], 2: players[1]})
+        self.assertEqual(task2.Player(other_table, name="c").id, 1) # every board counts its own ids.
+        players[0].pop_out_left -= 1
+        self.assertEqual((table.pop_out_left[1], table.pop_out_left[2]), (0, 1))
+
+    def test_most_players(self):
+        enabled = task2.colours.enabled
+        task2.colours.set_enabled(True)
+        self.addCleanup(task2.colours.set_enabled, enabled)
+        table = task2.PlayerTable()
+        players = [task2.Player(table, name=str(id)) for id in range(1, task2.MAX_PLAYERS + 1)]
+        with self.assertRaises(task2.TooManyPlayersException):
+            task2.Player(table, name="one too many")
+        self.assertEqual(players[-1].id, task2.MAX_PLAYERS)
+        self.assertEqual(len(set(table.glyphs[1:task2.OBSTACLE])), task2.MAX_PLAYERS) # everyone looks different.
+
+    def test_many_players_scores(self):
+        rng = random.Random(7)
+        for player_count in (3, 40, task2.MAX_PLAYERS):
+            board = task2.Board((12, 14), seed=player_count, players=task2.PlayerTable())
+            players = [task2.Player(board.players, name=str(id)) for id in range(player_count)]
+            board.add_obstacle()
+            for player in play_random_moves(board, players, rng, 150):
+                changed = board.players.update_scores(board.score_counts())
+                scores = board.rescan_scores()
+                self.assertEqual({player.id: player.score for player in players if player.score}, scores)
+                self.assertTrue(set(changed.tolist()) <= set(range(1, player_count + 1)))
+            self.assertEqual(board.calculate_scores(), board.rescan_scores())
+            best = max(player.score for player in players)
+            self.assertEqual(board.players.leaders(), [player.id for player in players if player.score == best])
+
+if __name__ == '__main__': # Meant to be ran as an isolated script, outside of a module.
+    unittest.main() # Run all tests.